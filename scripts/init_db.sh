@@ -4,5 +4,21 @@ set -e
 # Wait for DB to start
 sleep 5
 echo "Initializing database..."
-docker exec -i db psql -U postgres -d shortener < services/shortener/schema.sql
+# Runs the service's own table creation (Database.init_db on every shard, in the
+# PG_PARTITIONING layout), so there is no separate schema file to drift from it
+docker-compose run --rm --no-deps shortener python -c "
+import asyncio
+import sys
+
+sys.path.insert(0, 'src')
+from infrastructure.database import database
+
+
+async def init():
+    await database.connect()
+    await database.close()
+
+
+asyncio.run(init())
+"
 echo "Database initialized."
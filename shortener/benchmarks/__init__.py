@@ -0,0 +1,12 @@
+"""
+In-process benchmarks for the URL shortener hot paths.
+
+Run from the ``shortener`` directory, e.g. ``python -m benchmarks.load_test --help``.
+"""
+
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
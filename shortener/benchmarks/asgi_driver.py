@@ -0,0 +1,90 @@
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+
+
+class ASGIResponse:
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self):
+        self.status = 0
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body = b""
+
+
+class ASGIDriver:
+    """
+    Minimal in-process ASGI client: no sockets, no HTTP parsing, just the app under test.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan_task: Optional[asyncio.Task] = None
+        self._lifespan_queue: Optional[asyncio.Queue] = None
+        self._lifespan_events: Optional[asyncio.Queue] = None
+
+    async def startup(self):
+        self._lifespan_queue = asyncio.Queue()
+        self._lifespan_events = asyncio.Queue()
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_task = asyncio.create_task(
+            self.app(scope, self._lifespan_queue.get, self._lifespan_events.put)
+        )
+        await self._lifespan_queue.put({"type": "lifespan.startup"})
+        event = await self._lifespan_events.get()
+        if event["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"ASGI startup failed: {event}")
+
+    async def shutdown(self):
+        if self._lifespan_task is None:
+            return
+        await self._lifespan_queue.put({"type": "lifespan.shutdown"})
+        await self._lifespan_events.get()
+        await self._lifespan_task
+        self._lifespan_task = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: Iterable[Tuple[bytes, bytes]] = (),
+    ) -> ASGIResponse:
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"benchmark")] + list(headers),
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 80),
+        }
+        response = ASGIResponse()
+        finished = asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response.status = message["status"]
+                response.headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response.body += message.get("body", b"")
+                if not message.get("more_body", False):
+                    finished.set()
+
+        await self.app(scope, receive, send)
+        finished.set()
+        return response
@@ -0,0 +1,133 @@
+"""
+Short-code generation and URL validation/canonicalization: per-item calls vs. the batch API.
+
+Compares, over the same synthetic URLs (a share of them invalid):
+
+    per_item        canonical_url + generate_short_code per URL, on the event loop
+    batch_inline    short_codes_for over the whole list, on the event loop
+    batch_threads   URLShortenerService.generate_short_codes on a ThreadPoolExecutor
+    batch_processes URLShortenerService.generate_short_codes on a ProcessPoolExecutor
+
+and reports throughput plus the worst event loop stall seen by a 1 ms ticker meanwhile,
+i.e. how long a redirect sharing the loop could have been delayed:
+
+    python -m benchmarks.codegen_bench --urls 1000000 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from benchmarks.report import environment
+from domain.url_normalization import canonical_url
+from domain.url_shortener_service import URLShortenerService, short_codes_for
+
+
+def make_urls(count: int, invalid_ratio: float, seed: int):
+    rng = random.Random(seed)
+    urls = []
+    for i in range(count):
+        if rng.random() < invalid_ratio:
+            urls.append(f"ftp://files.example.com/{i}")
+        else:
+            urls.append(
+                f"https://www.example{i % 1000}.com/articles/{i}/some-readable-slug"
+                f"?utm_source=newsletter&ref={rng.getrandbits(32):x}"
+            )
+    return urls
+
+
+def per_item(urls):
+    results = []
+    for url in urls:
+        url = canonical_url(url)
+        results.append((url, URLShortenerService.generate_short_code(url)) if url else None)
+    return results
+
+
+async def max_loop_stall(work) -> tuple:
+    """Run the work coroutine while a ticker records the longest gap between its wake-ups."""
+    worst = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst = max(worst, now - last - 0.001)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    result = await work
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    return result, elapsed, worst
+
+
+async def inline(fn, urls):
+    return fn(urls)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    urls = make_urls(args.urls, args.invalid_ratio, args.seed)
+    expected = per_item(urls[: args.check])
+    results = {}
+    with ThreadPoolExecutor(args.workers) as threads, ProcessPoolExecutor(args.workers) as procs:
+        # Warm the process pool so start-up cost is not billed to the first run
+        await URLShortenerService.generate_short_codes(urls[: args.workers], procs, chunk_size=1)
+        variants = {
+            "per_item": lambda: inline(per_item, urls),
+            "batch_inline": lambda: inline(short_codes_for, urls),
+            "batch_threads": lambda: URLShortenerService.generate_short_codes(
+                urls, threads, args.chunk_size
+            ),
+            "batch_processes": lambda: URLShortenerService.generate_short_codes(
+                urls, procs, args.chunk_size
+            ),
+        }
+        for name, make in variants.items():
+            codes, elapsed, stall = await max_loop_stall(make())
+            if codes[: args.check] != expected:
+                raise RuntimeError(f"{name} disagrees with the per-item path")
+            results[name] = {
+                "seconds": round(elapsed, 4),
+                "urls_per_second": round(len(urls) / elapsed),
+                "max_loop_stall_ms": round(stall * 1000, 3),
+            }
+    return {
+        "benchmark": "codegen_bench",
+        "environment": {**environment(), "cpus": os.cpu_count()},
+        "config": {
+            "urls": args.urls,
+            "invalid_ratio": args.invalid_ratio,
+            "workers": args.workers,
+            "chunk_size": args.chunk_size,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--urls", type=int, default=1_000_000)
+    parser.add_argument("--invalid-ratio", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--check", type=int, default=10_000, help="URLs cross-checked per run")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(asyncio.run(run(args)), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Size and speed of URL_CREATED event encodings.
+
+Builds --events realistic events (7-character codes, URLs of varying length, with and without
+correlation ids and expiry, all with created_at) and reports, per format, bytes per event and encode/decode
+throughput. "json (before)" is the previous inline path, json.dumps(...).encode() and
+json.loads(raw.decode()); the others go through application.messaging.serializers:
+
+    python -m benchmarks.event_codec_bench --events 200000
+"""
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+import uuid
+
+from application.messaging.publishers import url_created_message
+from application.messaging.serializers import SERIALIZERS, decode_event
+from benchmarks.report import environment
+
+
+def make_events(count: int, seed: int):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits
+    events = []
+    for i in range(count):
+        path = "/".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))
+            for _ in range(rng.randint(1, 5))
+        )
+        long_url = f"https://www.example{i % 5000}.com/{path}?id={rng.getrandbits(32):x}"
+        events.append(
+            url_created_message(
+                "".join(rng.choices(alphabet, k=7)),
+                long_url,
+                str(uuid.UUID(int=rng.getrandbits(128))) if rng.random() < 0.5 else None,
+                time.time() + 86400 if rng.random() < 0.3 else None,
+                float(int(time.time())),
+            )
+        )
+    return events
+
+
+def timed(encode, decode, events) -> dict:
+    start = time.perf_counter()
+    encoded = [encode(event) for event in events]
+    encode_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = [decode(raw) for raw in encoded]
+    decode_elapsed = time.perf_counter() - start
+    assert decoded == events
+
+    total_bytes = sum(len(raw) for raw in encoded)
+    return {
+        "bytes_per_event": round(total_bytes / len(events), 1),
+        "encode_per_s": round(len(events) / encode_elapsed),
+        "decode_per_s": round(len(events) / decode_elapsed),
+        "encode_ns": round(encode_elapsed / len(events) * 1e9),
+        "decode_ns": round(decode_elapsed / len(events) * 1e9),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    events = make_events(args.events, args.seed)
+    results = {
+        "json (before)": timed(
+            lambda event: json.dumps(event).encode("utf-8"),
+            lambda raw: json.loads(raw.decode()),
+            events,
+        )
+    }
+    for name, serializer in SERIALIZERS.items():
+        # Decoding through decode_event, as the consumer does, includes format detection
+        results[name] = timed(serializer.encode, decode_event, events)
+    return {
+        "benchmark": "event_codec_bench",
+        "environment": environment(),
+        "config": {"events": args.events},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(run(args), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
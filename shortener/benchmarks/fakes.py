@@ -0,0 +1,216 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from domain.models import URLMapping
+
+
+async def _simulate(latency: float):
+    # Always yield to the loop so fakes interleave like real network clients
+    await asyncio.sleep(latency)
+
+
+class FakeDatabase:
+    """
+    In-memory stand-in for infrastructure.database.Database.
+
+    With pool_size, at most that many simulated statements run at once, like a connection
+    pool, and callers beyond it queue (their wait is kept in pool_wait like the real one).
+    """
+
+    def __init__(self, latency: float = 0.0, pool_size: Optional[int] = None):
+        self.latency = latency
+        self.pool = object()
+        self.pool_wait = 0.0
+        self.statements = 0
+        self._slots = asyncio.Semaphore(pool_size) if pool_size else None
+        self.by_code: Dict[str, URLMapping] = {}
+        self.by_url: Dict[str, str] = {}
+
+    async def connect(self):
+        return None
+
+    async def _statement(self):
+        self.statements += 1
+        if self._slots is None:
+            await _simulate(self.latency)
+            return
+        start = time.perf_counter()
+        async with self._slots:
+            self.pool_wait += (time.perf_counter() - start - self.pool_wait) * 0.2
+            await _simulate(self.latency)
+
+    def _insert(
+        self, short_code: str, long_url: str, expires_at: Optional[float]
+    ) -> Optional[URLMapping]:
+        now = time.time()
+        existing = self.by_code.get(short_code)
+        if existing is not None and not existing.is_expired(now):
+            return None
+        mapping = URLMapping(short_code, long_url, float(int(now)), expires_at)
+        self.by_code[short_code] = mapping
+        self.by_url[long_url] = short_code
+        return mapping
+
+    async def insert_url_mapping(
+        self, short_code: str, long_url: str, expires_at: Optional[float] = None
+    ) -> Optional[URLMapping]:
+        await self._statement()
+        return self._insert(short_code, long_url, expires_at)
+
+    async def insert_url_mappings(
+        self, records: Iterable[Tuple[str, str, Optional[float]]]
+    ) -> List[Optional[URLMapping]]:
+        await self._statement()
+        return [self._insert(*record) for record in records]
+
+    async def get_mapping(self, short_code: str) -> Optional[URLMapping]:
+        await self._statement()
+        return self.by_code.get(short_code)
+
+    async def get_short_code_by_long_url(self, long_url: str) -> Optional[str]:
+        await self._statement()
+        short_code = self.by_url.get(long_url)
+        if short_code is None or self.by_code[short_code].is_expired(time.time()):
+            return None
+        return short_code
+
+    async def delete_expired(self, batch_size: int, max_batches: int) -> List[URLMapping]:
+        await self._statement()
+        now = time.time()
+        expired = [m for m in self.by_code.values() if m.is_expired(now)]
+        expired = expired[: batch_size * max_batches]
+        for mapping in expired:
+            del self.by_code[mapping.short_code]
+            self.by_url.pop(mapping.long_url, None)
+        return expired
+
+    async def warm_statements(self) -> int:
+        await self._statement()
+        return 1
+
+    async def iter_mappings(
+        self, batch_size: int = 10_000, include_expired: bool = False
+    ) -> AsyncIterator[List[URLMapping]]:
+        now = time.time()
+        mappings = [m for m in self.by_code.values() if include_expired or not m.is_expired(now)]
+        for i in range(0, len(mappings), batch_size):
+            await self._statement()
+            yield mappings[i : i + batch_size]
+
+    async def close(self):
+        return None
+
+
+class FakeRedisClient:
+    """
+    In-memory stand-in for infrastructure.redis_client.RedisClient (no expiry).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.store: Dict[str, URLMapping] = {}
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+
+    async def connect(self):
+        return None
+
+    async def cache_short_code(
+        self, short_code: str, long_url: str, created_at=None, expires_at=None
+    ):
+        await _simulate(self.latency)
+        self.store[f"url:{short_code}"] = URLMapping(short_code, long_url, created_at, expires_at)
+
+    async def get_mapping(self, short_code: str) -> Optional[URLMapping]:
+        await _simulate(self.latency)
+        return self.store.get(f"url:{short_code}")
+
+    async def delete_short_codes(self, short_codes: Iterable[str]):
+        await _simulate(self.latency)
+        for short_code in short_codes:
+            self.store.pop(f"url:{short_code}", None)
+
+    async def sample_mappings(self, limit: int, batch_size: int = 500) -> List[URLMapping]:
+        await _simulate(self.latency)
+        return list(self.store.values())[:limit]
+
+    async def cache_mappings(self, mappings: Iterable[URLMapping]):
+        await _simulate(self.latency)
+        for mapping in mappings:
+            self.store[f"url:{mapping.short_code}"] = mapping
+
+    async def take_tokens(
+        self, key: str, rate: float, burst: int, wanted: int
+    ) -> Tuple[int, float]:
+        await _simulate(self.latency)
+        now = time.monotonic()
+        tokens, ts = self.buckets.get(key, (float(burst), now))
+        tokens = min(burst, tokens + (now - ts) * rate)
+        granted = min(wanted, int(tokens))
+        self.buckets[key] = (tokens - granted, now)
+        return granted, 0.0 if granted else (1 - (tokens - granted)) / rate
+
+    async def close(self):
+        return None
+
+
+class FakeKafkaClient:
+    """
+    In-memory stand-in for infrastructure.kafka_client.KafkaClient that records produced messages.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.producer_connected = True
+        self.consumer_connected = False
+        self.produced: List[Tuple[str, Optional[bytes], bytes]] = []
+
+    async def connect_producer(self):
+        self.producer_connected = True
+
+    async def connect_consumer(
+        self,
+        topic: str,
+        group_id: Optional[str] = "url_shortener_group",
+        auto_offset_reset: str = "earliest",
+    ):
+        return None
+
+    async def produce(self, topic: str, message: bytes, key: Optional[bytes] = None):
+        await _simulate(self.latency)
+        self.produced.append((topic, key, message))
+
+    async def consume_forever(self, callback):
+        return None
+
+    async def consume_batches(self, callback, max_records: int, wait_ms: int):
+        return None
+
+    async def close(self):
+        self.producer_connected = False
+
+
+def install_fakes(
+    db_latency: float = 0.0, redis_latency: float = 0.0, kafka_latency: float = 0.0
+) -> Tuple[FakeDatabase, FakeRedisClient, FakeKafkaClient]:
+    """
+    Swap the module-level infrastructure singletons used by the API for in-memory fakes.
+
+    Must be called before the ASGI app handles its first request.
+    """
+    import application.messaging.publishers as publishers
+    import interface.api as api
+
+    fake_db = FakeDatabase(db_latency)
+    fake_redis = FakeRedisClient(redis_latency)
+    fake_kafka = FakeKafkaClient(kafka_latency)
+
+    api.database = fake_db
+    api.redis_client = fake_redis
+    api.kafka_client = fake_kafka
+    api.service.database = fake_db
+    if api.service.insert_batcher is not None:
+        api.service.insert_batcher.database = fake_db
+    api.service.redis_client = fake_redis
+    publishers.kafka_client = fake_kafka
+    return fake_db, fake_redis, fake_kafka
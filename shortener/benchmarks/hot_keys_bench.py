@@ -0,0 +1,120 @@
+"""
+Cost and accuracy of the hot-key tracker (infrastructure/hot_keys.py).
+
+Feeds --requests short codes drawn Zipf(--zipf-s) from --keys codes, with --scan of them
+replaced by one-off codes (a scanner's traffic), through a tracker of each --capacities size
+and reports the cost of add() per request, the memory the tracker holds, and how its top
+--top-n compares with exact counts: recall of the true top-N and the largest overcount:
+
+    python -m benchmarks.hot_keys_bench --requests 2000000 --capacities 100,1000,10000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.load_test import sample_indices
+from benchmarks.report import environment
+from infrastructure.hot_keys import HotKeyTracker
+
+
+def build_stream(args: argparse.Namespace) -> list:
+    rng = random.Random(args.seed)
+    stream = [
+        f"k{index:06x}"
+        for index in sample_indices(args.keys, args.requests, "zipf", args.zipf_s, rng)
+    ]
+    for position in rng.sample(range(len(stream)), int(len(stream) * args.scan)):
+        stream[position] = f"s{position:08x}"
+    return stream
+
+
+def measure(capacity: int, stream: list, exact: Counter, top_n: int) -> dict:
+    tracker = HotKeyTracker(capacity)
+    add = tracker.add
+    start = time.perf_counter()
+    for short_code in stream:
+        add(short_code)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    copy = HotKeyTracker(capacity)
+    for short_code in stream[: capacity * 20]:
+        copy.add(short_code)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    top = tracker.top(top_n)
+    truth = {short_code for short_code, _ in exact.most_common(top_n)}
+    return {
+        "capacity": capacity,
+        "add_ns": round(elapsed / len(stream) * 1e9, 1),
+        "memory_kb": round(memory / 1024, 1),
+        "recall": round(len(truth & {key.short_code for key in top}) / len(truth), 3),
+        "max_overcount_pct": round(
+            max((key.count - exact[key.short_code]) / exact[key.short_code] for key in top) * 100,
+            2,
+        ),
+        "max_error_bound": max(key.error for key in top),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    stream = build_stream(args)
+    exact = Counter(stream)
+
+    # What a bare loop over the stream costs, to read add_ns against
+    start = time.perf_counter()
+    for _ in stream:
+        pass
+    loop_ns = (time.perf_counter() - start) / len(stream) * 1e9
+
+    return {
+        "benchmark": "hot_keys",
+        "environment": environment(),
+        "config": {
+            "requests": args.requests,
+            "keys": args.keys,
+            "zipf_s": args.zipf_s,
+            "scan": args.scan,
+            "top_n": args.top_n,
+        },
+        "results": {
+            "loop_ns": round(loop_ns, 1),
+            "distinct_codes": len(exact),
+            "top_n_share": round(
+                sum(count for _, count in exact.most_common(args.top_n)) / len(stream), 3
+            ),
+            "trackers": [
+                measure(capacity, stream, exact, args.top_n)
+                for capacity in map(int, args.capacities.split(","))
+            ],
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument("--scan", type=float, default=0.1, help="share of one-off codes")
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--capacities", default="100,1000,10000")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    payload = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
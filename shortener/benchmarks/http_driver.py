@@ -0,0 +1,95 @@
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.asgi_driver import ASGIResponse
+
+
+class HTTPDriver:
+    """
+    Minimal HTTP/1.1 client for a running instance, with the same request() as ASGIDriver:
+    up to max_connections keep-alive connections, responses read by Content-Length (what
+    the API sends) or until the server closes the connection.
+    """
+
+    def __init__(self, url: str, max_connections: int = 64):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"only http:// URLs are supported, got {url!r}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.host_header = parts.netloc.encode()
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def startup(self):
+        return None
+
+    async def shutdown(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        headers: Iterable[Tuple[bytes, bytes]] = (),
+    ) -> ASGIResponse:
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                if reused:
+                    reader, writer = self._idle.pop()
+                else:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                try:
+                    response, keep_alive = await self._exchange(
+                        reader, writer, method, path, body, headers
+                    )
+                except ConnectionError:
+                    writer.close()
+                    # The server may have closed an idle connection; retry on a new one
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+                return response
+
+    async def _exchange(self, reader, writer, method, path, body, headers):
+        lines = [f"{method} {path} HTTP/1.1".encode(), b"host: " + self.host_header]
+        lines.extend(name + b": " + value for name, value in headers)
+        if body:
+            lines.append(b"content-length: " + str(len(body)).encode())
+        writer.write(b"\r\n".join(lines) + b"\r\n\r\n" + body)
+
+        response = ASGIResponse()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed before a response")
+        response.status = int(status_line.split(b" ", 2)[1])
+        length: Optional[int] = None
+        keep_alive = True
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.partition(b":")
+            name, value = name.strip().lower(), value.strip()
+            response.headers.append((name, value))
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"connection" and value.lower() == b"close":
+                keep_alive = False
+        if method == "HEAD" or response.status in (204, 304):
+            length = 0
+        if length is None:
+            response.body = await reader.read()
+            keep_alive = False
+        else:
+            response.body = await reader.readexactly(length)
+        return response, keep_alive
@@ -0,0 +1,89 @@
+"""
+Insert throughput with and without group commit (infrastructure/insert_batcher.py).
+
+Runs --inserts distinct inserts from each of the --concurrency levels of concurrent callers
+against the in-memory FakeDatabase, with a pool of --pool-size connections and
+--db-latency-ms per statement, and reports inserts per second, per-insert latency and the
+number of statements sent:
+
+    python -m benchmarks.insert_batch_bench --inserts 5000 --concurrency 1,8,32,128
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+
+from benchmarks.fakes import FakeDatabase
+from benchmarks.report import environment, summarize
+from infrastructure.insert_batcher import InsertBatcher
+
+
+async def drive(insert, inserts: int, concurrency: int) -> tuple:
+    latencies = []
+    statuses = Counter()
+    next_index = iter(range(inserts))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            mapping = await insert(f"c{i:x}", f"https://example.com/{i}", None)
+            latencies.append(time.perf_counter() - start)
+            statuses[201 if mapping else 409] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - start
+
+
+async def run_mode(args: argparse.Namespace, batched: bool, concurrency: int) -> dict:
+    database = FakeDatabase(args.db_latency_ms / 1000, pool_size=args.pool_size)
+    if batched:
+        batcher = InsertBatcher(database, args.max_rows, args.wait_ms / 1000, args.in_flight)
+        insert = batcher.insert
+    else:
+        insert = database.insert_url_mapping
+    latencies, statuses, elapsed = await drive(insert, args.inserts, concurrency)
+    result = summarize(latencies, statuses, elapsed)
+    result["statements"] = database.statements
+    return result
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        for batched in (False, True):
+            name = f"{'batched' if batched else 'single'} c={concurrency}"
+            results[name] = asyncio.run(run_mode(args, batched, concurrency))
+    return {
+        "benchmark": "insert_batch_bench",
+        "environment": environment(),
+        "config": {
+            "inserts": args.inserts,
+            "pool_size": args.pool_size,
+            "db_latency_ms": args.db_latency_ms,
+            "max_rows": args.max_rows,
+            "wait_ms": args.wait_ms,
+            "in_flight": args.in_flight,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--inserts", type=int, default=5000)
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--max-rows", type=int, default=100)
+    parser.add_argument("--wait-ms", type=float, default=2.0)
+    parser.add_argument("--in-flight", type=int, default=4)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(run(args), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
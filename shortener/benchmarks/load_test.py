@@ -0,0 +1,188 @@
+"""
+Load test for POST /shorten and GET /{short_code}, driven through the ASGI app in-process.
+
+Postgres, Redis and Kafka are replaced with in-memory fakes (optionally with simulated
+latency), so results only reflect the application code and can be compared across commits:
+
+    python -m benchmarks.load_test --keys 10000 --requests 100000 --concurrency 64 \\
+        --distribution zipf --output before.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+from benchmarks.asgi_driver import ASGIDriver
+from benchmarks.fakes import install_fakes
+from benchmarks.report import environment, log_to_stderr, summarize
+
+Request = Tuple[str, str, bytes, Sequence[Tuple[bytes, bytes]]]
+
+JSON_HEADERS = ((b"content-type", b"application/json"),)
+
+
+def sample_indices(
+    n_keys: int, n: int, distribution: str, zipf_s: float, rng: random.Random
+) -> List[int]:
+    """
+    Draw n key indices in [0, n_keys) from a uniform or Zipf(s) distribution.
+    """
+    population = range(n_keys)
+    if distribution == "uniform":
+        return rng.choices(population, k=n)
+    if distribution == "zipf":
+        cum_weights = list(itertools.accumulate(1.0 / (i + 1) ** zipf_s for i in population))
+        return rng.choices(population, cum_weights=cum_weights, k=n)
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+async def run_phase(
+    driver: ASGIDriver, requests: Sequence[Request], concurrency: int
+) -> Tuple[List[float], Counter, float, List[Optional[bytes]]]:
+    """
+    Replay requests with a fixed number of concurrent workers.
+
+    Returns per-request latencies (s), status counts, wall time (s) and response bodies.
+    """
+    latencies: List[float] = [0.0] * len(requests)
+    bodies: List[Optional[bytes]] = [None] * len(requests)
+    statuses: Counter = Counter()
+    work = iter(enumerate(requests))
+
+    async def worker():
+        for index, (method, path, body, headers) in work:
+            start = time.perf_counter()
+            try:
+                response = await driver.request(method, path, body, headers)
+                status = response.status
+                bodies[index] = response.body
+            except Exception:
+                status = 0
+            latencies[index] = time.perf_counter() - start
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started, bodies
+
+
+def build_shorten_requests(n_keys: int, seed: int) -> List[Request]:
+    return [
+        (
+            "POST",
+            "/shorten",
+            json.dumps({"longUrl": f"https://example.com/{seed}/item/{i}"}).encode(),
+            JSON_HEADERS,
+        )
+        for i in range(n_keys)
+    ]
+
+
+def build_redirect_requests(
+    codes: Sequence[str], args: argparse.Namespace, rng: random.Random
+) -> List[Request]:
+    indices = sample_indices(len(codes), args.requests, args.distribution, args.zipf_s, rng)
+    requests: List[Request] = []
+    for index in indices:
+        if args.miss_ratio and rng.random() < args.miss_ratio:
+            # Scanner-style probe for a code that was never issued
+            path = "/" + "".join(rng.choices("ghijklmnopqrstuvwxyz", k=7))
+        else:
+            path = "/" + codes[index]
+        requests.append(("GET", path, b"", ()))
+    return requests
+
+
+async def run(args: argparse.Namespace) -> dict:
+    fake_db, fake_redis, fake_kafka = install_fakes(
+        db_latency=args.db_latency_ms / 1000,
+        redis_latency=args.redis_latency_ms / 1000,
+        kafka_latency=args.kafka_latency_ms / 1000,
+    )
+    from interface.api import asgi_app
+
+    log_to_stderr(args.log_level)
+    rng = random.Random(args.seed)
+    driver = ASGIDriver(asgi_app)
+    await driver.startup()
+    try:
+        shorten_requests = build_shorten_requests(args.keys, args.seed)
+        latencies, statuses, elapsed, bodies = await run_phase(
+            driver, shorten_requests, args.concurrency
+        )
+        shorten_summary = summarize(latencies, statuses, elapsed)
+
+        codes = [json.loads(body)["shortUrl"].rsplit("/", 1)[-1] for body in bodies if body]
+        if not codes:
+            raise RuntimeError("Shorten phase produced no short codes")
+
+        redirect_requests = build_redirect_requests(codes, args, rng)
+        latencies, statuses, elapsed, _ = await run_phase(
+            driver, redirect_requests, args.concurrency
+        )
+        redirect_summary = summarize(latencies, statuses, elapsed)
+    finally:
+        await driver.shutdown()
+
+    return {
+        "benchmark": "load_test",
+        "environment": environment(),
+        "config": {
+            "keys": args.keys,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "distribution": args.distribution,
+            "zipf_s": args.zipf_s if args.distribution == "zipf" else None,
+            "miss_ratio": args.miss_ratio,
+            "db_latency_ms": args.db_latency_ms,
+            "redis_latency_ms": args.redis_latency_ms,
+            "kafka_latency_ms": args.kafka_latency_ms,
+            "seed": args.seed,
+        },
+        "results": {"shorten": shorten_summary, "redirect": redirect_summary},
+        "fakes": {
+            "db_rows": len(fake_db.by_code),
+            "redis_keys": len(fake_redis.store),
+            "kafka_messages": len(fake_kafka.produced),
+        },
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--keys", type=int, default=5_000, help="distinct URLs to shorten")
+    parser.add_argument("--requests", type=int, default=50_000, help="redirects to issue")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--distribution", choices=("uniform", "zipf"), default="zipf")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent")
+    parser.add_argument(
+        "--miss-ratio", type=float, default=0.0, help="fraction of redirects for unknown codes"
+    )
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--redis-latency-ms", type=float, default=0.0)
+    parser.add_argument("--kafka-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
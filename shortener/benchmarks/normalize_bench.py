@@ -0,0 +1,85 @@
+"""
+Cost and effect of URL canonicalization on the shorten path.
+
+Builds --urls base URLs and spells each of them in --variants equivalent ways (scheme/host
+case, default port, empty query, percent-encoding case, tracking parameters), then reports
+per-URL time of the old validation (is_valid_url) and of canonical_url with and without
+tracking-parameter stripping, plus how many distinct rows each would create:
+
+    python -m benchmarks.normalize_bench --urls 100000 --variants 4
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import domain.url_normalization as normalization
+from benchmarks.report import environment
+from domain.url_normalization import canonical_url
+from domain.url_shortener_service import URLShortenerService
+
+SPELLINGS = (
+    lambda url: url,
+    lambda url: url.replace("https://www.", "HTTPS://WWW.", 1),
+    lambda url: url.replace(".com/", ".com:443/", 1),
+    lambda url: url + "&utm_source=newsletter&utm_medium=email",
+    lambda url: url.replace("/a-", "/%61-", 1),
+    lambda url: url.replace("?id=", "?%69d=", 1),
+)
+
+
+def make_urls(count: int, variants: int, seed: int):
+    rng = random.Random(seed)
+    urls = []
+    for i in range(count):
+        base = f"https://www.example{i % 5000}.com/a-{i}/read?id={rng.getrandbits(32):x}"
+        urls.extend(spell(base) for spell in rng.sample(SPELLINGS, variants))
+    rng.shuffle(urls)
+    return urls
+
+
+def timed(fn, urls) -> dict:
+    start = time.perf_counter()
+    results = [fn(url) for url in urls]
+    elapsed = time.perf_counter() - start
+    return {
+        "ns_per_url": round(elapsed / len(urls) * 1e9),
+        "distinct_rows": len({result for result in results if result}),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    urls = make_urls(args.urls, args.variants, args.seed)
+    results = {
+        "is_valid_url (before)": timed(
+            lambda url: url if URLShortenerService.is_valid_url(url) else None, urls
+        ),
+        "canonical_url": timed(lambda url: canonical_url(url, normalize=True), urls),
+    }
+    normalization.STRIP_EXACT, normalization.STRIP_PREFIXES = normalization._parse_param_names(
+        "utm_*"
+    )
+    results["canonical_url + strip utm_*"] = timed(
+        lambda url: canonical_url(url, normalize=True), urls
+    )
+    return {
+        "benchmark": "normalize_bench",
+        "environment": environment(),
+        "config": {"base_urls": args.urls, "variants": args.variants, "total": len(urls)},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--urls", type=int, default=100_000)
+    parser.add_argument("--variants", type=int, default=4, choices=range(1, len(SPELLINGS) + 1))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(run(args), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Microbenchmark of a single redirect: FastAPI route vs. the FastRedirectApp fast path.
+
+Also times a 404 for an unknown code on the fast path, without and with the short-code
+filter (which answers it before Redis and Postgres are asked).
+
+Requests are issued sequentially against in-memory fakes, so the numbers isolate per-request
+framework overhead. Time is measured without tracing; allocations are measured in a second
+pass with tracemalloc (peak bytes allocated while handling one request, and blocks still
+alive afterwards):
+
+    python -m benchmarks.redirect_microbench --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from array import array
+
+from benchmarks.asgi_driver import ASGIDriver
+from benchmarks.fakes import install_fakes
+from benchmarks.report import environment
+from infrastructure.short_code_filter import load_short_code_filter
+
+LONG_URL = "https://example.com/some/very/long/path?with=query"
+
+
+async def measure(app, path: str, requests: int, warmup: int, status: int = 301) -> dict:
+    driver = ASGIDriver(app)
+    for _ in range(warmup):
+        await driver.request("GET", path)
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter_ns()
+        response = await driver.request("GET", path)
+        timings.append(time.perf_counter_ns() - start)
+    if response.status != status:
+        raise RuntimeError(f"Unexpected status {response.status} for {path}")
+
+    # Preallocated so recording a sample does not itself retain memory
+    peaks = array("q", bytes(8 * requests))
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for i in range(requests):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await driver.request("GET", path)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[i] = peak - before
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "requests": requests,
+        "time_us": {
+            "mean": round(statistics.fmean(timings) / 1000, 3),
+            "median": round(statistics.median(timings) / 1000, 3),
+            "min": round(min(timings) / 1000, 3),
+        },
+        "peak_alloc_bytes_per_request": {
+            "mean": round(statistics.fmean(peaks), 1),
+            "median": statistics.median(peaks),
+        },
+        "retained_bytes_per_request": round((retained - baseline) / requests, 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    fake_db, _, _ = install_fakes()
+    from interface.api import app, asgi_app, service
+
+    logging.getLogger().setLevel(logging.WARNING)
+    short_code = service.generate_short_code(LONG_URL)
+    await fake_db.insert_url_mapping(short_code, LONG_URL)
+    path = f"/{short_code}"
+
+    # Both paths share the singleton service, so both hit the same warm local cache
+    results = {
+        "fastapi_route": await measure(app, path, args.requests, args.warmup),
+        "fast_path": await measure(asgi_app, path, args.requests, args.warmup),
+    }
+    unknown = "/zz" + short_code
+    service.code_filter = None
+    results["fast_path_404"] = await measure(asgi_app, unknown, args.requests, args.warmup, 404)
+    service.code_filter = await load_short_code_filter(fake_db, 1000)
+    results["fast_path_404_code_filter"] = await measure(
+        asgi_app, unknown, args.requests, args.warmup, 404
+    )
+    return {
+        "benchmark": "redirect_microbench",
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--warmup", type=int, default=1_000)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(asyncio.run(run(args)), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Replay a traffic capture (TRAFFIC_CAPTURE_SAMPLE_RATE, infrastructure/traffic_capture.py) with
+its original timing and compare the outcome with what was captured.
+
+Requests are sent open-loop at their captured arrival offsets divided by --speed, so the
+inter-arrival distribution and key skew of real traffic are kept. The target is the ASGI app
+in-process (Postgres, Redis and Kafka replaced by the in-memory fakes, with every short code
+that redirected or answered 410 in the capture seeded, so hits stay hits and misses stay
+misses) or, with --url, a running instance. The report has the latency percentiles of the
+replay next to the captured ones, the status counts of both, the errors added or removed and
+the status changes behind them, and how far the sender fell behind schedule:
+
+    python -m benchmarks.replay data/traffic.capture --speed 10 --output after.json
+    python -m benchmarks.replay data/traffic.capture --url http://localhost:8001
+
+Gaps longer than --max-gap seconds (e.g. between capture sessions appended to one file) are
+shortened to it. A capture sampled at 1 % reaches the original request rate at --speed 100.
+POST /shorten is replayed with a new URL per request; the same capture and seed always
+produce the same requests in the same order.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+from benchmarks.asgi_driver import ASGIDriver
+from benchmarks.fakes import install_fakes
+from benchmarks.http_driver import HTTPDriver
+from benchmarks.load_test import JSON_HEADERS, Request
+from benchmarks.report import environment, log_to_stderr, percentile, summarize
+from domain.models import URLMapping
+from infrastructure.traffic_capture import CapturedRequest, capture_sample_rate, read_capture
+from interface.fast_redirect import SHORT_CODE_PATTERN
+
+
+def is_error(status: int) -> bool:
+    return status == 0 or status >= 500
+
+
+def build_plan(
+    captured: Sequence[CapturedRequest], args: argparse.Namespace
+) -> List[Tuple[float, Request]]:
+    """
+    (offset in seconds from the start of the replay, request) in arrival order.
+    """
+    plan = []
+    offset = 0.0
+    previous = captured[0].arrived_at if captured else 0.0
+    for index, request in enumerate(captured):
+        offset += min(request.arrived_at - previous, args.max_gap) / args.speed
+        previous = request.arrived_at
+        if request.method == "POST":
+            body = json.dumps({"longUrl": f"https://replay.example/{args.seed}/{index}"}).encode()
+            plan.append((offset, (request.method, request.path, body, JSON_HEADERS)))
+        else:
+            plan.append((offset, (request.method, request.path, b"", ())))
+    return plan
+
+
+def seed_fakes(captured: Sequence[CapturedRequest], fake_db):
+    """
+    Give every short code that resolved in the capture a mapping, expired if it was gone.
+    """
+    now = time.time()
+    for request in captured:
+        code = request.path[1:]
+        if request.method not in ("GET", "HEAD") or not SHORT_CODE_PATTERN.fullmatch(code):
+            continue
+        if 300 <= request.status < 400 or request.status == 410:
+            expires_at = 1.0 if request.status == 410 else None
+            long_url = f"https://replay.example/{code}"
+            fake_db.by_code[code] = URLMapping(code, long_url, float(int(now)), expires_at)
+            fake_db.by_url[long_url] = code
+
+
+async def replay(driver, plan: Sequence[Tuple[float, Request]], max_in_flight: int) -> tuple:
+    count = len(plan)
+    latencies: List[float] = [0.0] * count
+    lags: List[float] = [0.0] * count
+    statuses: List[int] = [0] * count
+    slots = asyncio.Semaphore(max_in_flight)
+    loop = asyncio.get_running_loop()
+
+    async def send(index: int, due: float, request: Request):
+        async with slots:
+            lags[index] = max(0.0, loop.time() - due)
+            start = time.perf_counter()
+            try:
+                response = await driver.request(*request)
+                statuses[index] = response.status
+            except Exception:
+                statuses[index] = 0
+            latencies[index] = time.perf_counter() - start
+
+    started = loop.time()
+    tasks = []
+    for index, (offset, request) in enumerate(plan):
+        due = started + offset
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(index, due, request)))
+    await asyncio.gather(*tasks)
+    return latencies, statuses, lags, loop.time() - started
+
+
+async def run(args: argparse.Namespace) -> dict:
+    captured = sorted(read_capture(args.capture), key=lambda request: request.arrived_at)
+    if args.limit:
+        captured = captured[: args.limit]
+    if not captured:
+        raise RuntimeError(f"{args.capture} holds no requests")
+    plan = build_plan(captured, args)
+
+    if args.url:
+        driver = HTTPDriver(args.url, args.max_in_flight)
+    else:
+        fake_db, _, _ = install_fakes(
+            db_latency=args.db_latency_ms / 1000, redis_latency=args.redis_latency_ms / 1000
+        )
+        seed_fakes(captured, fake_db)
+        from interface.api import asgi_app
+
+        driver = ASGIDriver(asgi_app)
+    log_to_stderr(args.log_level)
+
+    await driver.startup()
+    try:
+        latencies, statuses, lags, elapsed = await replay(driver, plan, args.max_in_flight)
+    finally:
+        await driver.shutdown()
+
+    span = captured[-1].arrived_at - captured[0].arrived_at
+    captured_errors = sum(is_error(request.status) for request in captured)
+    replay_errors = sum(map(is_error, statuses))
+    changes = Counter(
+        f"{request.status}->{status}"
+        for request, status in zip(captured, statuses)
+        if request.status != status
+    )
+    lags.sort()
+    return {
+        "benchmark": "replay",
+        "environment": environment(),
+        "config": {
+            "capture": args.capture,
+            "target": args.url or "in-process",
+            "sample_rate": capture_sample_rate(args.capture),
+            "speed": args.speed,
+            "max_gap": args.max_gap,
+            "max_in_flight": args.max_in_flight,
+            "requests": len(captured),
+            "captured_span_s": round(span, 3),
+            "db_latency_ms": None if args.url else args.db_latency_ms,
+            "redis_latency_ms": None if args.url else args.redis_latency_ms,
+        },
+        "results": {
+            "captured": summarize(
+                [request.duration for request in captured],
+                Counter(request.status for request in captured),
+                span,
+            ),
+            "replay": summarize(latencies, Counter(statuses), elapsed),
+            "errors": {
+                "captured": captured_errors,
+                "replay": replay_errors,
+                "delta": replay_errors - captured_errors,
+            },
+            "status_changes": dict(changes.most_common(args.top_changes)),
+            "schedule_lag_ms": {
+                "p50": round(percentile(lags, 50) * 1000, 3),
+                "p99": round(percentile(lags, 99) * 1000, 3),
+                "max": round(lags[-1] * 1000, 3),
+            },
+        },
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("capture", help="capture file (TRAFFIC_CAPTURE_PATH)")
+    parser.add_argument(
+        "--url", help="replay against this running instance, e.g. http://host:8001"
+    )
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression factor")
+    parser.add_argument("--max-gap", type=float, default=5.0, help="longest pause kept (s)")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N requests")
+    parser.add_argument("--top-changes", type=int, default=10)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    parser.add_argument("--redis-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        sys.stdout.write(payload + "\n")
+
+
+if __name__ == "__main__":
+    main()
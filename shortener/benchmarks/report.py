@@ -0,0 +1,75 @@
+import logging
+import math
+import platform
+import subprocess
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+
+def log_to_stderr(level) -> None:
+    """
+    Send the service's logs to stderr at level, so stdout only carries the JSON report.
+    """
+    root = logging.getLogger()
+    root.setLevel(level)
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler(sys.stderr))
+    for handler in root.handlers:
+        if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
+            handler.setStream(sys.stderr)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list (q in [0, 100]).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: Iterable[float], statuses: Counter, elapsed: float) -> Dict:
+    """
+    Summarize one benchmark phase: throughput plus latency percentiles in milliseconds.
+    """
+    values = sorted(latencies)
+    count = len(values)
+    errors = sum(n for status, n in statuses.items() if status == 0 or status >= 500)
+    return {
+        "requests": count,
+        "errors": errors,
+        "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+        "duration_s": round(elapsed, 4),
+        "rps": round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / count * 1000, 4) if count else 0.0,
+            "p50": round(percentile(values, 50) * 1000, 4),
+            "p90": round(percentile(values, 90) * 1000, 4),
+            "p99": round(percentile(values, 99) * 1000, 4),
+            "p999": round(percentile(values, 99.9) * 1000, 4),
+            "max": round(values[-1] * 1000, 4) if count else 0.0,
+        },
+    }
+
+
+def environment() -> Dict[str, Optional[str]]:
+    """
+    Identify the code and interpreter a result was produced with, for cross-commit comparison.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+    }
@@ -0,0 +1,193 @@
+"""
+Lookup latency and memory of the memory-mapped snapshot (infrastructure/snapshot.py).
+
+Writes a snapshot of --links synthetic links (7-character codes, URLs around 50 bytes) plus
+--deltas delta files of --delta-links links each, then reports build time, file size, and
+for --lookups random codes (hits and misses) the latency of MappingSnapshot.find/get and of
+SnapshotStore.get_mapping over base plus deltas, the process RSS before opening, after
+opening and after the lookups (heap and mapped file pages apart), and the heap memory the
+lookups leave allocated:
+
+    python -m benchmarks.snapshot_bench --links 50000000 --lookups 200000
+
+The default --links keeps a run short; 50M links need about 4 GB of disk.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.report import environment, percentile
+from domain.models import URLMapping
+from infrastructure.snapshot import (
+    MappingSnapshot,
+    SnapshotStore,
+    SnapshotWriter,
+    to_record,
+    write_snapshot,
+)
+
+# Codes are spaced out so that every other value is a miss
+STRIDE = 2
+
+
+def code_for(i: int) -> str:
+    return format(i * STRIDE, "07x")
+
+
+def url_for(i: int) -> str:
+    return f"https://www.example{i % 5000}.com/articles/{i:x}?utm_source=newsletter"
+
+
+def rss_mb() -> dict:
+    """
+    Resident memory split into the heap (RssAnon) and mapped file pages (RssFile), which
+    the kernel can drop and read back at will.
+    """
+    rss = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            name, _, value = line.partition(":")
+            if name in ("RssAnon", "RssFile"):
+                rss[name[3:].lower()] = round(int(value.split()[0]) / 1024, 1)
+    return rss
+
+
+def build(path: str, links: int) -> float:
+    start = time.perf_counter()
+    writer = SnapshotWriter(path, key_width=7, built_at=time.time() - 60)
+    now = int(time.time())
+    for i in range(links):
+        writer.add(code_for(i).encode(), url_for(i).encode(), now, 0)
+    writer.close()
+    return time.perf_counter() - start
+
+
+def latencies_us(lookup, codes) -> dict:
+    timings = []
+    clock = time.perf_counter
+    for code in codes:
+        start = clock()
+        lookup(code)
+        timings.append(clock() - start)
+    timings.sort()
+    return {
+        "mean_us": round(sum(timings) / len(timings) * 1e6, 3),
+        "p50_us": round(percentile(timings, 50) * 1e6, 3),
+        "p99_us": round(percentile(timings, 99) * 1e6, 3),
+        "p999_us": round(percentile(timings, 99.9) * 1e6, 3),
+    }
+
+
+async def store_latencies(store: SnapshotStore, codes) -> dict:
+    timings = []
+    clock = time.perf_counter
+    for code in codes:
+        start = clock()
+        await store.get_mapping(code)
+        timings.append(clock() - start)
+    timings.sort()
+    return {
+        "mean_us": round(sum(timings) / len(timings) * 1e6, 3),
+        "p50_us": round(percentile(timings, 50) * 1e6, 3),
+        "p99_us": round(percentile(timings, 99) * 1e6, 3),
+    }
+
+
+def run(args: argparse.Namespace) -> dict:
+    directory = tempfile.mkdtemp(dir=args.dir)
+    path = os.path.join(directory, "url_mappings.snap")
+    delta_dir = os.path.join(directory, "deltas")
+    os.makedirs(delta_dir)
+    try:
+        build_seconds = build(path, args.links)
+        for d in range(args.deltas):
+            first = args.links + d * args.delta_links
+            write_snapshot(
+                os.path.join(delta_dir, f"delta-{d:020d}.snap"),
+                (
+                    to_record(URLMapping(code_for(i), url_for(i), time.time()))
+                    for i in range(first, first + args.delta_links)
+                ),
+            )
+
+        rng = random.Random(args.seed)
+        total = args.links + args.deltas * args.delta_links
+        hits = [code_for(rng.randrange(args.links)) for _ in range(args.lookups)]
+        misses = [
+            format(rng.randrange(args.links) * STRIDE + 1, "07x") for _ in range(args.lookups)
+        ]
+        mixed = [code_for(rng.randrange(total)) for _ in range(args.lookups)]
+
+        rss_before = rss_mb()
+        snapshot = MappingSnapshot(path)
+        rss_opened = rss_mb()
+        encoded = [code.encode() for code in hits]
+        results = {
+            "find_hit": latencies_us(snapshot.find, encoded),
+            "get_hit": latencies_us(snapshot.get, hits),
+            "get_miss": latencies_us(snapshot.get, misses),
+        }
+        rss_after = rss_mb()
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for code in encoded:
+            snapshot.find(code)
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        snapshot.close()
+
+        store = SnapshotStore(path, delta_dir)
+        store.refresh()
+        results[f"store_{args.deltas}_deltas"] = asyncio.run(store_latencies(store, mixed))
+        store.close()
+
+        size = os.path.getsize(path)
+        return {
+            "benchmark": "snapshot_bench",
+            "environment": environment(),
+            "config": {
+                "links": args.links,
+                "lookups": args.lookups,
+                "deltas": args.deltas,
+                "delta_links": args.delta_links,
+            },
+            "results": {
+                "build_s": round(build_seconds, 2),
+                "file_bytes": size,
+                "bytes_per_link": round(size / max(1, args.links), 1),
+                "rss_mb": {
+                    "before_open": rss_before,
+                    "after_open": rss_opened,
+                    "after_lookups": rss_after,
+                },
+                "find_retained_bytes": retained,
+                "lookups": results,
+            },
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--links", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--deltas", type=int, default=4)
+    parser.add_argument("--delta-links", type=int, default=10_000)
+    parser.add_argument("--dir", default=None, help="where to write the files (default: tmp)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(run(args), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +0,0 @@
-CREATE TABLE IF NOT EXISTS url_mappings (
-    id SERIAL PRIMARY KEY,
-    short_code VARCHAR(10) UNIQUE,
-    long_url TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT NOW(),
-    updated_at TIMESTAMP DEFAULT NOW()
-);
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from typing import List
+
+from domain.url_shortener_service import URLShortenerService
+from infrastructure.config import settings
+from infrastructure.hot_keys import HotKey, HotKeyTracker
+from infrastructure.metrics import hot_key_requests, hot_keys_pinned
+
+logger = logging.getLogger(__name__)
+
+
+class HotKeyMonitor:
+    """
+    Periodically publish the busiest short codes and, when pinning, keep them cached.
+
+    Every interval the top_n codes of the tracker become the hot_key_requests_per_second
+    gauge (the previous set is dropped, so the series stay bounded by top_n) and, with pin,
+    the pinned set of the in-process cache; pinned codes that are not cached yet are
+    looked up once so they are. Then the tracker's counts are halved. At a steady rate a
+    count just before halving is about twice the requests of one interval, which is what
+    the published rates assume.
+    """
+
+    def __init__(
+        self,
+        service: URLShortenerService,
+        tracker: HotKeyTracker,
+        top_n: int = settings.HOT_KEYS_TOP_N,
+        interval: float = settings.HOT_KEYS_INTERVAL_SECONDS,
+        pin: bool = settings.HOT_KEYS_PIN,
+    ):
+        self.service = service
+        self.tracker = tracker
+        self.top_n = top_n
+        self.interval = interval
+        self.pin = pin
+        self.current: List[HotKey] = []
+
+    def rate(self, count: int) -> float:
+        return count / (2 * self.interval)
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception({"action": "hot_keys", "status": "failed", "error": str(e)})
+
+    async def refresh_once(self):
+        top = self.current = self.tracker.top(self.top_n)
+        self.tracker.decay()
+        hot_key_requests.clear()
+        for key in top:
+            hot_key_requests.labels(key.short_code).set(self.rate(key.count))
+
+        cache = self.service.local_cache
+        if not self.pin or cache is None or not cache.enabled:
+            return
+        cache.pin(key.short_code for key in top)
+        hot_keys_pinned.set(len(cache.pinned))
+        for short_code in cache.pinned:
+            if cache.get(short_code) is None:
+                # Fills the cache on the way back; unknown codes stay uncached
+                await self.service.get_mapping(short_code)
@@ -1,28 +1,105 @@
-import json
 import logging
+import time
+from typing import List, Optional
+
+from application.messaging.serializers import decode_event
+from domain.models import URLMapping
+from domain.url_shortener_service import URLShortenerService
+from infrastructure.metrics import events_applied
 
 logger = logging.getLogger(__name__)
 
 
-async def message_callback(raw_message: bytes):
+def build_message_callback(service: URLShortenerService):
+    """
+    Bind the batch consumer callback to the process's service, whose bloom filter,
+    short-code filter and in-process cache learn about links created elsewhere (other
+    replicas, bulk imports).
+    """
+
+    async def callback(raw_messages: List[bytes]):
+        await messages_callback(raw_messages, service)
+
+    return callback
+
+
+async def message_callback(raw_message: bytes, service: Optional[URLShortenerService] = None):
     """
     Process incoming URL shortener events for analytics or other processes.
     """
-    try:
-        data = json.loads(raw_message.decode())
+    await messages_callback([raw_message], service)
+
+
+async def messages_callback(
+    raw_messages: List[bytes], service: Optional[URLShortenerService] = None
+):
+    """
+    Process a batch of events, applying the URL_CREATED ones to the service in one pass.
+
+    Events may be JSON or binary (see serializers), so producers can switch formats while
+    this consumer keeps running.
+    """
+    created = created_mappings(raw_messages)
+    if not created:
+        return
+    if service is not None:
+        try:
+            await apply_created(service, created)
+        except Exception as e:
+            logger.exception(
+                {
+                    "action": "message_callback",
+                    "status": "apply_failed",
+                    "count": len(created),
+                    "error": str(e),
+                }
+            )
+            return
+    events_applied.inc(len(created))
+    logger.info(
+        {
+            "action": "message_callback",
+            "event": "URL_CREATED",
+            "count": len(created),
+            "status": "processed",
+        }
+    )
+
+
+def created_mappings(raw_messages: List[bytes]) -> List[URLMapping]:
+    """
+    The links announced by the URL_CREATED events among raw_messages; other events and
+    undecodable messages are logged and skipped.
+    """
+    created = []
+    for raw_message in raw_messages:
+        try:
+            data = decode_event(raw_message)
+        except Exception as e:
+            logger.exception(
+                {
+                    "action": "message_callback",
+                    "status": "failed",
+                    "error": str(e),
+                    "raw_message": raw_message.decode(errors="replace"),
+                }
+            )
+            continue
         event = data.get("event")
-        correlation_id = data.get("correlation_id")
-        if event == "URL_CREATED":
-            short_code = data.get("short_code")
-            long_url = data.get("long_url")
-            logger.info(
+        short_code = data.get("short_code")
+        long_url = data.get("long_url")
+        if event == "URL_CREATED" and short_code and long_url:
+            created.append(
+                URLMapping(short_code, long_url, data.get("created_at"), data.get("expires_at"))
+            )
+            logger.debug(
                 {
                     "action": "message_callback",
                     "event": event,
                     "short_code": short_code,
                     "long_url": long_url,
-                    "correlation_id": correlation_id,
-                    "status": "processed",
+                    "correlation_id": data.get("correlation_id"),
+                    "status": "received",
                 }
             )
         else:
@@ -33,12 +110,26 @@ async def message_callback(raw_message: bytes):
                     "event_data": data,
                 }
             )
-    except Exception as e:
-        logger.exception(
-            {
-                "action": "message_callback",
-                "status": "failed",
-                "error": str(e),
-                "raw_message": raw_message.decode(errors="replace"),
-            }
-        )
+    return created
+
+
+async def apply_created(service: URLShortenerService, mappings: List[URLMapping]):
+    """
+    Make newly created links known to this replica: bloom filter (one lock round for the
+    batch), short-code filter, and the in-process cache, so their first redirects here are
+    served from memory. A replica also receives its own events; adding a URL to the bloom
+    filter twice is free, and a code added to the short-code filter twice only leaves a
+    stale copy once it is deleted.
+    """
+    async with service.lock:
+        for mapping in mappings:
+            service.bloom.add(mapping.long_url)
+    if service.code_filter is not None:
+        for mapping in mappings:
+            service.code_filter.add(mapping.short_code)
+    cache = service.local_cache
+    if cache is not None and cache.enabled:
+        now = time.time()
+        for mapping in mappings:
+            if not mapping.is_expired(now):
+                cache.set(mapping.short_code, mapping)
@@ -1,18 +1,16 @@
 import json
 import logging
-import time
+from typing import List
 
 import pybreaker
 import redis.asyncio as redis
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from application.messaging.serializers import event_serializer
+from domain.models import URLMapping
 from infrastructure.config import settings
 from infrastructure.kafka_client import kafka_client
-from infrastructure.metrics import (
-    kafka_produce_failure,
-    kafka_produce_latency,
-    kafka_produce_success,
-)
+from infrastructure.metrics import events_dead_lettered
 
 logger = logging.getLogger(__name__)
 
@@ -35,20 +33,41 @@ fallback_redis = redis.Redis(
 )
 
 
+def url_created_message(
+    short_code: str,
+    long_url: str,
+    correlation_id: str = None,
+    expires_at: float = None,
+    created_at: float = None,
+) -> dict:
+    message = {"event": "URL_CREATED", "short_code": short_code, "long_url": long_url}
+    if correlation_id:
+        message["correlation_id"] = correlation_id
+    if expires_at is not None:
+        message["expires_at"] = expires_at
+    if created_at is not None:
+        # Lets consumers cache the link with the same ETag / Last-Modified as the origin
+        message["created_at"] = created_at
+    return message
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=1, max=10),
     retry=retry_if_exception_type(KafkaPublishError),
 )
-async def publish_url_created(short_code: str, long_url: str, correlation_id: str = None):
+async def publish_url_created(
+    short_code: str,
+    long_url: str,
+    correlation_id: str = None,
+    expires_at: float = None,
+    created_at: float = None,
+):
     """
     Publish a "URL_CREATED" event to Kafka with retries, circuit breaker, and fallback.
     """
-    message = {"event": "URL_CREATED", "short_code": short_code, "long_url": long_url}
-    if correlation_id:
-        message["correlation_id"] = correlation_id
-
-    message_bytes = json.dumps(message).encode("utf-8")
+    message = url_created_message(short_code, long_url, correlation_id, expires_at, created_at)
+    message_bytes = event_serializer.encode(message)
     topic = settings.URL_CREATED_TOPIC
 
     logger.debug(
@@ -76,17 +95,15 @@ async def publish_url_created(short_code: str, long_url: str, correlation_id: st
         await fallback_dead_letter(message)
         return
 
-    start_time = time.time()
+    # Produce counts and latency are recorded by KafkaClient
     try:
 
         @publish_breaker
         async def attempt_publish():
-            await kafka_client.produce(topic, message_bytes)
+            # Keyed by short code: all events of a code land on one partition, in order
+            await kafka_client.produce(topic, message_bytes, key=short_code.encode())
 
         await attempt_publish()
-        elapsed = time.time() - start_time
-        kafka_produce_latency.observe(elapsed)
-        kafka_produce_success.inc()
         logger.info(
             {
                 "action": "publish_url_created",
@@ -108,10 +125,8 @@ async def publish_url_created(short_code: str, long_url: str, correlation_id: st
                 "correlation_id": correlation_id,
             }
         )
-        kafka_produce_failure.inc()
         await fallback_dead_letter(message)
     except Exception as e:
-        kafka_produce_failure.inc()
         logger.warning(
             {
                 "action": "publish_url_created",
@@ -126,6 +141,43 @@ async def publish_url_created(short_code: str, long_url: str, correlation_id: st
         raise KafkaPublishError("Failed to publish to Kafka") from e
 
 
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    retry=retry_if_exception_type(KafkaPublishError),
+)
+async def publish_url_created_many(mappings: List[URLMapping]):
+    """
+    Publish "URL_CREATED" events for many mappings at once, e.g. after a bulk import.
+
+    Batches are retried as a whole; there is no dead-letter fallback because the
+    caller can re-run the import.
+    """
+    messages = [
+        (
+            m.short_code.encode(),
+            event_serializer.encode(
+                url_created_message(
+                    m.short_code, m.long_url, expires_at=m.expires_at, created_at=m.created_at
+                )
+            ),
+        )
+        for m in mappings
+    ]
+    try:
+        await kafka_client.produce_many(settings.URL_CREATED_TOPIC, messages)
+    except Exception as e:
+        logger.warning(
+            {
+                "action": "publish_url_created_many",
+                "status": "transient_failure",
+                "count": len(messages),
+                "error": str(e),
+            }
+        )
+        raise KafkaPublishError("Failed to publish to Kafka") from e
+
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=5))
 async def fallback_dead_letter(message: dict):
     """
@@ -134,6 +186,7 @@ async def fallback_dead_letter(message: dict):
     try:
         msg_str = json.dumps(message)
         await fallback_redis.rpush("dead_letter_queue", msg_str)
+        events_dead_lettered.inc()
         logger.error(
             {
                 "action": "fallback_dead_letter",
@@ -0,0 +1,125 @@
+import json
+import struct
+from typing import Dict
+
+from infrastructure.config import settings
+
+# Binary events start with their format version; JSON events always start with "{" (0x7B),
+# so versions must stay below that for decode_event to tell the two apart.
+BINARY_V1 = 1
+BINARY_V2 = 2
+BINARY_VERSIONS = (BINARY_V1, BINARY_V2)
+
+EVENT_TYPES = {"URL_CREATED": 1}
+EVENT_NAMES = {code: name for name, code in EVENT_TYPES.items()}
+
+FLAG_EXPIRES_AT = 1
+FLAG_CREATED_AT = 2  # v2
+
+# version, event type, flags, len(short_code), len(long_url), len(correlation_id)
+_HEADER = struct.Struct(">BBBHIH")
+_TIMESTAMP = struct.Struct(">d")
+
+
+class JSONSerializer:
+    """
+    The original format: a UTF-8 JSON object. Self-describing, but about 65 % larger than
+    the binary one and slower to produce and parse.
+    """
+
+    name = "json"
+
+    def encode(self, message: dict) -> bytes:
+        return json.dumps(message).encode("utf-8")
+
+    def decode(self, raw: bytes) -> dict:
+        return json.loads(raw.decode())
+
+
+class BinarySerializer:
+    """
+    Fixed schema, version 2 (big-endian):
+
+        u8 version | u8 event type | u8 flags | u16 len(short_code) | u32 len(long_url)
+        | u16 len(correlation_id) | f64 expires_at, if flags & FLAG_EXPIRES_AT
+        | f64 created_at, if flags & FLAG_CREATED_AT
+        | short_code | long_url | correlation_id      (UTF-8, no terminators)
+
+    Version 1 is the same without created_at. A new field or layout gets a new version;
+    decoders keep reading the old ones.
+    """
+
+    name = "binary"
+
+    def encode(self, message: dict) -> bytes:
+        short_code = message["short_code"].encode()
+        long_url = message["long_url"].encode()
+        correlation_id = (message.get("correlation_id") or "").encode()
+        expires_at = message.get("expires_at")
+        created_at = message.get("created_at")
+        flags = (FLAG_EXPIRES_AT if expires_at is not None else 0) | (
+            FLAG_CREATED_AT if created_at is not None else 0
+        )
+        header = _HEADER.pack(
+            BINARY_V2,
+            EVENT_TYPES[message["event"]],
+            flags,
+            len(short_code),
+            len(long_url),
+            len(correlation_id),
+        )
+        if flags & FLAG_EXPIRES_AT:
+            header += _TIMESTAMP.pack(expires_at)
+        if flags & FLAG_CREATED_AT:
+            header += _TIMESTAMP.pack(created_at)
+        return b"".join((header, short_code, long_url, correlation_id))
+
+    def decode(self, raw: bytes) -> dict:
+        version, event_type, flags, code_len, url_len, cid_len = _HEADER.unpack_from(raw)
+        if version not in BINARY_VERSIONS:
+            raise ValueError(f"unsupported binary event version {version}")
+        offset = _HEADER.size
+        message = {"event": EVENT_NAMES.get(event_type, f"unknown_{event_type}")}
+        if flags & FLAG_EXPIRES_AT:
+            (message["expires_at"],) = _TIMESTAMP.unpack_from(raw, offset)
+            offset += _TIMESTAMP.size
+        if version >= BINARY_V2 and flags & FLAG_CREATED_AT:
+            (message["created_at"],) = _TIMESTAMP.unpack_from(raw, offset)
+            offset += _TIMESTAMP.size
+        end = offset + code_len + url_len + cid_len
+        if len(raw) != end:
+            raise ValueError(f"binary event is {len(raw)} bytes, expected {end}")
+        message["short_code"] = raw[offset : offset + code_len].decode()
+        offset += code_len
+        message["long_url"] = raw[offset : offset + url_len].decode()
+        if cid_len:
+            message["correlation_id"] = raw[offset + url_len : end].decode()
+        return message
+
+
+SERIALIZERS: Dict[str, object] = {
+    serializer.name: serializer for serializer in (JSONSerializer(), BinarySerializer())
+}
+
+
+def get_serializer(name: str):
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown event format {name!r}, expected one of {', '.join(SERIALIZERS)}"
+        ) from None
+
+
+def decode_event(raw: bytes) -> dict:
+    """
+    Decode an event in any supported format, whatever this process produces.
+    """
+    if raw[:1] == b"{":
+        return SERIALIZERS["json"].decode(raw)
+    if raw[:1] and raw[0] in BINARY_VERSIONS:
+        return SERIALIZERS["binary"].decode(raw)
+    raise ValueError(f"unknown event format version {raw[:1]!r}")
+
+
+event_serializer = get_serializer(settings.EVENT_FORMAT)
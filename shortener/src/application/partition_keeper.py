@@ -0,0 +1,34 @@
+import asyncio
+import logging
+
+from infrastructure.config import settings
+from infrastructure.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionKeeper:
+    """
+    Keep month partitions (PG_PARTITIONING=month) created ahead of the clock while the
+    replica runs.
+
+    init_db only covers the months ahead of startup, and inserts into a month without a
+    partition fail, so a replica must not rely on the partitions.py cron alone.
+    """
+
+    def __init__(self, database: Database, interval: float = settings.PG_PARTITION_CHECK_SECONDS):
+        self.database = database
+        self.interval = interval
+
+    async def run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                partitions = await self.database.ensure_month_partitions()
+                logger.debug({"action": "ensure_partitions", "partitions": partitions})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(
+                    {"action": "ensure_partitions", "status": "failed", "error": str(e)}
+                )
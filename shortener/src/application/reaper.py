@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+
+from domain.url_shortener_service import URLShortenerService
+from infrastructure.bloom import load_bloom_filter
+from infrastructure.config import settings
+from infrastructure.metrics import bloom_stale_entries, url_expired_deleted
+from infrastructure.short_code_filter import load_short_code_filter
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiredLinkReaper:
+    """
+    Periodically delete expired links and drop them from every cache tier.
+
+    Each pass removes at most REAPER_MAX_BATCHES batches of REAPER_BATCH_SIZE rows per
+    shard, so a backlog of expired links is worked off over several passes instead of
+    in one long transaction. Bloom filters cannot forget, so deleted links are counted
+    and the filter is rebuilt from the live rows once they make up BLOOM_REBUILD_STALE_RATIO
+    of its entries.
+    """
+
+    def __init__(
+        self,
+        service: URLShortenerService,
+        interval: float = settings.REAPER_INTERVAL_SECONDS,
+        batch_size: int = settings.REAPER_BATCH_SIZE,
+        max_batches: int = settings.REAPER_MAX_BATCHES,
+        stale_ratio: float = settings.BLOOM_REBUILD_STALE_RATIO,
+    ):
+        self.service = service
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.stale_ratio = stale_ratio
+        self.stale = 0
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.reap_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception({"action": "reap_expired", "status": "failed", "error": str(e)})
+            await asyncio.sleep(self.interval)
+
+    async def reap_once(self) -> int:
+        start = time.perf_counter()
+        deleted = await self.service.database.delete_expired(self.batch_size, self.max_batches)
+        if deleted:
+            await self.service.invalidate(mapping.short_code for mapping in deleted)
+            codes = self.service.code_filter
+            if codes is not None:
+                for mapping in deleted:
+                    codes.discard(mapping.short_code)
+            url_expired_deleted.inc(len(deleted))
+            self.stale += len(deleted)
+            bloom_stale_entries.set(self.stale)
+        logger.info(
+            {
+                "action": "reap_expired",
+                "status": "done",
+                "deleted": len(deleted),
+                "elapsed": round(time.perf_counter() - start, 3),
+            }
+        )
+        if self.stale and self.stale > self.stale_ratio * len(self.service.bloom):
+            await self.rebuild_bloom()
+        if self.service.code_filter is not None and self.service.code_filter.saturated:
+            await self.rebuild_code_filter()
+        return len(deleted)
+
+    async def rebuild_code_filter(self):
+        """
+        Replace a short-code filter that filled up (and so stopped rejecting) with one of
+        twice the capacity, loaded from the rows not reaped yet.
+        """
+        current = self.service.code_filter
+        capacity = max(settings.SHORT_CODE_FILTER_CAPACITY, current.capacity * 2)
+        self.service.code_filter = await load_short_code_filter(
+            self.service.database, capacity, current
+        )
+        logger.info(
+            {
+                "action": "rebuild_code_filter",
+                "status": "done",
+                "capacity": self.service.code_filter.capacity,
+                "entries": len(self.service.code_filter),
+            }
+        )
+
+    async def rebuild_bloom(self):
+        """
+        Build a fresh filter from active rows and swap it in.
+
+        URLs shortened while the scan runs may be missing from the new filter; that only
+        costs shorten_url its fast path for them, since the insert itself detects the
+        existing row.
+        """
+        start = time.perf_counter()
+        # Sized for the live entries up front, so the rebuilt filter is a single slice
+        live = max(0, len(self.service.bloom) - self.stale)
+        bloom = await load_bloom_filter(self.service.database, expected_items=live)
+        async with self.service.lock:
+            self.service.bloom = bloom
+        self.stale = 0
+        bloom_stale_entries.set(0)
+        logger.info(
+            {
+                "action": "rebuild_bloom",
+                "status": "done",
+                "entries": len(bloom),
+                "elapsed": round(time.perf_counter() - start, 3),
+            }
+        )
@@ -1,19 +1,35 @@
+import contextlib
 import logging
 
 import uvicorn
 
-from interface.api import app
-
 logger = logging.getLogger(__name__)
 
 
-async def run_api_server(host: str = "0.0.0.0", port: int = 8001):
+class APIServer(uvicorn.Server):
+    """
+    uvicorn server that leaves SIGTERM/SIGINT to main(), which drains the replica
+    (application.shutdown) and tells the server when to stop accepting connections.
+    """
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+
+def build_api_server(app, host: str = "0.0.0.0", port: int = 8001) -> APIServer:
+    config = uvicorn.Config(app, host=host, port=port, log_level="info")
+    return APIServer(config)
+
+
+async def run_api_server(server: APIServer):
     """
     Run the FastAPI server using uvicorn.
 
     This function is awaited in the main event loop.
-    If the server stops (due to signal or error), the control returns to caller.
+    If the server stops (drained or on error), the control returns to caller.
     """
+    host, port = server.config.host, server.config.port
     logger.info(
         {
             "action": "run_api_server",
@@ -23,8 +39,6 @@ async def run_api_server(host: str = "0.0.0.0", port: int = 8001):
         }
     )
 
-    config = uvicorn.Config(app, host=host, port=port, log_level="info")
-    server = uvicorn.Server(config)
     await server.serve()
 
     logger.info(
@@ -1,52 +1,150 @@
 import asyncio
 import logging
+import time
+from typing import Dict, Iterable, Optional
+
+import uvicorn
+
+from domain.url_shortener_service import URLShortenerService
+from infrastructure.config import settings
+from infrastructure.database import database
+from infrastructure.kafka_client import kafka_client
+from infrastructure.metrics import shutdown_phase_seconds
+from infrastructure.redis_client import redis_client
 
 logger = logging.getLogger(__name__)
 
 
-async def shutdown():
+class Drain:
     """
-    Gracefully shut down the service by cancelling all running tasks and waiting for them to finish.
+    Takes the replica out of service on SIGTERM/SIGINT without failing requests or
+    dropping events, timing each phase:
+
+    1. announce: /ready turns 503 ("draining") and the replica keeps serving for
+       DRAIN_DELAY_SECONDS, so load balancers stop routing to it first;
+    2. requests: uvicorn stops accepting connections and waits for in-flight requests,
+       cancelling whatever still runs DRAIN_TIMEOUT_SECONDS after the signal;
+    3. background: warm-up and the reaper are stopped;
+    4. consumer: the batch in hand is finished and the consumer offsets committed;
+    5. producer: queued Kafka messages and pending inserts are flushed;
+    6. close: Kafka, Postgres and Redis connections are closed.
+
+    A read-only edge replica (no service, no consumer) only goes through the first three.
+    A second signal skips the wait: requests still running are cancelled at once.
     """
-    logger.info(
-        {
-            "action": "shutdown",
-            "message": "Shutdown signal received. Stopping service...",
-        }
-    )
-
-    # Get all tasks except the current one
-    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
-
-    if not tasks:
-        logger.info(
-            {
-                "action": "shutdown",
-                "message": "No running tasks found. Shutdown complete.",
-            }
-        )
-        return
-
-    # Request cancellation
-    for task in tasks:
-        task.cancel()
-
-    logger.info(
-        {
-            "action": "shutdown",
-            "message": "Cancelled all running tasks. Waiting for them to finish...",
-        }
-    )
-
-    # Wait briefly for tasks to finish
-    try:
-        await asyncio.gather(*tasks, return_exceptions=True)
-    except Exception as e:
-        logger.exception({"action": "shutdown", "error": str(e)})
-
-    logger.info(
-        {
-            "action": "shutdown",
-            "message": "All tasks completed or cancelled. Shutdown complete.",
-        }
-    )
+
+    def __init__(
+        self,
+        delay: float = settings.DRAIN_DELAY_SECONDS,
+        timeout: float = settings.DRAIN_TIMEOUT_SECONDS,
+    ):
+        self.delay = delay
+        self.timeout = timeout
+        self.draining = False
+        self.phases: Dict[str, float] = {}
+        self.server: Optional[uvicorn.Server] = None
+        self._requested = asyncio.Event()
+        self._forced = asyncio.Event()
+        self._deadline = 0.0
+        self._mark = 0.0
+
+    def request(self):
+        """Signal handler: start draining, or on a second signal stop waiting."""
+        if self._requested.is_set():
+            logger.warning({"action": "drain", "status": "forced"})
+            self._forced.set()
+            if self.server is not None:
+                self.server.force_exit = True
+                self.server.should_exit = True
+            return
+        logger.info({"action": "drain", "status": "requested"})
+        self._requested.set()
+
+    async def wait_requested(self):
+        await self._requested.wait()
+
+    def _phase_done(self, name: str):
+        now = time.perf_counter()
+        self.phases[name] = round(now - self._mark, 4)
+        shutdown_phase_seconds.labels(name).set(now - self._mark)
+        self._mark = now
+
+    def _remaining(self) -> float:
+        # Phases after the requests still get a moment even if those used up the deadline
+        return max(1.0, self._deadline - time.perf_counter())
+
+    async def run(
+        self,
+        service: Optional[URLShortenerService],
+        api_task: asyncio.Task,
+        consumer_task: Optional[asyncio.Task],
+        background_tasks: Iterable[asyncio.Task],
+    ):
+        start = self._mark = time.perf_counter()
+        self._deadline = start + self.timeout
+        self.draining = True
+        logger.info({"action": "drain", "status": "started", "timeout": self.timeout})
+
+        if self.delay > 0 and not api_task.done():
+            # Cut short if the server dies or a second signal arrives
+            forced = asyncio.create_task(self._forced.wait())
+            await asyncio.wait(
+                [api_task, forced], timeout=self.delay, return_when=asyncio.FIRST_COMPLETED
+            )
+            forced.cancel()
+        self._phase_done("announce")
+
+        if self.server is not None:
+            self.server.config.timeout_graceful_shutdown = max(
+                0.0, self._deadline - time.perf_counter()
+            )
+            self.server.should_exit = True
+        try:
+            await api_task
+        except (Exception, SystemExit) as e:
+            logger.exception({"action": "drain", "phase": "requests", "error": str(e)})
+        self._phase_done("requests")
+
+        background_tasks = list(background_tasks)
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        self._phase_done("background")
+
+        if consumer_task is not None:
+            await self._step("consumer", kafka_client.stop_consuming(consumer_task))
+            self._phase_done("consumer")
+        if service is not None:
+            if service.insert_batcher is not None:
+                await self._step("inserts", service.insert_batcher.close())
+            await self._step("producer", kafka_client.flush())
+            self._phase_done("producer")
+
+            for name, close in (
+                ("kafka", kafka_client.close),
+                ("postgres", database.close),
+                ("redis", redis_client.close),
+            ):
+                await self._step(name, close())
+            self._phase_done("close")
+
+        total = time.perf_counter() - start
+        shutdown_phase_seconds.labels("total").set(total)
+        self.phases["total"] = round(total, 4)
+        logger.info({"action": "drain", "status": "done", "phases": self.phases})
+
+    async def _step(self, name: str, work):
+        try:
+            await asyncio.wait_for(work, self._remaining())
+        except Exception as e:
+            logger.warning(
+                {
+                    "action": "drain",
+                    "step": name,
+                    "status": "failed",
+                    "error": str(e) or type(e).__name__,
+                }
+            )
+
+
+drain = Drain()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from domain.url_shortener_service import URLShortenerService
+from infrastructure.bloom import load_bloom_filter
+from infrastructure.config import settings
+from infrastructure.metrics import startup_phase_seconds
+from infrastructure.short_code_filter import load_short_code_filter
+
+logger = logging.getLogger(__name__)
+
+
+def process_uptime() -> Optional[float]:
+    """
+    Seconds since this process was started, interpreter start-up and imports included
+    (Linux only; None elsewhere).
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22 of stat
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class Warmup:
+    """
+    Times the start-up phases and runs the warm-up that gates readiness.
+
+    Warm-up steps run concurrently and are best effort: a step that fails or outlives
+    WARMUP_TIMEOUT_SECONDS is logged and the replica becomes ready without that head start.
+    Links created while the bloom filter loads may be missing from it; that only costs
+    shorten_url its fast path for them, since the insert itself detects the existing row.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.WARMUP_ENABLED,
+        timeout: float = settings.WARMUP_TIMEOUT_SECONDS,
+        cache_items: int = settings.WARMUP_CACHE_ITEMS,
+    ):
+        self.enabled = enabled
+        self.timeout = timeout
+        self.cache_items = cache_items
+        self.ready = False
+        self.phases: Dict[str, float] = {}
+        self._mark = time.perf_counter()
+
+    def begin(self):
+        """Call first thing in main(): everything before it is billed to imports."""
+        uptime = process_uptime()
+        if uptime is not None:
+            self._record("imports", uptime)
+        self._mark = time.perf_counter()
+
+    def phase_done(self, name: str):
+        """Record the time since the previous phase ended as phase name."""
+        now = time.perf_counter()
+        self._record(name, now - self._mark)
+        self._mark = now
+
+    def _record(self, name: str, seconds: float):
+        self.phases[name] = round(seconds, 4)
+        startup_phase_seconds.labels(name).set(seconds)
+
+    async def run(self, service: URLShortenerService):
+        if self.enabled:
+            await asyncio.gather(
+                self._step("bloom", self._warm_bloom(service)),
+                self._step("short_codes", self._warm_code_filter(service)),
+                self._step("statements", service.database.warm_statements()),
+                self._step("cache", self._warm_cache(service)),
+            )
+        self.phase_done("warmup")
+        self.ready = True
+
+        total = process_uptime()
+        if total is not None:
+            self._record("total", total)
+        logger.info(
+            {
+                "action": "startup",
+                "status": "ready",
+                "cold_start_seconds": self.phases.get("total"),
+                "phases": self.phases,
+            }
+        )
+
+    async def _step(self, name: str, work):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(work, self.timeout)
+        except Exception as e:
+            logger.warning(
+                {
+                    "action": "warmup",
+                    "step": name,
+                    "status": "failed",
+                    "error": str(e) or type(e).__name__,
+                }
+            )
+            return
+        elapsed = time.perf_counter() - start
+        self._record(f"warmup_{name}", elapsed)
+        logger.info(
+            {
+                "action": "warmup",
+                "step": name,
+                "status": "done",
+                "items": result,
+                "elapsed": round(elapsed, 3),
+            }
+        )
+
+    async def _warm_bloom(self, service: URLShortenerService) -> int:
+        bloom = await load_bloom_filter(service.database)
+        async with service.lock:
+            service.bloom = bloom
+        return len(bloom)
+
+    async def _warm_code_filter(self, service: URLShortenerService) -> int:
+        if service.code_filter is None:
+            return 0
+        service.code_filter = await load_short_code_filter(
+            service.database, settings.SHORT_CODE_FILTER_CAPACITY, service.code_filter
+        )
+        return len(service.code_filter)
+
+    async def _warm_cache(self, service: URLShortenerService) -> int:
+        local_cache = service.local_cache
+        if self.cache_items <= 0 or local_cache is None or not local_cache.enabled:
+            return 0
+        limit = min(self.cache_items, local_cache.max_size)
+        now = time.time()
+        warmed = 0
+        for mapping in await service.redis_client.sample_mappings(limit):
+            if not mapping.is_expired(now):
+                local_cache.set(mapping.short_code, mapping)
+                warmed += 1
+        return warmed
+
+
+warmup = Warmup()
@@ -0,0 +1,245 @@
+"""
+Bulk import and export of url_mappings without going through POST /shorten.
+
+    python src/bulk.py import links.csv [--format csv|ndjson] [--chunk-size 10000] [--workers 4]
+    python src/bulk.py export links.ndjson [--format csv|ndjson] [--include-expired]
+
+Import reads records with long_url (or longUrl) and optional short_code, created_at and
+expires_at (ISO 8601 or epoch seconds), so an export can be imported elsewhere as is.
+Input is read in chunks; URLs are canonicalized and short codes computed with
+URLShortenerService.generate_short_codes in a process pool, and each chunk is COPYed to the
+owning shards in one round trip per shard. A generated code that already belongs to a
+different URL is retried with an alternate code for the whole batch of collisions at once;
+an explicit short_code that is taken is rejected. Inserted links are written to Redis and,
+with --publish, announced as URL_CREATED events so running replicas add them to their bloom
+filters.
+
+Export streams COPY output straight to the file (or stdout for "-"), one shard after another,
+so memory stays constant regardless of the table size.
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from application.messaging.publishers import publish_url_created_many
+from domain.url_normalization import canonical_url
+from domain.url_shortener_service import URLShortenerService
+from infrastructure.database import NOT_EXPIRED, database, from_epoch, import_mappings
+from infrastructure.kafka_client import kafka_client
+from infrastructure.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+MAX_CODE_ATTEMPTS = 5
+
+# (short_code, long_url, created_at, expires_at), ordered as MAPPING_COLUMNS
+Record = Tuple[str, str, Optional[datetime], Optional[datetime]]
+
+
+def alternate_code(long_url: str, attempt: int) -> str:
+    return URLShortenerService.generate_short_code(f"{long_url}#{attempt}")
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Epoch seconds or ISO 8601 (naive means UTC) to the naive UTC datetimes stored."""
+    if value in (None, ""):
+        return None
+    try:
+        return from_epoch(float(value))
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+
+def read_records(path: str, fmt: str) -> Iterator[Dict]:
+    stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    with stream:
+        if fmt == "csv":
+            yield from csv.DictReader(stream)
+        else:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+
+async def assign_codes(
+    rows: List[Dict], executor: Executor, workers: int, stats: Counter
+) -> List[Tuple[Record, bool]]:
+    """
+    Turn raw input rows into records, generating missing short codes in the pool.
+
+    Returns (record, code_was_given) pairs; invalid rows are counted and dropped.
+    """
+    urls = [row.get("long_url") or row.get("longUrl") or "" for row in rows]
+    missing = [i for i, row in enumerate(rows) if not row.get("short_code")]
+    results = await URLShortenerService.generate_short_codes(
+        [urls[i] for i in missing], executor, chunk_size=max(1, -(-len(missing) // workers))
+    )
+    generated = dict(zip(missing, results))
+
+    records = []
+    for i, row in enumerate(rows):
+        given = i not in generated
+        if given:
+            # Rows that carry their code (e.g. an export) keep their URL byte for byte
+            result = (urls[i], row["short_code"]) if canonical_url(urls[i]) else None
+        else:
+            result = generated[i]
+        if result is None:
+            stats["invalid"] += 1
+            continue
+        long_url, code = result
+        created_at = parse_timestamp(row.get("created_at"))
+        expires_at = parse_timestamp(row.get("expires_at"))
+        records.append(((code, long_url, created_at, expires_at), given))
+    return records
+
+
+async def load_records(pending: List[Tuple[Record, bool]], args, stats: Counter):
+    """
+    Insert records on their shards, re-keying generated codes that collide.
+    """
+    for attempt in range(1, MAX_CODE_ATTEMPTS + 1):
+        by_shard = defaultdict(list)
+        for record, _ in pending:
+            by_shard[database.shard_for_short_code(record[0])].append(record)
+        origin = {(record[0], record[1]): (record, given) for record, given in pending}
+
+        inserted, collisions = [], []
+        for shard, records in by_shard.items():
+            async with database.pools[shard].acquire() as conn:
+                rows, clashes = await import_mappings(conn, records, database.layout)
+            inserted.extend(rows)
+            collisions.extend(clashes)
+        stats["inserted"] += len(inserted)
+        stats["existing"] += len(pending) - len(inserted) - len(collisions)
+        await warm(inserted, args)
+
+        pending = []
+        for key in collisions:
+            (code, long_url, created_at, expires_at), given = origin[key]
+            if given:
+                stats["rejected"] += 1
+            else:
+                code = alternate_code(long_url, attempt)
+                pending.append(((code, long_url, created_at, expires_at), False))
+        stats["collisions"] += len(pending)
+        if not pending:
+            return
+    stats["unresolved"] += len(pending)
+
+
+async def warm(inserted, args):
+    if not inserted:
+        return
+    if not args.no_cache:
+        await redis_client.cache_mappings(inserted)
+    if args.publish:
+        await publish_url_created_many(inserted)
+
+
+async def import_file(args: argparse.Namespace) -> Counter:
+    stats: Counter = Counter()
+    await database.connect()
+    if not args.no_cache:
+        await redis_client.connect()
+    if args.publish:
+        await kafka_client.connect_producer()
+    rows = read_records(args.path, args.format)
+    try:
+        with ProcessPoolExecutor(args.workers) as executor:
+            while chunk := list(itertools.islice(rows, args.chunk_size)):
+                stats["read"] += len(chunk)
+                pending = await assign_codes(chunk, executor, args.workers, stats)
+                await load_records(pending, args, stats)
+                logger.info({"action": "bulk_import", "status": "progress", **stats})
+    finally:
+        await database.close()
+        await redis_client.close()
+        await kafka_client.close()
+    logger.info({"action": "bulk_import", "status": "complete", **stats})
+    return stats
+
+
+async def export_file(args: argparse.Namespace) -> int:
+    """
+    Stream every shard's rows into one file, shard after shard.
+    """
+    where = "" if args.include_expired else f"WHERE {NOT_EXPIRED}"
+    if args.format == "csv":
+        query = f"SELECT short_code, long_url, created_at, expires_at FROM url_mappings {where}"
+        options = {"format": "csv"}
+    else:
+        # One JSON object per line; the control-character quote and delimiter keep COPY from
+        # escaping anything inside the JSON text
+        query = f"""
+        SELECT json_build_object(
+            'short_code', short_code, 'long_url', long_url,
+            'created_at', extract(epoch FROM created_at)::bigint,
+            'expires_at', extract(epoch FROM expires_at)::bigint
+        ) FROM url_mappings {where}
+        """
+        options = {"format": "csv", "quote": "\x01", "delimiter": "\x02"}
+
+    await database.connect()
+    out = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+    total = 0
+
+    async def write(data: bytes):
+        out.write(data)
+
+    try:
+        if args.format == "csv":
+            out.write(b"short_code,long_url,created_at,expires_at\n")
+        for shard, pool in database.pools.items():
+            async with pool.acquire() as conn:
+                status = await conn.copy_from_query(query, output=write, **options)
+            count = int(status.rsplit(" ", 1)[-1])
+            total += count
+            logger.info({"action": "bulk_export", "shard": shard, "rows": count})
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        await database.close()
+    logger.info({"action": "bulk_export", "status": "complete", "rows": total})
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("import", "export"):
+        command = commands.add_parser(name)
+        command.add_argument("path", help='file path, or "-" for stdin/stdout')
+        command.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    importer = commands.choices["import"]
+    importer.add_argument("--chunk-size", type=int, default=10_000)
+    importer.add_argument("--workers", type=int, default=4, help="code generation processes")
+    importer.add_argument("--no-cache", action="store_true", help="do not warm Redis")
+    importer.add_argument("--publish", action="store_true", help="emit URL_CREATED events")
+    exporter = commands.choices["export"]
+    exporter.add_argument("--include-expired", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        asyncio.run(import_file(args))
+    else:
+        asyncio.run(export_file(args))
+
+
+if __name__ == "__main__":
+    from infrastructure.logging_config import setup_logging
+
+    setup_logging()
+    main()
@@ -0,0 +1,15 @@
+from typing import NamedTuple, Optional
+
+
+class URLMapping(NamedTuple):
+    """
+    A short code and what it resolves to. Timestamps are Unix epoch seconds (UTC).
+    """
+
+    short_code: str
+    long_url: str
+    created_at: Optional[float] = None
+    expires_at: Optional[float] = None
+
+    def is_expired(self, now: float) -> bool:
+        return self.expires_at is not None and self.expires_at <= now
@@ -0,0 +1,165 @@
+"""
+Canonical form of http(s) URLs, so equivalent spellings share one short code.
+
+Applies the syntax-based normalizations of RFC 3986 section 6.2.2 plus scheme-based ones:
+
+scheme_case     HTTP://...            -> http://...
+host_case       http://Example.COM/   -> http://example.com/
+default_port    http://example.com:80 -> http://example.com/
+empty_path      http://example.com    -> http://example.com/
+percent_case    /a%2fb                -> /a%2Fb
+percent_decode  /%7Euser              -> /~user   (unreserved characters only)
+dot_segments    /a/./b/../c           -> /a/c
+empty_query     /a?                   -> /a
+tracking        /a?utm_source=x&id=1  -> /a?id=1  (only names in URL_STRIP_QUERY_PARAMS)
+
+Userinfo, path case, query parameter order and fragments are kept: they can change what the
+target serves.
+"""
+
+import re
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple
+from urllib.parse import SplitResult, urlsplit
+
+from infrastructure.config import settings
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+
+
+def _parse_param_names(raw: str) -> Tuple[FrozenSet[str], Tuple[str, ...]]:
+    """Exact names and, for entries ending in "*", name prefixes (lowercased)."""
+    names = [name.strip().lower() for name in raw.split(",") if name.strip()]
+    exact = frozenset(name for name in names if not name.endswith("*"))
+    prefixes = tuple(name[:-1] for name in names if name.endswith("*"))
+    return exact, prefixes
+
+
+STRIP_EXACT, STRIP_PREFIXES = _parse_param_names(settings.URL_STRIP_QUERY_PARAMS)
+
+
+def _normalize_escape(match: "re.Match") -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else "%" + match.group(1).upper()
+
+
+def normalize_percent_encoding(component: str) -> str:
+    if "%" not in component:
+        return component
+    return _PERCENT_ESCAPE.sub(_normalize_escape, component)
+
+
+def remove_dot_segments(path: str) -> str:
+    """RFC 3986 section 5.2.4, for absolute paths."""
+    if "." not in path:
+        return path
+    segments = path.split("/")
+    output: List[str] = []
+    for segment in segments[1:]:
+        if segment == ".":
+            continue
+        if segment == "..":
+            if output:
+                output.pop()
+            continue
+        output.append(segment)
+    # A trailing "." or ".." still denotes a directory
+    if segments[-1] in (".", ".."):
+        output.append("")
+    return "/" + "/".join(output)
+
+
+def strip_tracking_params(query: str) -> str:
+    if not query or not (STRIP_EXACT or STRIP_PREFIXES):
+        return query
+    kept = []
+    for pair in query.split("&"):
+        name = pair.split("=", 1)[0].lower()
+        if name in STRIP_EXACT or (STRIP_PREFIXES and name.startswith(STRIP_PREFIXES)):
+            continue
+        kept.append(pair)
+    return "&".join(kept)
+
+
+def _split_hostport(hostport: str) -> Tuple[str, str]:
+    """Host and ":port" (possibly just ":" or empty); IPv6 literals keep their brackets."""
+    if hostport.startswith("["):
+        end = hostport.find("]") + 1
+        return hostport[:end], hostport[end:]
+    host, colon, port = hostport.partition(":")
+    return host, colon + port
+
+
+@lru_cache(maxsize=1024)
+def normalize_netloc(netloc: str, scheme: str) -> str:
+    userinfo, at, hostport = netloc.rpartition("@")
+    host, port = _split_hostport(hostport)
+    if port in (":", ":" + DEFAULT_PORTS[scheme]):
+        port = ""
+    return f"{userinfo}{at}{host.lower()}{port}"
+
+
+def _canonical_parts(parts: SplitResult) -> Tuple[str, str, str, str, str]:
+    scheme = parts.scheme.lower()
+    netloc = normalize_netloc(parts.netloc, scheme)
+    path = remove_dot_segments(normalize_percent_encoding(parts.path)) or "/"
+    query = strip_tracking_params(normalize_percent_encoding(parts.query))
+    fragment = normalize_percent_encoding(parts.fragment)
+    return scheme, netloc, path, query, fragment
+
+
+def _join(scheme: str, netloc: str, path: str, query: str, fragment: str) -> str:
+    url = f"{scheme}://{netloc}{path}"
+    if query:
+        url += "?" + query
+    if fragment:
+        url += "#" + fragment
+    return url
+
+
+def canonical_url(url: str, normalize: Optional[bool] = None) -> Optional[str]:
+    """
+    The canonical form of an http(s) URL, or None if it is not a valid one.
+
+    Surrounding whitespace is dropped either way; with normalization disabled
+    (URL_NORMALIZE=false) a valid URL is otherwise returned unchanged.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    if not parts.netloc or parts.scheme.lower() not in DEFAULT_PORTS:
+        return None
+    if not (settings.URL_NORMALIZE if normalize is None else normalize):
+        return url
+    return _join(*_canonical_parts(parts))
+
+
+def normalization_changes(url: str) -> List[str]:
+    """
+    Names of the rules (see module docstring) that change url; used by the migration report.
+    """
+    url = url.strip()
+    parts = urlsplit(url)
+    host, port = _split_hostport(parts.netloc.rpartition("@")[2])
+    checks = {
+        # urlsplit already lowercases the scheme, so compare with the raw text
+        "scheme_case": not url.startswith(parts.scheme),
+        "host_case": host != host.lower(),
+        "default_port": port in (":", ":" + DEFAULT_PORTS[parts.scheme.lower()]),
+        "empty_path": not parts.path,
+        "dot_segments": remove_dot_segments(parts.path) != parts.path,
+        "empty_query": not parts.query and url.split("#", 1)[0].endswith("?"),
+        "tracking": strip_tracking_params(parts.query) != parts.query,
+    }
+    changes = {name for name, changed in checks.items() if changed}
+    for component in (parts.path, parts.query, parts.fragment):
+        for match in _PERCENT_ESCAPE.finditer(component):
+            if chr(int(match.group(1), 16)) in UNRESERVED:
+                changes.add("percent_decode")
+            elif match.group(1) != match.group(1).upper():
+                changes.add("percent_case")
+    return sorted(changes)
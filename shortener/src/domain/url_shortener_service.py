@@ -1,18 +1,51 @@
 import asyncio
 import hashlib
 import logging
-from typing import Optional, Tuple
+import time
+from concurrent.futures import Executor
+from time import perf_counter
+from typing import Iterable, List, Optional, Sequence, Tuple
 from urllib.parse import urlparse
 
 from asyncpg import UniqueViolationError
-from pybloom_live import BloomFilter
 
+from domain.models import URLMapping
+from domain.url_normalization import canonical_url
+from infrastructure.bloom import ScalableBloomFilter
+from infrastructure.cdn import CDNPurger
 from infrastructure.database import Database
-from infrastructure.metrics import url_created, url_lookup_latency
+from infrastructure.insert_batcher import InsertBatcher
+from infrastructure.local_cache import LocalCache
+from infrastructure.metrics import (
+    short_code_filter_rejections,
+    stage_timers,
+    url_created,
+    url_lookup_latency,
+)
 from infrastructure.redis_client import RedisClient
+from infrastructure.short_code_filter import ShortCodeFilter
 
 logger = logging.getLogger(__name__)
 
+BATCH_CHUNK_SIZE = 10_000
+
+
+def short_codes_for(urls: Sequence[str]) -> List[Optional[Tuple[str, str]]]:
+    """
+    Validate, canonicalize and hash a list of URLs in one tight loop: (canonical_url,
+    short_code) for each valid URL, None for invalid ones, in input order. Same results as
+    canonical_url followed by generate_short_code, without per-item call overhead;
+    picklable for process pools.
+    """
+    sha256 = hashlib.sha256
+    canonical = canonical_url
+    results: List[Optional[Tuple[str, str]]] = []
+    append = results.append
+    for url in urls:
+        url = canonical(url)
+        append((url, sha256(url.encode()).hexdigest()[:7]) if url is not None else None)
+    return results
+
 
 class URLShortenerService:
     """
@@ -23,22 +56,40 @@ class URLShortenerService:
         self,
         database: Database,
         redis_client: RedisClient,
-        bloom: BloomFilter,
+        bloom: ScalableBloomFilter,
         lock: asyncio.Lock,
+        local_cache: Optional[LocalCache] = None,
+        cdn_purger: Optional[CDNPurger] = None,
+        code_filter: Optional[ShortCodeFilter] = None,
+        insert_batcher: Optional[InsertBatcher] = None,
     ):
         self.database = database
         self.redis_client = redis_client
         self.bloom = bloom
         self.lock = lock
+        self.local_cache = local_cache
+        self.cdn_purger = cdn_purger
+        # Known short codes, when enabled; swapped for a loaded filter by start-up warm-up
+        self.code_filter = code_filter
+        # Group commit of inserts, when enabled
+        self.insert_batcher = insert_batcher
 
     async def shorten_url(
-        self, long_url: str, correlation_id: Optional[str] = None
-    ) -> Tuple[Optional[str], bool]:
+        self,
+        long_url: str,
+        correlation_id: Optional[str] = None,
+        expires_at: Optional[float] = None,
+    ) -> Tuple[Optional[str], Optional[URLMapping]]:
         """
-        Returns (short_code, newly_created).
-        Only newly_created=True if a new record is inserted.
+        Returns (short_code, created): created is the inserted mapping, or None if the
+        URL was invalid or already had an active link.
+        long_url is stored in canonical form (see domain.url_normalization); a row stored
+        before that under the URL as sent is still found and its code returned.
+        expires_at (epoch seconds) only applies to a new record; an active existing
+        link for the same URL is returned unchanged.
         """
-        if not self.is_valid_url(long_url):
+        canonical = canonical_url(long_url)
+        if canonical is None:
             logger.warning(
                 {
                     "action": "shorten_url",
@@ -47,11 +98,23 @@ class URLShortenerService:
                     "correlation_id": correlation_id,
                 }
             )
-            return None, False
+            return None, None
+        # Equivalent spellings share one row, cache entry, bloom entry and event. Rows
+        # written without normalization hold the URL as it was sent; that exact spelling is
+        # looked up first so it keeps the code its clients already hold.
+        raw_url, long_url = long_url, canonical
+        candidates = (long_url,) if raw_url == long_url else (raw_url, long_url)
 
         async with self.lock:
-            if long_url in self.bloom:
-                existing_code = await self.find_existing_short_code(long_url)
+            for candidate in candidates:
+                start = perf_counter()
+                maybe_known = candidate in self.bloom
+                stage_timers["bloom_check", "hit" if maybe_known else "miss"].observe(
+                    perf_counter() - start
+                )
+                if not maybe_known:
+                    continue
+                existing_code = await self.find_existing_short_code(candidate)
                 if existing_code:
                     logger.debug(
                         {
@@ -62,16 +125,29 @@ class URLShortenerService:
                             "correlation_id": correlation_id,
                         }
                     )
-                    return existing_code, False
+                    return existing_code, None
 
         short_code = self.generate_short_code(long_url)
         try:
-            await self.database.insert_url_mapping(short_code, long_url)
+            start = perf_counter()
+            if self.insert_batcher is not None:
+                mapping = await self.insert_batcher.insert(short_code, long_url, expires_at)
+            else:
+                mapping = await self.database.insert_url_mapping(short_code, long_url, expires_at)
+            stage_timers["insert", "created" if mapping else "conflict"].observe(
+                perf_counter() - start
+            )
+            if not mapping:
+                return await self._resolve_existing(long_url, correlation_id)
             url_created.inc()
-            await self.redis_client.cache_short_code(short_code, long_url)
+            await self.redis_client.cache_short_code(
+                short_code, long_url, mapping.created_at, mapping.expires_at
+            )
 
             async with self.lock:
                 self.bloom.add(long_url)
+            if self.code_filter is not None:
+                self.code_filter.add(short_code)
 
             logger.info(
                 {
@@ -82,19 +158,9 @@ class URLShortenerService:
                     "correlation_id": correlation_id,
                 }
             )
-            return short_code, True
+            return short_code, mapping
         except UniqueViolationError:
-            existing_code = await self.find_existing_short_code(long_url)
-            logger.info(
-                {
-                    "action": "shorten_url",
-                    "long_url": long_url,
-                    "short_code": existing_code,
-                    "status": "already_exists",
-                    "correlation_id": correlation_id,
-                }
-            )
-            return existing_code, False
+            return await self._resolve_existing(long_url, correlation_id)
         except Exception as e:
             logger.exception(
                 {
@@ -105,16 +171,51 @@ class URLShortenerService:
                     "correlation_id": correlation_id,
                 }
             )
-            return None, False
+            return None, None
 
-    async def get_long_url(
+    async def _resolve_existing(
+        self, long_url: str, correlation_id: Optional[str]
+    ) -> Tuple[Optional[str], Optional[URLMapping]]:
+        """Look up the mapping that won the race for this URL's short code."""
+        existing_code = await self.find_existing_short_code(long_url)
+        logger.info(
+            {
+                "action": "shorten_url",
+                "long_url": long_url,
+                "short_code": existing_code,
+                "status": "already_exists",
+                "correlation_id": correlation_id,
+            }
+        )
+        return existing_code, None
+
+    async def get_mapping(
         self, short_code: str, correlation_id: Optional[str] = None
-    ) -> Optional[str]:
-        """Retrieve via Redis cache, fallback to DB."""
-        start = asyncio.get_event_loop().time()
-        cached_url = await self.redis_client.get_long_url(short_code)
-        if cached_url:
-            url_lookup_latency.observe(asyncio.get_event_loop().time() - start)
+    ) -> Optional[URLMapping]:
+        """
+        Retrieve via in-process cache, then Redis, fallback to DB. Codes the short-code
+        filter has never seen are answered None before any of them is consulted.
+        """
+        if self.code_filter is not None and short_code not in self.code_filter:
+            short_code_filter_rejections.inc()
+            return None
+        start = perf_counter()
+        if self.local_cache is not None and self.local_cache.enabled:
+            mapping = self.local_cache.get(short_code)
+            now = perf_counter()
+            stage_timers["local_cache", "hit" if mapping else "miss"].observe(now - start)
+            if mapping:
+                url_lookup_latency.observe(now - start)
+                return mapping
+
+        redis_start = perf_counter()
+        mapping = await self.redis_client.get_mapping(short_code)
+        now = perf_counter()
+        stage_timers["redis", "hit" if mapping else "miss"].observe(now - redis_start)
+        if mapping:
+            url_lookup_latency.observe(now - start)
+            if self.local_cache is not None:
+                self.local_cache.set(short_code, mapping)
             logger.debug(
                 {
                     "action": "get_long_url",
@@ -123,13 +224,15 @@ class URLShortenerService:
                     "correlation_id": correlation_id,
                 }
             )
-            return cached_url
+            return mapping
 
-        long_url = await self.database.get_long_url(short_code)
-        duration = asyncio.get_event_loop().time() - start
-        url_lookup_latency.observe(duration)
+        db_start = perf_counter()
+        mapping = await self.database.get_mapping(short_code)
+        now = perf_counter()
+        stage_timers["postgres", "hit" if mapping else "miss"].observe(now - db_start)
+        url_lookup_latency.observe(now - start)
 
-        status = "found" if long_url else "not_found"
+        status = "found" if mapping else "not_found"
         logger.debug(
             {
                 "action": "get_long_url",
@@ -139,12 +242,56 @@ class URLShortenerService:
             }
         )
 
-        if long_url:
-            await self.redis_client.cache_short_code(short_code, long_url)
-        return long_url
+        # Expired rows linger in Postgres until the reaper removes them; never cache them
+        if mapping and not mapping.is_expired(time.time()):
+            await self.redis_client.cache_short_code(
+                short_code, mapping.long_url, mapping.created_at, mapping.expires_at
+            )
+            if self.local_cache is not None:
+                self.local_cache.set(short_code, mapping)
+        return mapping
+
+    async def invalidate(self, short_codes: Iterable[str]):
+        """
+        Drop short codes from every cache tier: in-process, Redis and the CDN edge.
+        """
+        short_codes = list(short_codes)
+        if self.local_cache is not None:
+            self.local_cache.delete(short_codes)
+        await self.redis_client.delete_short_codes(short_codes)
+        if self.cdn_purger is not None:
+            await self.cdn_purger.purge(short_codes)
 
     async def find_existing_short_code(self, long_url: str) -> Optional[str]:
-        return await self.database.get_short_code_by_long_url(long_url)
+        start = perf_counter()
+        short_code = await self.database.get_short_code_by_long_url(long_url)
+        stage_timers["postgres_reverse", "hit" if short_code else "miss"].observe(
+            perf_counter() - start
+        )
+        return short_code
+
+    @staticmethod
+    async def generate_short_codes(
+        urls: Sequence[str],
+        executor: Optional[Executor] = None,
+        chunk_size: int = BATCH_CHUNK_SIZE,
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Batch form of canonical_url + generate_short_code for bulk paths, off the event loop.
+
+        Chunks run concurrently on executor (the loop's default thread pool if None) and
+        are reassembled in input order. sha256 only releases the GIL for inputs over 2 KiB,
+        so URL-sized work needs a ProcessPoolExecutor to use more than one core; threads
+        still keep the loop free to serve redirects meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = await asyncio.gather(
+            *(
+                loop.run_in_executor(executor, short_codes_for, urls[i : i + chunk_size])
+                for i in range(0, len(urls), chunk_size)
+            )
+        )
+        return [result for chunk in chunks for result in chunk]
 
     @staticmethod
     def is_valid_url(url: str) -> bool:
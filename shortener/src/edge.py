@@ -0,0 +1,57 @@
+"""
+Read-only edge replica: serves GET/HEAD /{short_code} from the memory-mapped snapshot at
+SNAPSHOT_PATH plus the delta files in SNAPSHOT_DELTA_DIR, without Postgres, Redis or Kafka.
+
+    python src/edge.py
+
+Build the snapshot with src/snapshots.py export, keep deltas coming with src/snapshots.py
+deltas, and fold them back in with src/snapshots.py compact. New deltas and a replaced
+snapshot are picked up every SNAPSHOT_REFRESH_SECONDS while serving.
+"""
+
+import asyncio
+import logging
+import signal
+
+from application.server_runner import build_api_server, run_api_server
+from application.shutdown import drain
+from infrastructure.config import settings
+from infrastructure.metrics import start_metrics_server
+from infrastructure.snapshot import snapshot_store
+from interface.edge_api import asgi_app
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    logger.info({"action": "startup", "message": "Starting read-only edge replica"})
+    start_metrics_server(port=settings.METRICS_PORT)
+
+    # /ready answers 503 until a snapshot is loaded; the refresh loop keeps looking for it
+    snapshot_store.refresh()
+    server = drain.server = build_api_server(asgi_app, host="0.0.0.0", port=8001)
+    api_task = asyncio.create_task(run_api_server(server))
+    background_tasks = [
+        asyncio.create_task(snapshot_store.run_forever(settings.SNAPSHOT_REFRESH_SECONDS))
+    ]
+
+    loop = asyncio.get_event_loop()
+    for s in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(s, drain.request)
+
+    requested = asyncio.create_task(drain.wait_requested())
+    await asyncio.wait([api_task, requested], return_when=asyncio.FIRST_COMPLETED)
+    requested.cancel()
+
+    logger.info({"action": "shutdown", "message": "Shutting down gracefully..."})
+    await drain.run(None, api_task, None, background_tasks)
+    snapshot_store.close()
+    logger.info({"action": "shutdown", "message": "Shutdown complete."})
+
+
+if __name__ == "__main__":
+    from infrastructure.logging_config import setup_logging
+
+    setup_logging()
+
+    asyncio.run(main())
@@ -1,10 +1,157 @@
 import asyncio
-
-from pybloom_live import BloomFilter
+import hashlib
+import math
+from typing import List, Optional, Tuple
 
 from infrastructure.config import settings
 
-bloom_filter = BloomFilter(
-    capacity=settings.BLOOM_EXPECTED_ITEMS, error_rate=settings.BLOOM_ERROR_RATE
-)
+# Slice n of a ScalableBloomFilter holds GROWTH**n times the initial capacity at an error
+# rate of error_rate * (1 - TIGHTENING) * TIGHTENING**n; that geometric series sums to
+# error_rate, so the whole filter stays within it however many slices it grows.
+GROWTH = 2
+TIGHTENING = 0.8
+
+
+def _hash_pair(key: str) -> Tuple[int, int]:
+    """Two 64-bit hashes; slice probes are h1 + i * h2 (Kirsch-Mitzenmacher)."""
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class BloomSlice:
+    """
+    Fixed-capacity bloom filter over a bytearray, sized for capacity items at error_rate.
+    """
+
+    __slots__ = ("capacity", "error_rate", "num_bits", "num_hashes", "bits", "count", "bits_set")
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        # calloc'd: pages are only made resident as bits land on them
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        self.bits_set = 0
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits = self.bits
+        num_bits = self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, h1: int, h2: int):
+        bits = self.bits
+        num_bits = self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                self.bits_set += 1
+        self.count += 1
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.bits_set / self.num_bits
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Estimated from the bits actually set, not from the design error rate."""
+        return self.fill_ratio**self.num_hashes
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that never fills up (Almeida et al., "Scalable Bloom Filters").
+
+    Starts with one slice for initial_capacity items; when the newest slice is full a
+    larger one with a tighter error rate is added, so memory follows the number of items
+    while the overall false-positive rate stays within error_rate. Lookups check every
+    slice, newest (largest) first, with one key hash shared by all of them.
+    """
+
+    def __init__(self, initial_capacity: int, error_rate: float):
+        self.initial_capacity = max(1, initial_capacity)
+        self.error_rate = error_rate
+        self.slices: List[BloomSlice] = []
+        self._grow()
+
+    def _grow(self):
+        n = len(self.slices)
+        self.slices.append(
+            BloomSlice(
+                self.initial_capacity * GROWTH**n,
+                self.error_rate * (1 - TIGHTENING) * TIGHTENING**n,
+            )
+        )
+
+    def __contains__(self, key: str) -> bool:
+        h1, h2 = _hash_pair(key)
+        for bloom_slice in reversed(self.slices):
+            if bloom_slice.contains(h1, h2):
+                return True
+        return False
+
+    def add(self, key: str) -> bool:
+        """Add key; returns True if it was (probably) already present."""
+        h1, h2 = _hash_pair(key)
+        for bloom_slice in reversed(self.slices):
+            if bloom_slice.contains(h1, h2):
+                return True
+        if self.slices[-1].count >= self.slices[-1].capacity:
+            self._grow()
+        self.slices[-1].add(h1, h2)
+        return False
+
+    def __len__(self) -> int:
+        return sum(bloom_slice.count for bloom_slice in self.slices)
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(len(bloom_slice.bits) for bloom_slice in self.slices)
+
+    @property
+    def fill_ratio(self) -> float:
+        """Share of bits set over all slices."""
+        total = sum(bloom_slice.num_bits for bloom_slice in self.slices)
+        return sum(bloom_slice.bits_set for bloom_slice in self.slices) / total
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Estimated chance that a key never added is reported present."""
+        miss = 1.0
+        for bloom_slice in self.slices:
+            miss *= 1 - bloom_slice.false_positive_rate
+        return 1 - miss
+
+
+def new_bloom_filter(expected_items: Optional[int] = None) -> ScalableBloomFilter:
+    """
+    An empty filter; expected_items (e.g. the size of the filter being replaced) lets a
+    rebuild start with one slice large enough for all of them.
+    """
+    return ScalableBloomFilter(
+        max(settings.BLOOM_INITIAL_CAPACITY, expected_items or 0), settings.BLOOM_ERROR_RATE
+    )
+
+
+async def load_bloom_filter(database, expected_items: Optional[int] = None) -> ScalableBloomFilter:
+    """
+    Build a filter holding the long_url of every active row.
+    """
+    bloom = new_bloom_filter(expected_items)
+    async for batch in database.iter_mappings():
+        for mapping in batch:
+            bloom.add(mapping.long_url)
+        # Adding a large batch is CPU-bound; let requests run in between
+        await asyncio.sleep(0)
+    return bloom
+
+
+bloom_filter = new_bloom_filter()
 bloom_lock = asyncio.Lock()
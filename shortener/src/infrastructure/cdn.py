@@ -0,0 +1,56 @@
+import asyncio
+import json
+import logging
+import urllib.request
+from typing import Iterable
+
+from infrastructure.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CDNPurger:
+    """
+    Purge hook for edge caches: POSTs {"surrogate_keys": [...]} to CDN_PURGE_URL.
+
+    Redirects carry their short code as surrogate key, so purging a code evicts every
+    cached variant of it. A no-op unless CDN_PURGE_URL is configured.
+    """
+
+    def __init__(self, purge_url: str, token: str = "", timeout: float = 5.0):
+        self.purge_url = purge_url
+        self.token = token
+        self.timeout = timeout
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.purge_url)
+
+    async def purge(self, short_codes: Iterable[str]):
+        keys = list(short_codes)
+        if not keys or not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self._post, keys)
+            logger.info({"action": "cdn_purge", "status": "purged", "count": len(keys)})
+        except Exception as e:
+            # Purging is best effort: s-maxage still bounds how long the edge serves stale data
+            logger.warning(
+                {"action": "cdn_purge", "status": "failed", "count": len(keys), "error": str(e)}
+            )
+
+    def _post(self, keys):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(
+            self.purge_url,
+            data=json.dumps({"surrogate_keys": keys}).encode(),
+            headers=headers,
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+cdn_purger = CDNPurger(settings.CDN_PURGE_URL, settings.CDN_PURGE_TOKEN)
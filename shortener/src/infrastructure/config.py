@@ -13,6 +13,18 @@ class Settings(BaseSettings):
     PG_USER: str = Field("postgres", env="PG_USER")
     PG_PASSWORD: str = Field("password", env="PG_PASSWORD")
     PG_DATABASE: str = Field("shortener", env="PG_DATABASE")
+    # Sharding: comma-separated "name=dsn" pairs; empty means a single shard from PG_* above
+    PG_SHARDS: str = Field("", env="PG_SHARDS")
+    # Old layout while rebalance.py moves rows; lookups fall back to it on a miss
+    PG_SHARDS_PREVIOUS: str = Field("", env="PG_SHARDS_PREVIOUS")
+    PG_SHARD_VNODES: int = Field(64, env="PG_SHARD_VNODES")
+    # Table layout for new databases: none | hash (by short_code) | month (by created_at)
+    PG_PARTITIONING: str = Field("none", env="PG_PARTITIONING")
+    PG_HASH_PARTITIONS: int = Field(16, env="PG_HASH_PARTITIONS")
+    # Month partitions created ahead of the current one at startup, every
+    # PG_PARTITION_CHECK_SECONDS while running, and by partitions.py
+    PG_PARTITION_MONTHS_AHEAD: int = Field(3, env="PG_PARTITION_MONTHS_AHEAD")
+    PG_PARTITION_CHECK_SECONDS: float = Field(3600.0, env="PG_PARTITION_CHECK_SECONDS")
 
     # Redis
     REDIS_HOST: str = Field("redis", env="REDIS_HOST")
@@ -22,15 +34,148 @@ class Settings(BaseSettings):
     # Kafka
     KAFKA_BOOTSTRAP_SERVERS: str = Field("kafka:9092", env="KAFKA_BOOTSTRAP_SERVERS")
     URL_CREATED_TOPIC: str = Field("url_created_events", env="URL_CREATED_TOPIC")
+    # Wire format of produced events: "json" or "binary" (compact, versioned). Consumers read
+    # both, so only switch to binary once every replica and consumer runs a version that does.
+    EVENT_FORMAT: str = Field("json", env="EVENT_FORMAT")
+    # Every replica consumes all URL_CREATED events, outside any consumer group, to learn
+    # about links created elsewhere: they are added to its bloom filter, short-code filter
+    # and in-process cache in batches of up to EVENT_BATCH_SIZE, waiting at most
+    # EVENT_BATCH_WAIT_MS for a batch to fill.
+    EVENT_BATCH_SIZE: int = Field(500, env="EVENT_BATCH_SIZE")
+    EVENT_BATCH_WAIT_MS: int = Field(5, env="EVENT_BATCH_WAIT_MS")
 
     # Application
     BASE_URL: str = Field("http://localhost:8001", env="BASE_URL")
     DOWNLOAD_TIMEOUT: int = Field(30, env="DOWNLOAD_TIMEOUT")
     METRICS_PORT: int = Field(8000, env="METRICS_PORT")
+    # Comma-separated histogram buckets (seconds) for hot-path latency metrics
+    LATENCY_BUCKETS: str = Field(
+        "0.00005,0.0001,0.00025,0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5",
+        env="LATENCY_BUCKETS",
+    )
 
-    BLOOM_EXPECTED_ITEMS: int = Field(10_000_000, env="BLOOM_EXPECTED_ITEMS")
+    # Canonicalize URLs before hashing so equivalent spellings share one mapping. Query
+    # parameters named in URL_STRIP_QUERY_PARAMS (comma-separated, "utm_*" matches a prefix)
+    # are dropped; this changes the stored target, so it is opt-in.
+    URL_NORMALIZE: bool = Field(True, env="URL_NORMALIZE")
+    URL_STRIP_QUERY_PARAMS: str = Field("", env="URL_STRIP_QUERY_PARAMS")
+
+    # Per-client token buckets for write requests (POST /shorten), keyed by X-API-Key or IP
+    RATE_LIMIT_ENABLED: bool = Field(False, env="RATE_LIMIT_ENABLED")
+    RATE_LIMIT_RATE: float = Field(10.0, env="RATE_LIMIT_RATE")
+    RATE_LIMIT_BURST: int = Field(20, env="RATE_LIMIT_BURST")
+    RATE_LIMIT_LEASE_SECONDS: float = Field(1.0, env="RATE_LIMIT_LEASE_SECONDS")
+    RATE_LIMIT_MAX_CLIENTS: int = Field(100_000, env="RATE_LIMIT_MAX_CLIENTS")
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = Field(False, env="RATE_LIMIT_TRUST_FORWARDED_FOR")
+    # Global load shedding of write requests (0 disables a signal)
+    LOAD_SHED_POOL_WAIT_SECONDS: float = Field(0.0, env="LOAD_SHED_POOL_WAIT_SECONDS")
+    LOAD_SHED_LOOP_LAG_SECONDS: float = Field(0.0, env="LOAD_SHED_LOOP_LAG_SECONDS")
+    LOAD_SHED_RETRY_AFTER_SECONDS: int = Field(1, env="LOAD_SHED_RETRY_AFTER_SECONDS")
+
+    # Link expiry. Requests may set an expiry; links without one get LINK_DEFAULT_TTL_SECONDS,
+    # and no link lives longer than LINK_MAX_TTL_SECONDS (0 disables either bound).
+    LINK_DEFAULT_TTL_SECONDS: int = Field(0, env="LINK_DEFAULT_TTL_SECONDS")
+    LINK_MAX_TTL_SECONDS: int = Field(0, env="LINK_MAX_TTL_SECONDS")
+    # Background deletion of expired links, in bounded batches per shard
+    REAPER_ENABLED: bool = Field(True, env="REAPER_ENABLED")
+    REAPER_INTERVAL_SECONDS: float = Field(60.0, env="REAPER_INTERVAL_SECONDS")
+    REAPER_BATCH_SIZE: int = Field(1000, env="REAPER_BATCH_SIZE")
+    REAPER_MAX_BATCHES: int = Field(50, env="REAPER_MAX_BATCHES")
+    # Rebuild the bloom filter once this fraction of its entries belongs to deleted links
+    BLOOM_REBUILD_STALE_RATIO: float = Field(0.2, env="BLOOM_REBUILD_STALE_RATIO")
+
+    # Redirect responses: status (301, 302, 307 or 308) and HTTP cache lifetimes in seconds
+    REDIRECT_STATUS_CODE: int = Field(301, env="REDIRECT_STATUS_CODE")
+    REDIRECT_CACHE_MAX_AGE: int = Field(3600, env="REDIRECT_CACHE_MAX_AGE")
+    REDIRECT_CACHE_S_MAXAGE: int = Field(86400, env="REDIRECT_CACHE_S_MAXAGE")
+    # CDN integration: redirects are tagged with the short code; purges POST to CDN_PURGE_URL
+    SURROGATE_KEY_HEADER: str = Field("Surrogate-Key", env="SURROGATE_KEY_HEADER")
+    CDN_PURGE_URL: str = Field("", env="CDN_PURGE_URL")
+    CDN_PURGE_TOKEN: str = Field("", env="CDN_PURGE_TOKEN")
+
+    # Admin profiling endpoints; when disabled the routes and loop monitor are never installed
+    PROFILING_ENABLED: bool = Field(False, env="PROFILING_ENABLED")
+    ADMIN_TOKEN: str = Field("", env="ADMIN_TOKEN")
+    PROFILING_MAX_SECONDS: float = Field(60.0, env="PROFILING_MAX_SECONDS")
+    PROFILING_SAMPLE_INTERVAL: float = Field(0.005, env="PROFILING_SAMPLE_INTERVAL")
+    EVENT_LOOP_LAG_INTERVAL: float = Field(0.25, env="EVENT_LOOP_LAG_INTERVAL")
+    SLOW_CALLBACK_SECONDS: float = Field(0.05, env="SLOW_CALLBACK_SECONDS")
+
+    # Group commit of new links: while INSERT_BATCH_CONCURRENCY batches are being written,
+    # new inserts queue for up to INSERT_BATCH_WAIT_MS and are then written as one multi-row
+    # statement per shard, up to INSERT_BATCH_MAX_ROWS rows (1 writes every link on its own).
+    # Keep the concurrency below the pool size (5) so lookups still find a connection.
+    INSERT_BATCH_MAX_ROWS: int = Field(100, env="INSERT_BATCH_MAX_ROWS")
+    INSERT_BATCH_WAIT_MS: float = Field(2.0, env="INSERT_BATCH_WAIT_MS")
+    INSERT_BATCH_CONCURRENCY: int = Field(4, env="INSERT_BATCH_CONCURRENCY")
+
+    # In-process cache in front of Redis, off by default (0 disables it). Purges and reaper
+    # deletes only reach the replica that ran them: other replicas keep serving a purged or
+    # deleted link for up to LOCAL_CACHE_TTL_SECONDS (expired links are never served).
+    LOCAL_CACHE_SIZE: int = Field(0, env="LOCAL_CACHE_SIZE")
+    LOCAL_CACHE_TTL_SECONDS: float = Field(60.0, env="LOCAL_CACHE_TTL_SECONDS")
+
+    # The bloom filter starts sized for BLOOM_INITIAL_CAPACITY URLs and grows as needed,
+    # keeping the overall false-positive rate within BLOOM_ERROR_RATE
+    BLOOM_INITIAL_CAPACITY: int = Field(100_000, env="BLOOM_INITIAL_CAPACITY")
     BLOOM_ERROR_RATE: float = Field(0.0001, env="BLOOM_ERROR_RATE")
 
+    # Dependency probes behind /ready and /health, refreshed in the background. A probe slower
+    # than its threshold marks the dependency "slow"; failing or timing out marks it "down".
+    # /ready answers 503 while any HEALTH_CRITICAL_DEPENDENCIES is not "ok".
+    HEALTH_PROBE_INTERVAL_SECONDS: float = Field(2.0, env="HEALTH_PROBE_INTERVAL_SECONDS")
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = Field(1.0, env="HEALTH_PROBE_TIMEOUT_SECONDS")
+    HEALTH_POSTGRES_SLOW_SECONDS: float = Field(0.25, env="HEALTH_POSTGRES_SLOW_SECONDS")
+    HEALTH_REDIS_SLOW_SECONDS: float = Field(0.05, env="HEALTH_REDIS_SLOW_SECONDS")
+    HEALTH_KAFKA_SLOW_SECONDS: float = Field(0.5, env="HEALTH_KAFKA_SLOW_SECONDS")
+    HEALTH_CRITICAL_DEPENDENCIES: str = Field(
+        "postgres,redis,kafka", env="HEALTH_CRITICAL_DEPENDENCIES"
+    )
+
+    # In-memory filter of existing short codes, checked before any cache so unknown codes
+    # (scanners, typos) get a 404 without touching Redis or Postgres. Grows from the initial
+    # capacity as needed. Every replica must see every URL_CREATED event, including those of
+    # bulk imports, or codes created elsewhere answer 404 until the next rebuild.
+    SHORT_CODE_FILTER_ENABLED: bool = Field(False, env="SHORT_CODE_FILTER_ENABLED")
+    SHORT_CODE_FILTER_CAPACITY: int = Field(1_000_000, env="SHORT_CODE_FILTER_CAPACITY")
+
+    # Start-up warm-up run before /ready turns 200: bloom filter from Postgres, lookup
+    # statements on every pooled connection, and up to WARMUP_CACHE_ITEMS links from Redis
+    # into the in-process cache. Steps still running after WARMUP_TIMEOUT_SECONDS are abandoned.
+    WARMUP_ENABLED: bool = Field(True, env="WARMUP_ENABLED")
+    WARMUP_TIMEOUT_SECONDS: float = Field(120.0, env="WARMUP_TIMEOUT_SECONDS")
+    WARMUP_CACHE_ITEMS: int = Field(10_000, env="WARMUP_CACHE_ITEMS")
+
+    # Drain on SIGTERM: /ready answers 503 for DRAIN_DELAY_SECONDS while requests are still
+    # served, then in-flight requests get until DRAIN_TIMEOUT_SECONDS after the signal.
+    # Keep the timeout below the orchestrator's grace period (30 s on Kubernetes).
+    DRAIN_DELAY_SECONDS: float = Field(5.0, env="DRAIN_DELAY_SECONDS")
+    DRAIN_TIMEOUT_SECONDS: float = Field(25.0, env="DRAIN_TIMEOUT_SECONDS")
+
+    # Read-only edge replicas (src/edge.py) resolve redirects from the memory-mapped snapshot
+    # at SNAPSHOT_PATH (src/snapshots.py export) and the delta files written to
+    # SNAPSHOT_DELTA_DIR (src/snapshots.py deltas), looking for new ones every
+    # SNAPSHOT_REFRESH_SECONDS. They never talk to Postgres, Redis or Kafka.
+    SNAPSHOT_PATH: str = Field("data/url_mappings.snap", env="SNAPSHOT_PATH")
+    SNAPSHOT_DELTA_DIR: str = Field("data/deltas", env="SNAPSHOT_DELTA_DIR")
+    SNAPSHOT_REFRESH_SECONDS: float = Field(5.0, env="SNAPSHOT_REFRESH_SECONDS")
+
+    # Traffic capture for replay (benchmarks/replay.py): this fraction of requests (0 turns
+    # capture off) is appended to TRAFFIC_CAPTURE_PATH with method, path, status, arrival time
+    # and latency, until the file reaches TRAFFIC_CAPTURE_MAX_MB
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = Field(0.0, env="TRAFFIC_CAPTURE_SAMPLE_RATE")
+    TRAFFIC_CAPTURE_PATH: str = Field("data/traffic.capture", env="TRAFFIC_CAPTURE_PATH")
+    TRAFFIC_CAPTURE_MAX_MB: float = Field(512.0, env="TRAFFIC_CAPTURE_MAX_MB")
+
+    # Hot-key tracking on redirects: a Space-Saving summary of HOT_KEYS_CAPACITY counters
+    # (0 turns it off) whose HOT_KEYS_TOP_N busiest short codes are published every
+    # HOT_KEYS_INTERVAL_SECONDS (hot_key_requests_per_second, GET /admin/hot-keys) before the
+    # counts are halved. HOT_KEYS_PIN keeps those codes in the in-process cache.
+    HOT_KEYS_CAPACITY: int = Field(1_000, env="HOT_KEYS_CAPACITY")
+    HOT_KEYS_TOP_N: int = Field(20, env="HOT_KEYS_TOP_N")
+    HOT_KEYS_INTERVAL_SECONDS: float = Field(10.0, env="HOT_KEYS_INTERVAL_SECONDS")
+    HOT_KEYS_PIN: bool = Field(False, env="HOT_KEYS_PIN")
+
     class Config:
         env_file = ".env"
         case_sensitive = True
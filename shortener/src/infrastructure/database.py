@@ -1,94 +1,483 @@
+import asyncio
 import logging
-from typing import Optional
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from time import perf_counter
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
 
 import asyncpg
 from asyncpg import UniqueViolationError
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from domain.models import URLMapping
 from infrastructure.config import settings
+from infrastructure.metrics import db_pool_wait
+from infrastructure.partitioning import (
+    create_table_sql,
+    current_layout,
+    ensure_month_partitions,
+    ensure_partitions_for,
+    hash_partitions_sql,
+    validate_layout,
+)
+from infrastructure.sharding import DEFAULT_SHARD, HashRing, parse_shards, url_routing_key
 
 logger = logging.getLogger(__name__)
 
+# Weight of the newest sample in Database.pool_wait
+POOL_WAIT_SMOOTHING = 0.2
+
+
+def epoch(value: Optional[datetime]) -> Optional[float]:
+    """TIMESTAMP columns hold UTC wall-clock time (NOW() on a UTC server)."""
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def from_epoch(value: Optional[float]) -> Optional[datetime]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def _to_mapping(short_code: str, row) -> URLMapping:
+    return URLMapping(
+        short_code, row["long_url"], epoch(row["created_at"]), epoch(row["expires_at"])
+    )
+
+
+# Columns (and Postgres array element types) that make up a mapping when rows are
+# copied in bulk, e.g. between shards
+MAPPING_COLUMNS = (
+    ("short_code", "text"),
+    ("long_url", "text"),
+    ("created_at", "timestamp"),
+    ("expires_at", "timestamp"),
+)
+
+# expires_at holds UTC wall-clock time, whatever the server's TimeZone setting
+NOT_EXPIRED = "(expires_at IS NULL OR expires_at > (NOW() AT TIME ZONE 'UTC'))"
+
+
+# Serializes writers of one short_code where no unique index can (month partitioning)
+LOCK_SHORT_CODES = """
+SELECT pg_advisory_xact_lock(hashtextextended(code, 0))
+FROM (SELECT code FROM unnest($1::text[]) AS code ORDER BY code) AS codes;
+"""
+
+
+def record_months(records) -> Set[date]:
+    """
+    Months of the created_at of mapping tuples (ordered as MAPPING_COLUMNS); None is now.
+    """
+    now = datetime.now(timezone.utc)
+    return {(record[2] or now).date().replace(day=1) for record in records}
+
+
+async def copy_mappings(conn: asyncpg.Connection, records, layout: Optional[str] = None) -> int:
+    """
+    Insert mapping tuples (ordered as MAPPING_COLUMNS) in one statement, skipping codes
+    that already exist. Returns the number of rows inserted. layout is that of the table
+    on conn (PG_PARTITIONING if None); with month, missing partitions are created first.
+    """
+    if not records:
+        return 0
+    names = ", ".join(name for name, _ in MAPPING_COLUMNS)
+    arrays = ", ".join(f"${i}::{kind}[]" for i, (_, kind) in enumerate(MAPPING_COLUMNS, 1))
+    columns = [list(column) for column in zip(*records)]
+    # Rows of a table without the NOT NULL on created_at may carry none
+    select = "t.short_code, t.long_url, COALESCE(t.created_at, NOW()), t.expires_at"
+    if (layout or settings.PG_PARTITIONING) != "month":
+        query = f"""
+        INSERT INTO url_mappings ({names})
+        SELECT {select} FROM unnest({arrays}) AS t({names})
+        ON CONFLICT (short_code) DO NOTHING;
+        """
+        result = await conn.execute(query, *columns)
+        return int(result.rsplit(" ", 1)[-1])
+
+    await ensure_partitions_for(conn, record_months(records))
+    query = f"""
+    INSERT INTO url_mappings ({names})
+    SELECT DISTINCT ON (t.short_code) {select} FROM unnest({arrays}) AS t({names})
+    WHERE NOT EXISTS (SELECT 1 FROM url_mappings u WHERE u.short_code = t.short_code)
+    ON CONFLICT DO NOTHING;
+    """
+    async with conn.transaction():
+        await conn.execute(LOCK_SHORT_CODES, columns[0])
+        result = await conn.execute(query, *columns)
+    return int(result.rsplit(" ", 1)[-1])
+
+
+INSERT_QUERY = f"""
+INSERT INTO url_mappings (short_code, long_url, expires_at) VALUES ($1, $2, $3)
+ON CONFLICT (short_code) DO UPDATE
+    SET long_url = EXCLUDED.long_url, expires_at = EXCLUDED.expires_at, created_at = NOW()
+    WHERE NOT {NOT_EXPIRED.replace("expires_at", "url_mappings.expires_at")}
+RETURNING long_url, created_at, expires_at;
+"""
+
+# Expired rows are returned too, so callers can answer 410 Gone until they are reaped
+SELECT_MAPPING_QUERY = """
+SELECT long_url, created_at, expires_at FROM url_mappings WHERE short_code = $1;
+"""
+
+SELECT_SHORT_CODE_QUERY = (
+    f"SELECT short_code FROM url_mappings WHERE long_url = $1 AND {NOT_EXPIRED};"
+)
+
+# Same outcome as INSERT_QUERY without a unique index on short_code; callers hold the
+# short code's advisory lock. The expired row is deleted and a new one inserted, since
+# created_at (the partition key) changes.
+INSERT_UNLESS_ACTIVE_QUERY = f"""
+WITH expired AS (
+    DELETE FROM url_mappings WHERE short_code = $1 AND NOT {NOT_EXPIRED}
+)
+INSERT INTO url_mappings (short_code, long_url, expires_at)
+SELECT $1::varchar, $2::text, $3::timestamp
+WHERE NOT EXISTS (SELECT 1 FROM url_mappings WHERE short_code = $1 AND {NOT_EXPIRED})
+RETURNING long_url, created_at, expires_at;
+"""
+
+
+# Multi-row forms of INSERT_QUERY and INSERT_UNLESS_ACTIVE_QUERY for group commit. Short
+# codes must be distinct within a batch: a row may only be touched once per statement.
+INSERT_MANY_QUERY = f"""
+INSERT INTO url_mappings (short_code, long_url, expires_at)
+SELECT * FROM unnest($1::varchar[], $2::text[], $3::timestamp[])
+ON CONFLICT (short_code) DO UPDATE
+    SET long_url = EXCLUDED.long_url, expires_at = EXCLUDED.expires_at, created_at = NOW()
+    WHERE NOT {NOT_EXPIRED.replace("expires_at", "url_mappings.expires_at")}
+RETURNING short_code, long_url, created_at, expires_at;
+"""
+
+INSERT_MANY_UNLESS_ACTIVE_QUERY = f"""
+WITH input AS (
+    SELECT * FROM unnest($1::varchar[], $2::text[], $3::timestamp[])
+        AS t(short_code, long_url, expires_at)
+), expired AS (
+    DELETE FROM url_mappings u USING input i
+    WHERE u.short_code = i.short_code AND NOT {NOT_EXPIRED.replace("expires_at", "u.expires_at")}
+)
+INSERT INTO url_mappings (short_code, long_url, expires_at)
+SELECT i.short_code, i.long_url, i.expires_at FROM input i
+WHERE NOT EXISTS (
+    SELECT 1 FROM url_mappings u
+    WHERE u.short_code = i.short_code AND {NOT_EXPIRED.replace("expires_at", "u.expires_at")}
+)
+RETURNING short_code, long_url, created_at, expires_at;
+"""
+
+
+async def import_mappings(
+    conn: asyncpg.Connection, records, layout: Optional[str] = None
+) -> Tuple[List[URLMapping], List[Tuple[str, str]]]:
+    """
+    Bulk-load mapping tuples (ordered as MAPPING_COLUMNS, created_at may be None for now)
+    with COPY into a staging table, then move them over in one INSERT.
+
+    Returns the inserted mappings and the (short_code, long_url) pairs whose short code
+    is already taken by a different URL. Rows whose URL already sits under the same code
+    are neither.
+    """
+    names = [name for name, _ in MAPPING_COLUMNS]
+    columns = ", ".join(f"{name} {kind}" for name, kind in MAPPING_COLUMNS)
+    select = "s.short_code, s.long_url, COALESCE(s.created_at, NOW()), s.expires_at"
+    if (layout or settings.PG_PARTITIONING) == "month":
+        insert_query = f"""
+        INSERT INTO url_mappings ({", ".join(names)})
+        SELECT DISTINCT ON (s.short_code) {select} FROM url_mappings_import s
+        WHERE NOT EXISTS (SELECT 1 FROM url_mappings u WHERE u.short_code = s.short_code)
+        ON CONFLICT DO NOTHING
+        RETURNING short_code, long_url, created_at, expires_at;
+        """
+    else:
+        insert_query = f"""
+        INSERT INTO url_mappings ({", ".join(names)})
+        SELECT {select} FROM url_mappings_import s
+        ON CONFLICT (short_code) DO NOTHING
+        RETURNING short_code, long_url, created_at, expires_at;
+        """
+    collisions_query = """
+    SELECT DISTINCT s.short_code, s.long_url FROM url_mappings_import s
+    JOIN url_mappings u ON u.short_code = s.short_code
+    WHERE u.long_url <> s.long_url;
+    """
+    if (layout or settings.PG_PARTITIONING) == "month":
+        # Exports carry their original created_at, often in months long since passed
+        await ensure_partitions_for(conn, record_months(records))
+    async with conn.transaction():
+        await conn.execute(f"CREATE TEMP TABLE url_mappings_import ({columns}) ON COMMIT DROP;")
+        await conn.copy_records_to_table("url_mappings_import", records=records, columns=names)
+        if (layout or settings.PG_PARTITIONING) == "month":
+            await conn.execute(LOCK_SHORT_CODES, [record[0] for record in records])
+        inserted = await conn.fetch(insert_query)
+        collisions = await conn.fetch(collisions_query)
+    return (
+        [_to_mapping(row["short_code"], row) for row in inserted],
+        [(row["short_code"], row["long_url"]) for row in collisions],
+    )
+
+
+def shard_specs(raw: str) -> Dict[str, dict]:
+    """
+    Connection kwargs per shard name. An empty spec means the single shard built from PG_*.
+    """
+    shards = parse_shards(raw)
+    if not shards:
+        return {
+            DEFAULT_SHARD: {
+                "user": settings.PG_USER,
+                "password": settings.PG_PASSWORD,
+                "database": settings.PG_DATABASE,
+                "host": settings.PG_HOST,
+                "port": settings.PG_PORT,
+            }
+        }
+    return {name: {"dsn": dsn} for name, dsn in shards.items()}
+
 
 class Database:
+    """
+    url_mappings storage spread over one or more Postgres shards.
+
+    Rows live on the shard that owns their short_code on a consistent-hash ring
+    (PG_SHARDS). While a rebalance is in progress, PG_SHARDS_PREVIOUS describes the old
+    layout and lookups that miss on the new owner fall back to the old one.
+    """
+
     def __init__(self):
-        self.pool = None
+        self.pool = None  # pool of the first shard, kept for readiness checks
+        self.pools: Dict[str, asyncpg.Pool] = {}
+        self.ring: Optional[HashRing] = None
+        self.previous_ring: Optional[HashRing] = None
+        self.layout = validate_layout(settings.PG_PARTITIONING)
+        self.pool_wait = 0.0
+
+    async def connect(self):
+        """
+        Connect to every shard (current and, during a rebalance, previous layout) concurrently.
+        """
+        current = shard_specs(settings.PG_SHARDS)
+        previous = parse_shards(settings.PG_SHARDS_PREVIOUS)
+        specs = dict(current)
+        for name, dsn in previous.items():
+            if name in specs and specs[name] != {"dsn": dsn}:
+                raise ValueError(f"Shard {name!r} has different DSNs in PG_SHARDS_PREVIOUS")
+            specs.setdefault(name, {"dsn": dsn})
+
+        try:
+            await asyncio.gather(
+                *(self._connect_shard(name, spec) for name, spec in specs.items())
+            )
+        except asyncpg.PostgresError as e:
+            # If we reach here, it might be a non-transient error or retried out
+            logger.error("Failed to connect to Postgres after retries: %s", e)
+            raise
+
+        self.ring = HashRing(current, settings.PG_SHARD_VNODES)
+        self.previous_ring = HashRing(previous, settings.PG_SHARD_VNODES) if previous else None
+        self.pool = self.pools[self.ring.shard_names[0]]
+        logger.info(
+            "Connected to %d PostgreSQL shard(s): %s%s",
+            len(self.ring),
+            ", ".join(self.ring.shard_names),
+            " (rebalancing)" if self.previous_ring else "",
+        )
 
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type(asyncpg.InterfaceError),
     )
-    async def connect(self):
+    async def _connect_shard(self, name: str, spec: dict):
         """
-        Attempt to connect to Postgres with retries on transient errors.
+        Attempt to connect to one shard with retries on transient errors.
         """
+        pool = await asyncpg.create_pool(min_size=1, max_size=5, **spec)
+        logger.debug("PostgreSQL pool created for shard %s, proceeding to init_db.", name)
         try:
-            self.pool = await asyncpg.create_pool(
-                user=settings.PG_USER,
-                password=settings.PG_PASSWORD,
-                database=settings.PG_DATABASE,
-                host=settings.PG_HOST,
-                port=settings.PG_PORT,
-                min_size=1,
-                max_size=5,
-            )
-            logger.debug("PostgreSQL pool created, proceeding to init_db.")
-            await self.init_db()
+            await self.init_db(pool)
 
             # Optionally, run a quick test query to ensure DB is ready
-            async with self.pool.acquire() as conn:
+            async with pool.acquire() as conn:
                 await conn.fetchval("SELECT 1")
-            logger.info("Connected to PostgreSQL and verified connection.")
-        except asyncpg.PostgresError as e:
-            # If we reach here, it might be a non-transient error or retried out
-            logger.error("Failed to connect to Postgres after retries: %s", e)
+        except Exception:
+            await pool.close()
             raise
+        self.pools[name] = pool
+        logger.info("Connected to PostgreSQL shard %s and verified connection.", name)
 
-    async def init_db(self):
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS url_mappings (
-            id SERIAL PRIMARY KEY,
-            short_code VARCHAR(20) UNIQUE NOT NULL,
-            long_url TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT NOW()
-        );
+    async def init_db(self, pool: Optional[asyncpg.Pool] = None, layout: Optional[str] = None):
+        """
+        Create url_mappings in the configured layout (see infrastructure.partitioning).
+
+        An existing table is never converted; if its layout differs a warning is logged
+        and it is used as is.
+        """
+        layout = validate_layout(layout or self.layout)
+        # Tables created before link expiry existed; adding a NULL column is metadata-only,
+        # and the partial index starts out empty because no existing row has an expiry.
+        migrate_query = """
+        ALTER TABLE url_mappings ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP;
+        CREATE INDEX IF NOT EXISTS idx_url_mappings_expires_at
+            ON url_mappings (expires_at) WHERE expires_at IS NOT NULL;
         """
         logger.debug("Initializing database schema if not present.")
-        async with self.pool.acquire() as conn:
-            await conn.execute(create_table_query)
-            logger.info("Database schema ensured (url_mappings table present).")
+        async with (pool or self.pool).acquire() as conn:
+            existing = await current_layout(conn)
+            if existing is not None and existing != layout:
+                logger.warning(
+                    "url_mappings already exists with layout %s, not %s; leaving it as is.",
+                    existing,
+                    layout,
+                )
+                layout = existing
+            await conn.execute(create_table_sql(layout))
+            if layout == "hash":
+                for statement in hash_partitions_sql(settings.PG_HASH_PARTITIONS):
+                    await conn.execute(statement)
+            elif layout == "month":
+                await self._ensure_months_ahead(conn)
+            await conn.execute(migrate_query)
+            logger.info("Database schema ensured (url_mappings table present, %s layout).", layout)
+
+    @staticmethod
+    async def _ensure_months_ahead(conn: asyncpg.Connection) -> List[str]:
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        return await ensure_month_partitions(
+            conn, this_month, settings.PG_PARTITION_MONTHS_AHEAD + 1
+        )
+
+    async def ensure_month_partitions(self) -> List[str]:
+        """
+        Keep PG_PARTITION_MONTHS_AHEAD month partitions ahead of the clock on every shard
+        whose url_mappings is month-partitioned. Run every PG_PARTITION_CHECK_SECONDS by
+        application.partition_keeper, so a long-lived replica does not depend on the
+        partitions.py cron. Returns the partitions checked.
+        """
+        checked = []
+        for pool in self.pools.values():
+            async with pool.acquire() as conn:
+                if await current_layout(conn) == "month":
+                    checked.extend(await self._ensure_months_ahead(conn))
+        return checked
+
+    @asynccontextmanager
+    async def acquire(self, pool: asyncpg.Pool):
+        """
+        pool.acquire() that records how long the caller waited for a connection.
+
+        pool_wait keeps a moving average, which load shedding compares to a threshold.
+        """
+        start = perf_counter()
+        async with pool.acquire() as conn:
+            wait = perf_counter() - start
+            db_pool_wait.observe(wait)
+            self.pool_wait += (wait - self.pool_wait) * POOL_WAIT_SMOOTHING
+            yield conn
+
+    async def probe(self) -> dict:
+        """
+        SELECT 1 through every shard's pool (connection wait included); raises if any fails.
+        """
+        if not self.pools:
+            raise RuntimeError("not connected")
+
+        async def check(pool: asyncpg.Pool):
+            async with pool.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+
+        pools = list(self.pools.values())
+        await asyncio.gather(*(check(pool) for pool in pools))
+        return {
+            "shards": len(pools),
+            "pool_size": sum(pool.get_size() for pool in pools),
+            "pool_idle": sum(pool.get_idle_size() for pool in pools),
+            "pool_wait_ms": round(self.pool_wait * 1000, 3),
+        }
+
+    async def warm_statements(self) -> int:
+        """
+        Run the lookup queries once (with a key that matches nothing) on every connection the
+        pool has open, so asyncpg's per-connection statement cache already holds them when
+        traffic arrives. Returns the number of connections warmed.
+
+        The pool hands back the most recently released connection, so reaching each one
+        means holding the earlier ones; the pool is not grown to do it. Connections are
+        released as soon as all are warmed, and whatever was taken is released if the
+        warm-up times out or is cancelled midway.
+        """
+        warmed = 0
+        for pool in self.pools.values():
+            conns = []
+            try:
+                for _ in range(pool.get_size()):
+                    conn = await pool.acquire()
+                    conns.append(conn)
+                    await conn.fetchrow(SELECT_MAPPING_QUERY, "")
+                    await conn.fetchrow(SELECT_SHORT_CODE_QUERY, "")
+                    warmed += 1
+            finally:
+                for conn in conns:
+                    await pool.release(conn)
+        return warmed
+
+    def shard_for_short_code(self, short_code: str) -> str:
+        return self.ring.shard_for(short_code)
+
+    def _pool_for_short_code(self, short_code: str) -> asyncpg.Pool:
+        return self.pools[self.ring.shard_for(short_code)]
+
+    def _previous_pool_for_short_code(self, short_code: str) -> Optional[asyncpg.Pool]:
+        """Old owner of short_code while rebalancing, if it differs from the new one."""
+        if self.previous_ring is None:
+            return None
+        previous = self.previous_ring.shard_for(short_code)
+        if previous == self.ring.shard_for(short_code):
+            return None
+        return self.pools[previous]
 
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
         retry=retry_if_exception_type(asyncpg.InterfaceError),
     )
-    async def insert_url_mapping(self, short_code: str, long_url: str) -> None:
+    async def insert_url_mapping(
+        self, short_code: str, long_url: str, expires_at: Optional[float] = None
+    ) -> Optional[URLMapping]:
         """
         Insert a new URL mapping. On UniqueViolationError (not transient), do not retry.
         On other transient interface errors, retry a few times.
-        """
-        insert_query = """
-        INSERT INTO url_mappings (short_code, long_url) VALUES ($1, $2)
-        ON CONFLICT DO NOTHING;
+
+        An expired row holding the same short_code is taken over (reissued) in place.
+        Returns the inserted mapping, or None if an active short_code already existed.
         """
         logger.debug("Attempting to insert short_code=%s, long_url=%s", short_code, long_url)
-        async with self.pool.acquire() as conn:
+        async with self.acquire(self._pool_for_short_code(short_code)) as conn:
             try:
-                result = await conn.execute(insert_query, short_code, long_url)
-                # result typically "INSERT 0 1" or "INSERT 0 0"
-                if result.endswith("0 1"):
+                args = (short_code, long_url, from_epoch(expires_at))
+                if self.layout == "month":
+                    async with conn.transaction():
+                        await conn.execute(LOCK_SHORT_CODES, [short_code])
+                        row = await conn.fetchrow(INSERT_UNLESS_ACTIVE_QUERY, *args)
+                else:
+                    row = await conn.fetchrow(INSERT_QUERY, *args)
+                # No row comes back when the conflict clause skipped the insert
+                if row is not None:
                     logger.info(
                         "Inserted new mapping short_code=%s long_url=%s",
                         short_code,
                         long_url,
                     )
-                else:
-                    logger.info("No insert performed, short_code=%s already exists.", short_code)
+                    return _to_mapping(short_code, row)
+                logger.info("No insert performed, short_code=%s already exists.", short_code)
+                return None
             except UniqueViolationError:
                 # This is expected if the short_code already exists
                 logger.info("Short code %s already exists, no insert needed.", short_code)
+                return None
             except asyncpg.PostgresError as e:
                 # Possibly transient if interface related, else permanent
                 logger.warning(
@@ -99,33 +488,184 @@ class Database:
                 )
                 raise  # trigger tenacity retry
 
-    async def get_long_url(self, short_code: str) -> Optional[str]:
+    async def insert_url_mappings(
+        self, records: Sequence[Tuple[str, str, Optional[float]]]
+    ) -> List[Optional[URLMapping]]:
+        """
+        Insert (short_code, long_url, expires_at) records with one statement per shard,
+        each with the same outcome as insert_url_mapping: the inserted mapping, or None if
+        an active short_code already existed (including an earlier record of the batch).
+        Results are in input order.
+        """
+        by_shard: Dict[str, Dict[str, Tuple[str, str, Optional[float]]]] = {}
+        for record in records:
+            # A repeated code in one batch would be touched twice by one statement; the
+            # later copies lose, as they would have if inserted one after another.
+            by_shard.setdefault(self.shard_for_short_code(record[0]), {}).setdefault(
+                record[0], record
+            )
+        inserted: Dict[str, URLMapping] = {}
+        shard_results = await asyncio.gather(
+            *(
+                self._insert_many(self.pools[shard], list(batch.values()))
+                for shard, batch in by_shard.items()
+            )
+        )
+        for mappings in shard_results:
+            inserted.update((mapping.short_code, mapping) for mapping in mappings)
+
+        results = []
+        for short_code, long_url, _ in records:
+            mapping = inserted.get(short_code)
+            # Only the record whose URL was written gets the row
+            results.append(mapping if mapping and mapping.long_url == long_url else None)
+            if mapping is not None:
+                del inserted[short_code]
+        return results
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=10),
+        retry=retry_if_exception_type(asyncpg.InterfaceError),
+    )
+    async def _insert_many(
+        self, pool: asyncpg.Pool, records: List[Tuple[str, str, Optional[float]]]
+    ) -> List[URLMapping]:
+        codes = [record[0] for record in records]
+        args = (
+            codes,
+            [record[1] for record in records],
+            [from_epoch(record[2]) for record in records],
+        )
+        async with self.acquire(pool) as conn:
+            try:
+                if self.layout == "month":
+                    async with conn.transaction():
+                        await conn.execute(LOCK_SHORT_CODES, codes)
+                        rows = await conn.fetch(INSERT_MANY_UNLESS_ACTIVE_QUERY, *args)
+                else:
+                    rows = await conn.fetch(INSERT_MANY_QUERY, *args)
+            except UniqueViolationError:
+                # Only a racing writer outside this process can cause it; settle the batch
+                # row by row rather than failing all of it
+                rows = None
+        if rows is None:
+            mappings = []
+            for short_code, long_url, expires_at in records:
+                mapping = await self.insert_url_mapping(short_code, long_url, expires_at)
+                if mapping is not None:
+                    mappings.append(mapping)
+            return mappings
+        logger.info("Inserted %d of %d new mappings in one batch", len(rows), len(records))
+        return [_to_mapping(row["short_code"], row) for row in rows]
+
+    async def get_mapping(self, short_code: str) -> Optional[URLMapping]:
         logger.debug("Fetching long_url for short_code=%s", short_code)
-        select_query = "SELECT long_url FROM url_mappings WHERE short_code = $1;"
-        async with self.pool.acquire() as conn:
-            result = await conn.fetchrow(select_query, short_code)
-            if result:
-                logger.debug("Found long_url for short_code=%s", short_code)
-                return result["long_url"]
+        mapping = await self._fetch_mapping(self._pool_for_short_code(short_code), short_code)
+        if mapping is None:
+            previous_pool = self._previous_pool_for_short_code(short_code)
+            if previous_pool is not None:
+                mapping = await self._fetch_mapping(previous_pool, short_code)
+        if mapping:
+            logger.debug("Found long_url for short_code=%s", short_code)
+        else:
             logger.debug("No long_url found for short_code=%s", short_code)
-            return None
+        return mapping
+
+    async def _fetch_mapping(self, pool: asyncpg.Pool, short_code: str) -> Optional[URLMapping]:
+        async with self.acquire(pool) as conn:
+            result = await conn.fetchrow(SELECT_MAPPING_QUERY, short_code)
+            return _to_mapping(short_code, result) if result else None
 
     async def get_short_code_by_long_url(self, long_url: str) -> Optional[str]:
+        """
+        Look on the shard the URL digest routes to first, then fan out to the others.
+        """
         logger.debug("Fetching short_code for long_url=%s", long_url)
-        query = "SELECT short_code FROM url_mappings WHERE long_url = $1;"
-        async with self.pool.acquire() as conn:
-            result = await conn.fetchrow(query, long_url)
-            if result:
-                logger.debug("Found short_code for long_url=%s", long_url)
-                return result["short_code"]
+        home = self.ring.shard_for(url_routing_key(long_url))
+        short_code = await self._fetch_short_code(self.pools[home], long_url)
+        if short_code is None and len(self.pools) > 1:
+            results = await asyncio.gather(
+                *(
+                    self._fetch_short_code(pool, long_url)
+                    for name, pool in self.pools.items()
+                    if name != home
+                )
+            )
+            short_code = next((code for code in results if code), None)
+        if short_code:
+            logger.debug("Found short_code for long_url=%s", long_url)
+        else:
             logger.debug("No short_code found for long_url=%s", long_url)
-            return None
+        return short_code
+
+    async def _fetch_short_code(self, pool: asyncpg.Pool, long_url: str) -> Optional[str]:
+        async with self.acquire(pool) as conn:
+            result = await conn.fetchrow(SELECT_SHORT_CODE_QUERY, long_url)
+            return result["short_code"] if result else None
+
+    async def delete_expired(self, batch_size: int, max_batches: int) -> List[URLMapping]:
+        """
+        Delete expired rows from every shard in short batches.
+
+        Each batch is its own statement over at most batch_size rows found through the
+        partial expires_at index; SKIP LOCKED keeps it from queuing behind live writers.
+        """
+        delete_query = f"""
+        DELETE FROM url_mappings WHERE short_code IN (
+            SELECT short_code FROM url_mappings
+            WHERE expires_at IS NOT NULL AND NOT {NOT_EXPIRED}
+            ORDER BY expires_at
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING short_code, long_url, created_at, expires_at;
+        """
+        deleted: List[URLMapping] = []
+        for name, pool in self.pools.items():
+            for _ in range(max_batches):
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch(delete_query, batch_size)
+                deleted.extend(_to_mapping(row["short_code"], row) for row in rows)
+                if len(rows) < batch_size:
+                    break
+            logger.debug(
+                "Reaped expired mappings on shard %s, total so far %d", name, len(deleted)
+            )
+        return deleted
+
+    async def iter_mappings(
+        self, batch_size: int = 10_000, include_expired: bool = False
+    ) -> AsyncIterator[List[URLMapping]]:
+        """
+        Yield active mappings (with include_expired, every row the reaper has not deleted
+        yet) from every shard in short_code order, batch by batch.
+
+        Uses keyset pagination rather than one long-lived cursor, so a full scan never
+        holds a snapshot open for its whole duration.
+        """
+        active = "" if include_expired else f"AND {NOT_EXPIRED}"
+        query = f"""
+        SELECT short_code, long_url, created_at, expires_at FROM url_mappings
+        WHERE short_code > $1 {active}
+        ORDER BY short_code LIMIT $2;
+        """
+        for pool in list(self.pools.values()):
+            after = ""
+            while True:
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch(query, after, batch_size)
+                if not rows:
+                    break
+                after = rows[-1]["short_code"]
+                yield [_to_mapping(row["short_code"], row) for row in rows]
 
     async def close(self):
-        if self.pool:
-            logger.debug("Closing PostgreSQL pool.")
-            await self.pool.close()
-            logger.info("PostgreSQL pool closed.")
+        if self.pools:
+            logger.debug("Closing PostgreSQL pools.")
+            await asyncio.gather(*(pool.close() for pool in self.pools.values()))
+            self.pools = {}
+            logger.info("PostgreSQL pools closed.")
 
 
 database = Database()
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import pybreaker
+
+from infrastructure.config import settings
+from infrastructure.metrics import dependency_probe_latency, dependency_status
+
+logger = logging.getLogger(__name__)
+
+STATUS_VALUES = {"ok": 1.0, "slow": 0.5, "down": 0.0}
+
+
+class HealthMonitor:
+    """
+    Probes each dependency every HEALTH_PROBE_INTERVAL_SECONDS and keeps the last results,
+    so /ready and /health answer from memory instead of touching the dependencies per call.
+
+    A dependency is "down" if its probe fails, times out or one of its circuit breakers is
+    open, "slow" if the probe took longer than its threshold, else "ok".
+    """
+
+    def __init__(
+        self,
+        probes: Dict[str, Callable[[], Awaitable[dict]]],
+        thresholds: Dict[str, float],
+        breakers: Optional[Dict[str, Iterable[pybreaker.CircuitBreaker]]] = None,
+        critical: Iterable[str] = (),
+        interval: float = settings.HEALTH_PROBE_INTERVAL_SECONDS,
+        timeout: float = settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    ):
+        self.probes = probes
+        self.thresholds = thresholds
+        self.breakers = {name: list(group) for name, group in (breakers or {}).items()}
+        self.critical = [name for name in critical if name in probes]
+        self.interval = interval
+        self.timeout = timeout
+        self.results: Dict[str, dict] = {}
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._status_gauges = {name: dependency_status.labels(name) for name in probes}
+        self._latency_gauges = {name: dependency_probe_latency.labels(name) for name in probes}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.exception({"action": "health_probe", "status": "error", "error": str(e)})
+            await asyncio.sleep(self.interval)
+
+    async def probe_once(self):
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._probe(name) for name in names))
+        self.results = dict(zip(names, results))
+        self.checked_at = time.monotonic()
+
+    async def _probe(self, name: str) -> dict:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(self.probes[name](), self.timeout)
+        except Exception as e:
+            result = {"status": "down", "error": str(e) or type(e).__name__}
+        else:
+            latency = time.perf_counter() - start
+            self._latency_gauges[name].set(latency)
+            slow = latency > self.thresholds.get(name, float("inf"))
+            result = {
+                "status": "slow" if slow else "ok",
+                "latency_ms": round(latency * 1000, 3),
+                **detail,
+            }
+
+        breakers = {
+            breaker.name: breaker.current_state
+            for breaker in self.breakers.get(name, ())
+            if breaker.current_state != pybreaker.STATE_CLOSED
+        }
+        if breakers:
+            result["breakers"] = breakers
+            if pybreaker.STATE_OPEN in breakers.values():
+                result["status"] = "down"
+
+        if result["status"] != self.results.get(name, {}).get("status", "ok"):
+            logger.warning({"action": "health_probe", "dependency": name, **result})
+        self._status_gauges[name].set(STATUS_VALUES[result["status"]])
+        return result
+
+    def stalled(self) -> bool:
+        """True if probing was started but has not completed a round for a while."""
+        if self._task is None or self.checked_at is None:
+            return False
+        return time.monotonic() - self.checked_at > 3 * self.interval + self.timeout
+
+    def failing(self) -> List[str]:
+        """Reasons this replica should not receive traffic, e.g. "postgres_slow"."""
+        if self.checked_at is None:
+            return ["not_probed"]
+        if self.stalled():
+            return ["probes_stalled"]
+        return [
+            f"{name}_{self.results[name]['status']}"
+            for name in self.critical
+            if self.results[name]["status"] != "ok"
+        ]
+
+    def report(self) -> dict:
+        return {
+            "checked_seconds_ago": (
+                round(time.monotonic() - self.checked_at, 3) if self.checked_at else None
+            ),
+            "dependencies": self.results,
+        }
@@ -0,0 +1,103 @@
+import heapq
+from operator import itemgetter
+from typing import Dict, List, NamedTuple, Set
+
+from infrastructure.config import settings
+
+
+class HotKey(NamedTuple):
+    short_code: str
+    # Upper bound on the requests seen; count - error is a lower bound
+    count: int
+    error: int
+
+
+class HotKeyTracker:
+    """
+    Space-Saving summary of the most requested short codes in at most `capacity` counters.
+
+    A code already tracked gets its counter incremented; a new one takes over the counter
+    of a least counted code (or a free one) and inherits its count as the error. Counters
+    are grouped in buckets by count and the smallest count is tracked, so every add() is
+    O(1) whatever the capacity. Any code requested more than total / capacity times is
+    guaranteed to be tracked. decay() halves every count so the summary follows shifts in
+    traffic instead of accumulating forever. Not thread-safe: it is only touched from the
+    event loop.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[str, int] = {}
+        # Only for codes that replaced another; absent means 0
+        self._errors: Dict[str, int] = {}
+        self._buckets: Dict[int, Set[str]] = {}
+        self._min = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def add(self, short_code: str) -> None:
+        self.total += 1
+        counts = self._counts
+        buckets = self._buckets
+        count = counts.get(short_code)
+        if count is not None:
+            bucket = buckets[count]
+            bucket.remove(short_code)
+        elif len(counts) < self.capacity:
+            count = 0
+            bucket = None
+            self._min = 1
+        else:
+            count = self._min
+            bucket = buckets[count]
+            evicted = bucket.pop()
+            del counts[evicted]
+            self._errors.pop(evicted, None)
+            self._errors[short_code] = count
+        if bucket is not None and not bucket:
+            del buckets[count]
+            if count == self._min:
+                self._min = count + 1
+        count += 1
+        counts[short_code] = count
+        bucket = buckets.get(count)
+        if bucket is None:
+            buckets[count] = {short_code}
+        else:
+            bucket.add(short_code)
+
+    def top(self, n: int) -> List[HotKey]:
+        errors = self._errors
+        return [
+            HotKey(short_code, count, errors.get(short_code, 0))
+            for short_code, count in heapq.nlargest(n, self._counts.items(), key=itemgetter(1))
+        ]
+
+    def decay(self) -> None:
+        """
+        Halve every count (and error); codes that drop to zero free their counter.
+        """
+        counts: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+        buckets: Dict[int, Set[str]] = {}
+        for short_code, count in self._counts.items():
+            count >>= 1
+            if not count:
+                continue
+            counts[short_code] = count
+            buckets.setdefault(count, set()).add(short_code)
+            error = self._errors.get(short_code, 0) >> 1
+            if error:
+                errors[short_code] = error
+        self._counts, self._errors, self._buckets = counts, errors, buckets
+        self._min = min(buckets) if buckets else 0
+        self.total >>= 1
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+hot_keys = HotKeyTracker(settings.HOT_KEYS_CAPACITY)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+from domain.models import URLMapping
+from infrastructure.metrics import db_insert_batch_size
+
+logger = logging.getLogger(__name__)
+
+
+class InsertBatcher:
+    """
+    Group commit for new mappings: inserts go to the database as one multi-row statement
+    per shard, and each caller gets its own row's outcome, as from
+    Database.insert_url_mapping.
+
+    While fewer than max_in_flight batches are being written an insert is sent at once, so
+    a lightly loaded service pays no delay. Otherwise inserts queue until a batch completes,
+    max_wait seconds pass or max_rows are queued, whichever comes first, and go out
+    together. Under a burst the batches grow with the number of concurrent callers instead
+    of callers queuing for pooled connections. Not thread-safe: it is only touched from the
+    event loop.
+    """
+
+    def __init__(self, database, max_rows: int, max_wait: float, max_in_flight: int = 1):
+        self.database = database
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self._pending: List[Tuple[str, str, Optional[float], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._in_flight = 0
+
+    async def insert(
+        self, short_code: str, long_url: str, expires_at: Optional[float] = None
+    ) -> Optional[URLMapping]:
+        """
+        Queue one insert and wait for its batch; raises what the batch's statement raised.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((short_code, long_url, expires_at, future))
+        if len(self._pending) >= self.max_rows or self._in_flight < self.max_in_flight:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._in_flight += 1
+            # Keep a reference so the task is not garbage-collected mid-flight
+            task = asyncio.create_task(self._write(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: List[Tuple[str, str, Optional[float], asyncio.Future]]):
+        db_insert_batch_size.observe(len(batch))
+        try:
+            await self._write_batch(batch)
+        finally:
+            self._in_flight -= 1
+            # What queued up meanwhile goes out now rather than when its timer fires
+            if self._pending and self._in_flight < self.max_in_flight:
+                self._flush()
+
+    async def _write_batch(self, batch: List[Tuple[str, str, Optional[float], asyncio.Future]]):
+        try:
+            results = await self.database.insert_url_mappings(
+                [
+                    (short_code, long_url, expires_at)
+                    for short_code, long_url, expires_at, _ in batch
+                ]
+            )
+        except Exception as e:
+            logger.warning(
+                {"action": "insert_batch", "status": "failed", "rows": len(batch), "error": str(e)}
+            )
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (*_, future), mapping in zip(batch, results):
+            # The caller may have been cancelled (e.g. client went away) meanwhile
+            if not future.done():
+                future.set_result(mapping)
+
+    async def close(self):
+        """
+        Send whatever is queued and wait for batches in flight.
+        """
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
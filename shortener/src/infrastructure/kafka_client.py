@@ -2,12 +2,15 @@ import asyncio
 import logging
 import random
 import time
+from typing import Iterable, Optional, Tuple
 
 import pybreaker
 from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
 
 from infrastructure.config import settings
 from infrastructure.metrics import (
+    kafka_consume_lag,
+    kafka_consumed,
     kafka_produce_failure,
     kafka_produce_latency,
     kafka_produce_success,
@@ -26,7 +29,10 @@ class KafkaClient:
         self.consumer = None
         self.producer_connected = False
         self.consumer_connected = False
+        self.group_id: Optional[str] = None
         self._closing = False
+        self._stop_consuming = False
+        self._in_batch = False
 
     async def connect_producer(self):
         max_retries = 5
@@ -79,7 +85,17 @@ class KafkaClient:
                     logger.error({"action": "connect_producer", "status": "failed_all_retries"})
                     raise
 
-    async def connect_consumer(self, topic: str, group_id: str = "url_shortener_group"):
+    async def connect_consumer(
+        self,
+        topic: str,
+        group_id: Optional[str] = "url_shortener_group",
+        auto_offset_reset: str = "earliest",
+    ):
+        """
+        Subscribe to topic. With group_id None the consumer joins no group: it is assigned
+        every partition (including ones added later), starts at auto_offset_reset and
+        commits nothing, so it leaves no offsets behind in Kafka.
+        """
         max_retries = 5
         for attempt in range(1, max_retries + 1):
             if self._closing:
@@ -90,11 +106,12 @@ class KafkaClient:
                     topic,
                     bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
                     group_id=group_id,
-                    auto_offset_reset="earliest",
-                    enable_auto_commit=True,
+                    auto_offset_reset=auto_offset_reset,
+                    enable_auto_commit=group_id is not None,
                 )
                 await self.consumer.start()
                 self.consumer_connected = True
+                self.group_id = group_id
                 logger.info(
                     {
                         "action": "connect_consumer",
@@ -137,17 +154,40 @@ class KafkaClient:
                     raise
 
     @kafka_producer_breaker
-    async def _produce_with_breaker(self, topic: str, message: bytes):
+    async def _produce_with_breaker(self, topic: str, message: bytes, key: Optional[bytes]):
         if not self.producer or not self.producer_connected:
             await self.connect_producer()
-        start_time = time.time()
-        await self.producer.send_and_wait(topic, message)
-        elapsed = time.time() - start_time
-        kafka_produce_latency.observe(elapsed)
+        start_time = time.perf_counter()
+        await self.producer.send_and_wait(topic, message, key=key)
+        kafka_produce_latency.observe(time.perf_counter() - start_time)
         kafka_produce_success.inc()
         logger.debug({"action": "produce_message", "topic": topic, "status": "produced"})
 
-    async def produce(self, topic: str, message: bytes):
+    @kafka_producer_breaker
+    async def produce_many(self, topic: str, messages: Iterable[Tuple[Optional[bytes], bytes]]):
+        """
+        Hand a batch of (key, message) pairs to the producer at once and wait for all of
+        them, letting aiokafka pack them into as few requests as it can.
+        """
+        if not self.producer or not self.producer_connected:
+            await self.connect_producer()
+        start_time = time.perf_counter()
+        futures = [await self.producer.send(topic, message, key=key) for key, message in messages]
+        try:
+            await asyncio.gather(*futures)
+        except Exception:
+            kafka_produce_failure.inc(len(futures))
+            raise
+        kafka_produce_latency.observe(time.perf_counter() - start_time)
+        kafka_produce_success.inc(len(futures))
+        logger.debug(
+            {"action": "produce_many", "topic": topic, "count": len(futures), "status": "produced"}
+        )
+
+    async def produce(self, topic: str, message: bytes, key: Optional[bytes] = None):
+        """
+        Produce one message; messages with the same key go to the same partition, in order.
+        """
         if self._closing:
             logger.warning(
                 {
@@ -158,7 +198,7 @@ class KafkaClient:
             )
             return
         try:
-            await self._produce_with_breaker(topic, message)
+            await self._produce_with_breaker(topic, message, key)
         except pybreaker.CircuitBreakerError:
             logger.warning({"action": "produce_message", "topic": topic, "status": "circuit_open"})
             kafka_produce_failure.inc()
@@ -192,6 +232,74 @@ class KafkaClient:
         except Exception as e:
             logger.exception({"action": "consume_forever", "status": "error", "error": str(e)})
 
+    async def consume_batches(self, callback, max_records: int, wait_ms: int):
+        """
+        Like consume_forever, but hands callback a list of up to max_records message values
+        at a time: whatever has arrived, or what arrives within wait_ms once the consumer
+        would otherwise block.
+        """
+        if not self.consumer or not self.consumer_connected:
+            logger.warning({"action": "consume_batches", "status": "no_consumer"})
+            return
+        try:
+            while not self._closing and not self._stop_consuming:
+                # Blocks until at least one message is available
+                first = await self.consumer.getone()
+                # From here on stop_consuming lets the batch finish instead of cancelling
+                self._in_batch = True
+                batch = [first]
+                if max_records > 1:
+                    more = await self.consumer.getmany(
+                        timeout_ms=wait_ms, max_records=max_records - 1
+                    )
+                    for messages in more.values():
+                        batch.extend(messages)
+                now_ms = time.time() * 1000
+                for msg in batch:
+                    kafka_consume_lag.observe(max(0.0, now_ms - msg.timestamp) / 1000)
+                kafka_consumed.inc(len(batch))
+                await callback([msg.value for msg in batch])
+                self._in_batch = False
+            logger.info({"action": "consume_batches", "status": "shutting_down"})
+        except asyncio.CancelledError:
+            logger.info({"action": "consume_batches", "status": "cancelled"})
+        except Exception as e:
+            logger.exception({"action": "consume_batches", "status": "error", "error": str(e)})
+
+    async def stop_consuming(self, task: asyncio.Task):
+        """
+        End the consume_batches task: at once if it is waiting for messages, else after the
+        batch in hand, so no message is taken without being processed. Then commit the
+        offsets reached, if the consumer is in a group.
+        """
+        self._stop_consuming = True
+        if not self._in_batch:
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        if self.consumer and self.consumer_connected and self.group_id is not None:
+            await self.consumer.commit()
+            logger.info({"action": "stop_consuming", "status": "committed"})
+
+    async def flush(self):
+        """
+        Wait until every message handed to the producer has been sent.
+        """
+        if self.producer and self.producer_connected:
+            await self.producer.flush()
+            logger.info({"action": "flush_producer", "status": "flushed"})
+
+    async def probe(self) -> dict:
+        """
+        One metadata round trip to the cluster; raises if the producer is not connected.
+        """
+        if not self.producer or not self.producer_connected:
+            raise RuntimeError("producer not connected")
+        metadata = await self.producer.client.fetch_all_metadata()
+        return {
+            "brokers": len(metadata.brokers()),
+            "consumer_connected": self.consumer_connected,
+        }
+
     async def close(self):
         self._closing = True
         if self.producer and self.producer_connected:
@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, Optional
+
+from domain.models import URLMapping
+from infrastructure.config import settings
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache for short_code -> URLMapping lookups.
+
+    Sits in front of Redis so the hottest redirects never leave the process. Pinned codes
+    are skipped by LRU eviction (they still expire and can be deleted), so a burst of
+    one-off lookups cannot push them out. Not thread-safe: it is only touched from the
+    event loop.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.pinned: FrozenSet[str] = frozenset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, short_code: str) -> Optional[URLMapping]:
+        entry = self._entries.get(short_code)
+        if entry is None:
+            return None
+        mapping, stale_at = entry
+        if stale_at < time.monotonic():
+            del self._entries[short_code]
+            return None
+        self._entries.move_to_end(short_code)
+        return mapping
+
+    def set(self, short_code: str, mapping: URLMapping) -> None:
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if mapping.expires_at is not None:
+            # Never outlive the link itself
+            ttl = min(ttl, mapping.expires_at - time.time())
+        self._entries[short_code] = (mapping, time.monotonic() + ttl)
+        self._entries.move_to_end(short_code)
+        if len(self._entries) > self.max_size:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = self._entries
+        # Pinned entries met on the way go back to the recent end
+        for _ in range(len(self.pinned) + 1):
+            short_code, entry = entries.popitem(last=False)
+            if short_code not in self.pinned:
+                return
+            entries[short_code] = entry
+
+    def pin(self, short_codes: Iterable[str]) -> None:
+        """
+        Replace the pinned set; at most half the cache can be pinned.
+        """
+        self.pinned = frozenset(list(short_codes)[: self.max_size // 2])
+
+    def delete(self, short_codes: Iterable[str]) -> None:
+        for short_code in short_codes:
+            self._entries.pop(short_code, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+local_cache = LocalCache(settings.LOCAL_CACHE_SIZE, settings.LOCAL_CACHE_TTL_SECONDS)
@@ -1,16 +1,143 @@
 import logging
 
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from infrastructure.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+def parse_buckets(raw: str) -> tuple:
+    """
+    Parse a comma-separated list of bucket boundaries (seconds) into a sorted tuple.
+    """
+    return tuple(sorted(float(b) for b in raw.split(",") if b.strip()))
+
+
+LATENCY_BUCKETS = parse_buckets(settings.LATENCY_BUCKETS)
+
 # Existing metrics from your code
 url_created = Counter("url_shortener_created_total", "Number of URLs shortened")
 url_lookup_latency = Histogram(
-    "url_lookup_latency_seconds", "Time to lookup long URL by short code"
+    "url_lookup_latency_seconds",
+    "End-to-end time to lookup long URL by short code",
+    buckets=LATENCY_BUCKETS,
+)
+url_shorten_latency = Histogram(
+    "url_shorten_latency_seconds",
+    "End-to-end time to shorten a URL, including event publishing",
+    buckets=LATENCY_BUCKETS,
+)
+
+# Link expiry
+url_expired_deleted = Counter(
+    "url_expired_deleted_total", "Expired URL mappings deleted by the background reaper"
+)
+bloom_stale_entries = Gauge(
+    "bloom_stale_entries", "Bloom filter entries for links deleted since the last rebuild"
 )
 
-# New Kafka metrics
+# Bloom filter state, read at scrape time
+bloom_items = Gauge("bloom_items", "URLs added to the bloom filter")
+bloom_memory = Gauge("bloom_memory_bytes", "Memory held by the bloom filter's bit arrays")
+bloom_fill_ratio = Gauge("bloom_fill_ratio", "Share of bloom filter bits set, over all slices")
+bloom_false_positive_rate = Gauge(
+    "bloom_estimated_false_positive_rate",
+    "False-positive rate estimated from the bloom filter's current fill",
+)
+
+# Short-code filter
+short_code_filter_rejections = Counter(
+    "short_code_filter_rejections_total",
+    "Lookups answered not found by the short-code filter without touching any cache tier",
+)
+short_code_filter_memory = Gauge(
+    "short_code_filter_memory_bytes", "Memory held by the short-code filter table"
+)
+short_code_filter_items = Gauge("short_code_filter_items", "Fingerprints in the short-code filter")
+
+# Start-up
+startup_phase_seconds = Gauge(
+    "startup_phase_seconds",
+    "Seconds spent in each start-up phase (imports, connect, warm-up steps, total)",
+    ["phase"],
+)
+
+# Read-only snapshot serving (edge replicas)
+snapshot_links = Gauge("snapshot_links", "Links in the loaded snapshot and its deltas")
+snapshot_delta_files = Gauge("snapshot_delta_files", "Delta files applied on top of the snapshot")
+snapshot_age = Gauge(
+    "snapshot_age_seconds", "Seconds since the newest loaded snapshot or delta was taken"
+)
+
+# Traffic capture
+traffic_captured = Counter("traffic_captured_total", "Requests recorded to the traffic capture")
+
+# Shutdown
+shutdown_phase_seconds = Gauge(
+    "shutdown_phase_seconds",
+    "Seconds spent in each drain phase (announce, requests, consumer, producer, close, total)",
+    ["phase"],
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled")
+drain_dropped_requests = Counter(
+    "drain_dropped_requests_total",
+    "Requests cancelled because they were still running at the drain deadline",
+)
+
+# Dependency health, as last probed (status: 1 ok, 0.5 slow, 0 down)
+dependency_status = Gauge(
+    "dependency_status", "Last probed dependency health: 1 ok, 0.5 slow, 0 down", ["dependency"]
+)
+dependency_probe_latency = Gauge(
+    "dependency_probe_latency_seconds", "Latency of the last dependency probe", ["dependency"]
+)
+
+# Per-stage hot-path latency.
+# stage: local_cache | redis | postgres | bloom_check | postgres_reverse | insert | publish
+# (postgres is the redirect's code -> URL read, postgres_reverse the shorten path's URL -> code
+# read that reuses an existing mapping)
+# outcome: hit | miss for lookups, created | conflict for inserts, ok | error otherwise
+stage_latency = Histogram(
+    "url_stage_latency_seconds",
+    "Latency of individual hot-path stages (cache tiers, storage, publishing)",
+    ["stage", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Children bound once for the hot paths: .labels() takes a lock and hashes the label values
+# on every call, a lookup in this dict does not. Binding up front also exports every series
+# from the first scrape.
+STAGE_OUTCOMES = {
+    "local_cache": ("hit", "miss"),
+    "redis": ("hit", "miss"),
+    "postgres": ("hit", "miss"),
+    "bloom_check": ("hit", "miss"),
+    "postgres_reverse": ("hit", "miss"),
+    "insert": ("created", "conflict"),
+    "publish": ("ok", "error"),
+}
+stage_timers = {
+    (stage, outcome): stage_latency.labels(stage, outcome)
+    for stage, outcomes in STAGE_OUTCOMES.items()
+    for outcome in outcomes
+}
+
+# Event loop health (only populated when PROFILING_ENABLED)
+event_loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a periodic loop wake-up was due and when it ran",
+    buckets=LATENCY_BUCKETS,
+)
+event_loop_lag_max = Gauge(
+    "event_loop_lag_max_seconds", "Worst event loop lag seen in the last sampling window"
+)
+event_loop_slow_callbacks = Counter(
+    "event_loop_slow_callbacks_total",
+    "Event loop stalls of at least SLOW_CALLBACK_SECONDS seen by the lag sampler",
+)
+
+# Kafka produces, recorded once per message by KafkaClient (not again by publishers)
 kafka_produce_success = Counter(
     "kafka_produce_success_total", "Count of successful Kafka message produces"
 )
@@ -20,11 +147,50 @@ kafka_produce_failure = Counter(
 kafka_produce_latency = Histogram(
     "kafka_produce_latency_seconds", "Latency of producing messages to Kafka"
 )
+kafka_consumed = Counter("kafka_consumed_total", "Kafka messages received by this replica")
+kafka_consume_lag = Histogram(
+    "kafka_consume_lag_seconds",
+    "Time from a message being produced to this replica receiving it",
+    buckets=LATENCY_BUCKETS,
+)
+events_applied = Counter(
+    "url_created_events_applied_total",
+    "URL_CREATED events applied to this replica's filters and in-process cache",
+)
+events_dead_lettered = Counter(
+    "events_dead_lettered_total", "URL_CREATED events stored in the Redis dead-letter queue"
+)
 
 # New Database metrics
 db_operations_success = Counter("db_operations_success_total", "Count of successful DB operations")
 db_operations_failure = Counter("db_operations_failure_total", "Count of failed DB operations")
 db_query_latency = Histogram("db_query_latency_seconds", "Latency of DB queries")
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a Postgres connection from the pool",
+    buckets=LATENCY_BUCKETS,
+)
+db_insert_batch_size = Histogram(
+    "db_insert_batch_rows",
+    "New links written per group-commit batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+# Hot keys: the busiest short codes of the last interval, replaced wholesale on every refresh
+hot_key_requests = Gauge(
+    "hot_key_requests_per_second",
+    "Estimated redirect requests per second of the top HOT_KEYS_TOP_N short codes",
+    ["short_code"],
+)
+hot_keys_pinned = Gauge("hot_keys_pinned", "Short codes pinned in the in-process cache")
+
+# Admission control on write requests.
+# decision: accepted | rejected; reason: ok | client_limit | overload | limiter_error
+rate_limit_requests = Counter(
+    "rate_limit_requests_total",
+    "Write requests seen by the rate limiter, by decision and reason",
+    ["decision", "reason"],
+)
 
 
 def start_metrics_server(port: int = 8000):
@@ -33,6 +199,8 @@ def start_metrics_server(port: int = 8000):
 
     This function should be called once at application startup.
     After calling it, any registered metrics will be exposed at /metrics.
+    The server runs in its own thread, so scrapes are rendered off the event loop;
+    it is the only place metrics are exposed (the API port has no /metrics route).
     """
     try:
         start_http_server(port)
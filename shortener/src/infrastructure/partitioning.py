@@ -0,0 +1,142 @@
+"""
+DDL for the url_mappings layouts selected by PG_PARTITIONING.
+
+none   one heap, UNIQUE (short_code) (the original schema)
+hash   PARTITION BY HASH (short_code) into PG_HASH_PARTITIONS tables; every lookup by
+       short_code is pruned to exactly one partition
+month  PARTITION BY RANGE (created_at), one table per calendar month; old months are
+       detached (and dropped) instead of deleted row by row. Postgres cannot enforce a
+       unique short_code across range partitions, so inserts serialize per code on an
+       advisory lock, and short_code lookups probe each attached month's index
+"""
+
+import re
+from datetime import date
+from typing import Iterable, List, Optional
+
+import asyncpg
+
+PARTITION_LAYOUTS = ("none", "hash", "month")
+
+# Held while month partitions are created, so replicas and partitions.py do not race on
+# the catalog
+_PARTITION_LOCK = "SELECT pg_advisory_xact_lock(hashtext('url_mappings_partitions'));"
+
+_MONTH_PARTITION = re.compile(r"url_mappings_p(\d{4})_(\d{2})")
+
+_COLUMNS = """
+    id BIGSERIAL,
+    short_code VARCHAR(20) NOT NULL,
+    long_url TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP"""
+
+
+def validate_layout(layout: str) -> str:
+    if layout not in PARTITION_LAYOUTS:
+        raise ValueError(f"PG_PARTITIONING must be one of {PARTITION_LAYOUTS}, got {layout!r}")
+    return layout
+
+
+def create_table_sql(layout: str) -> str:
+    if layout == "hash":
+        return f"""
+        CREATE TABLE IF NOT EXISTS url_mappings ({_COLUMNS},
+            PRIMARY KEY (short_code)
+        ) PARTITION BY HASH (short_code);
+        """
+    if layout == "month":
+        return f"""
+        CREATE TABLE IF NOT EXISTS url_mappings ({_COLUMNS},
+            PRIMARY KEY (short_code, created_at)
+        ) PARTITION BY RANGE (created_at);
+        """
+    return """
+    CREATE TABLE IF NOT EXISTS url_mappings (
+        id SERIAL PRIMARY KEY,
+        short_code VARCHAR(20) UNIQUE NOT NULL,
+        long_url TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT NOW(),
+        expires_at TIMESTAMP
+    );
+    """
+
+
+def hash_partitions_sql(count: int) -> List[str]:
+    return [
+        f"CREATE TABLE IF NOT EXISTS url_mappings_h{i:03d} PARTITION OF url_mappings "
+        f"FOR VALUES WITH (MODULUS {count}, REMAINDER {i});"
+        for i in range(count)
+    ]
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_partition_name(month: date) -> str:
+    return f"url_mappings_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """The month a url_mappings_pYYYY_MM partition covers, or None for other tables."""
+    match = _MONTH_PARTITION.fullmatch(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def month_partition_sql(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {month_partition_name(month)} PARTITION OF url_mappings "
+        f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}');"
+    )
+
+
+async def current_layout(conn: asyncpg.Connection) -> Optional[str]:
+    """Layout of the existing url_mappings table, or None if there is none yet."""
+    strategy = await conn.fetchval(
+        """
+        SELECT COALESCE(p.partstrat::text, '') FROM pg_class c
+        LEFT JOIN pg_partitioned_table p ON p.partrelid = c.oid
+        WHERE c.oid = to_regclass('url_mappings');
+        """
+    )
+    if strategy is None:
+        return None
+    return {"h": "hash", "r": "month", "": "none"}.get(strategy, strategy)
+
+
+async def ensure_month_partitions(conn: asyncpg.Connection, first: date, count: int) -> List[str]:
+    """
+    Create the partitions for count months starting at first (idempotent).
+
+    Inserts for a month without a partition fail, so keep months ahead of the clock.
+    """
+    return await ensure_partitions_for(conn, (add_months(first, i) for i in range(count)))
+
+
+async def ensure_partitions_for(conn: asyncpg.Connection, months: Iterable[date]) -> List[str]:
+    """
+    Create the partitions of the given months that do not exist yet (idempotent).
+    """
+    names = [month_partition_name(month) for month in sorted(set(months))]
+    missing = await conn.fetchval(
+        "SELECT array_agg(name) FROM unnest($1::text[]) AS name WHERE to_regclass(name) IS NULL;",
+        names,
+    )
+    if missing:
+        async with conn.transaction():
+            await conn.execute(_PARTITION_LOCK)
+            for name in missing:
+                await conn.execute(month_partition_sql(partition_month(name)))
+    return names
+
+
+async def attached_partitions(conn: asyncpg.Connection) -> List[str]:
+    rows = await conn.fetch(
+        """
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass('url_mappings') ORDER BY c.relname;
+        """
+    )
+    return [row["relname"] for row in rows]
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+from infrastructure.config import settings
+from infrastructure.metrics import event_loop_lag, event_loop_lag_max, event_loop_slow_callbacks
+
+logger = logging.getLogger(__name__)
+
+# Only one profile (CPU or memory) may run at a time; they skew each other.
+profile_lock = asyncio.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+
+
+def _sample_stacks(thread_id: int, seconds: float, interval: float) -> Counter:
+    """
+    Sample the call stack of thread_id every interval seconds, from a separate thread.
+    """
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        labels.reverse()
+        stacks[";".join(labels)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+async def capture_cpu_profile(seconds: float, interval: Optional[float] = None) -> str:
+    """
+    Capture a sampling CPU profile of the event loop thread.
+
+    Returns the "folded" format understood by flamegraph.pl, speedscope and friends:
+    one "frame;frame;frame count" line per distinct stack, root frame first.
+    """
+    interval = interval or settings.PROFILING_SAMPLE_INTERVAL
+    loop_thread_id = threading.get_ident()
+    stacks = await asyncio.to_thread(_sample_stacks, loop_thread_id, seconds, interval)
+    logger.info(
+        {
+            "action": "capture_cpu_profile",
+            "seconds": seconds,
+            "samples": sum(stacks.values()),
+            "distinct_stacks": len(stacks),
+        }
+    )
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+async def capture_memory_diff(seconds: float, top: int = 25) -> List[Dict]:
+    """
+    Diff two tracemalloc snapshots taken seconds apart, grouped by allocating line.
+
+    tracemalloc is started on demand and stopped again afterwards, so it costs nothing
+    outside of a capture.
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(25)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    stats = after.compare_to(before, "lineno")[:top]
+    return [
+        {
+            "location": str(stat.traceback),
+            "size_diff_bytes": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in stats
+    ]
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """
+    Collect asyncio debug-mode "Executing <Handle ...> took N seconds" warnings.
+    """
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.durations: Counter = Counter()
+        self.counts: Counter = Counter()
+
+    def emit(self, record: logging.LogRecord):
+        if record.msg == "Executing %s took %.3f seconds":
+            callback, seconds = record.args
+            self.durations[callback] += seconds
+            self.counts[callback] += 1
+
+
+async def capture_slow_callbacks(seconds: float, threshold: float, top: int = 25) -> List[Dict]:
+    """
+    Name the callbacks that block the event loop for longer than threshold, over seconds.
+
+    asyncio debug mode times every callback but also records a traceback for every handle
+    and task, which slows the whole loop down, so it is only switched on for the capture.
+    The asyncio logger's level is lowered for the same window so its warnings reach the
+    collector whatever LOG_LEVEL is.
+    """
+    loop = asyncio.get_running_loop()
+    asyncio_logger = logging.getLogger("asyncio")
+    handler = _SlowCallbackHandler()
+    previous = (loop.get_debug(), loop.slow_callback_duration, asyncio_logger.level)
+    asyncio_logger.addHandler(handler)
+    asyncio_logger.setLevel(logging.WARNING)
+    loop.slow_callback_duration = threshold
+    loop.set_debug(True)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        loop.set_debug(previous[0])
+        loop.slow_callback_duration = previous[1]
+        asyncio_logger.setLevel(previous[2])
+        asyncio_logger.removeHandler(handler)
+
+    return [
+        {
+            "callback": callback,
+            "count": handler.counts[callback],
+            "total_seconds": round(total, 3),
+        }
+        for callback, total in handler.durations.most_common(top)
+    ]
+
+
+class EventLoopMonitor:
+    """
+    Measures event loop lag with a periodic sleep and counts stalls: wake-ups late by at
+    least slow_callback_seconds, i.e. one loop iteration (a slow callback or a run of them)
+    blocked that long. A stall that starts and ends between two samples goes unseen, so
+    the counter is a lower bound; capture_slow_callbacks names the callbacks responsible.
+    Costs one timer per interval, so it can stay on in production.
+    """
+
+    def __init__(self, interval: float, slow_callback_seconds: float, window: int = 40):
+        self.interval = interval
+        self.slow_callback_seconds = slow_callback_seconds
+        self.window = window
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            {
+                "action": "event_loop_monitor",
+                "status": "started",
+                "interval": self.interval,
+                "slow_callback_seconds": self.slow_callback_seconds,
+            }
+        )
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        window_max = 0.0
+        samples = 0
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.last_lag = lag
+            event_loop_lag.observe(lag)
+            if lag >= self.slow_callback_seconds:
+                self.stalls += 1
+                event_loop_slow_callbacks.inc()
+            window_max = max(window_max, lag)
+            samples += 1
+            if samples >= self.window:
+                self.max_lag = window_max
+                event_loop_lag_max.set(window_max)
+                window_max = 0.0
+                samples = 0
+
+    def snapshot(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "slow_callback_seconds": self.slow_callback_seconds,
+            "last_lag_seconds": self.last_lag,
+            "stalls": self.stalls,
+            "window_max_lag_seconds": self.max_lag,
+        }
+
+
+event_loop_monitor = EventLoopMonitor(
+    settings.EVENT_LOOP_LAG_INTERVAL, settings.SLOW_CALLBACK_SECONDS
+)
@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from infrastructure.config import settings
+from infrastructure.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+class _ClientState:
+    __slots__ = ("tokens", "lease_until", "blocked_until", "local_tokens", "refilled_at")
+
+    def __init__(self):
+        # Tokens leased from Redis and when the lease lapses
+        self.tokens = 0.0
+        self.lease_until = 0.0
+        self.blocked_until = 0.0
+        # Local bucket, only used while Redis is unreachable
+        self.local_tokens: Optional[float] = None
+        self.refilled_at = 0.0
+
+
+class RateLimiter:
+    """
+    Per-client token buckets shared by all replicas through Redis.
+
+    Each replica leases a few tokens at a time from the client's Redis bucket (an atomic
+    Lua script) and spends them locally, so most requests are decided without a round trip.
+    A rejected client is remembered until its Retry-After passes, so a flood costs one Redis
+    call per client, not one per request. If Redis is unavailable the replica falls back to
+    a local bucket with the same rate and burst.
+
+    Not thread-safe: it is only touched from the event loop.
+    """
+
+    def __init__(
+        self,
+        redis_client: RedisClient,
+        rate: float,
+        burst: int,
+        lease_seconds: float = 1.0,
+        max_clients: int = 100_000,
+    ):
+        self.redis_client = redis_client
+        self.rate = rate
+        self.burst = burst
+        self.lease_seconds = lease_seconds
+        self.lease_size = max(1, min(burst, math.ceil(rate * lease_seconds)))
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, _ClientState]" = OrderedDict()
+
+    def _state(self, key: str, now: float) -> _ClientState:
+        state = self._clients.get(key)
+        if state is None:
+            state = self._clients[key] = _ClientState()
+            if len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(key)
+        return state
+
+    async def acquire(self, key: str) -> Tuple[bool, float]:
+        """
+        Take one token for key. Returns (allowed, retry_after_seconds).
+        """
+        now = time.monotonic()
+        state = self._state(key, now)
+        if state.blocked_until > now:
+            return False, state.blocked_until - now
+        if state.tokens >= 1 and state.lease_until > now:
+            state.tokens -= 1
+            return True, 0.0
+
+        try:
+            granted, retry_after = await self.redis_client.take_tokens(
+                key, self.rate, self.burst, self.lease_size
+            )
+        except Exception as e:
+            logger.debug({"action": "rate_limit", "status": "redis_unavailable", "error": str(e)})
+            return self._acquire_local(state, now)
+
+        if granted:
+            state.tokens = granted - 1
+            state.lease_until = now + self.lease_seconds
+            return True, 0.0
+        state.tokens = 0.0
+        state.blocked_until = now + retry_after
+        return False, retry_after
+
+    def _acquire_local(self, state: _ClientState, now: float) -> Tuple[bool, float]:
+        if state.local_tokens is None:
+            # Start from a full bucket, as Redis does for an unseen client
+            state.local_tokens = float(self.burst)
+        else:
+            elapsed = now - state.refilled_at
+            state.local_tokens = min(self.burst, state.local_tokens + elapsed * self.rate)
+        state.refilled_at = now
+        if state.local_tokens >= 1:
+            state.local_tokens -= 1
+            return True, 0.0
+        return False, (1 - state.local_tokens) / self.rate
+
+
+class LoadShedder:
+    """
+    Global admission control: reports overload while the Postgres pool wait (moving average)
+    or the event loop lag is above its threshold. A threshold of 0 disables that signal.
+    """
+
+    def __init__(
+        self, database, loop_monitor, pool_wait_threshold: float, loop_lag_threshold: float
+    ):
+        self.database = database
+        self.loop_monitor = loop_monitor
+        self.pool_wait_threshold = pool_wait_threshold
+        self.loop_lag_threshold = loop_lag_threshold
+
+    @property
+    def enabled(self) -> bool:
+        return self.pool_wait_threshold > 0 or self.loop_lag_threshold > 0
+
+    def overloaded(self) -> Optional[str]:
+        if self.pool_wait_threshold > 0 and self.database.pool_wait > self.pool_wait_threshold:
+            return "pool_wait"
+        if self.loop_lag_threshold > 0 and self.loop_monitor.last_lag > self.loop_lag_threshold:
+            return "loop_lag"
+        return None
+
+
+def client_key(scope) -> str:
+    """
+    Rate-limit identity: the API key if one is sent (hashed, never stored raw), else the IP.
+    """
+    forwarded = None
+    for name, value in scope["headers"]:
+        if name == b"x-api-key":
+            return "key:" + hashlib.blake2b(value, digest_size=12).hexdigest()
+        if name == b"x-forwarded-for" and settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+            forwarded = value.decode("latin-1").split(",", 1)[0].strip()
+    if forwarded:
+        return "ip:" + forwarded
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
@@ -1,18 +1,76 @@
 import logging
+import time
+from typing import Iterable, List, Optional, Tuple
 
 import pybreaker
 import redis.asyncio as redis
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from domain.models import URLMapping
 from infrastructure.config import settings
 
 logger = logging.getLogger(__name__)
 
+CACHE_TTL_SECONDS = 3600
+
 redis_breaker = pybreaker.CircuitBreaker(
     fail_max=3, reset_timeout=30, name="redis_circuit_breaker"
 )
 
 
+def encode_mapping(long_url: str, created_at=None, expires_at=None) -> str:
+    """
+    Cache value: "<created_at>|<expires_at>|<long_url>" with epoch seconds (empty if unknown).
+    """
+    created = int(created_at) if created_at is not None else ""
+    expires = int(expires_at) if expires_at is not None else ""
+    return f"{created}|{expires}|{long_url}"
+
+
+def decode_mapping(short_code: str, value: str) -> URLMapping:
+    # Entries written before timestamps were cached hold the bare URL ("http...")
+    if value[:1] not in "0123456789|":
+        return URLMapping(short_code, value)
+    created, expires, long_url = value.split("|", 2)
+    return URLMapping(
+        short_code,
+        long_url,
+        float(created) if created else None,
+        float(expires) if expires else None,
+    )
+
+
+def cache_ttl(expires_at=None) -> int:
+    """Seconds to cache a mapping for; Redis drops the entry when the link expires."""
+    if expires_at is None:
+        return CACHE_TTL_SECONDS
+    return min(CACHE_TTL_SECONDS, int(expires_at - time.time()))
+
+
+# Token bucket shared by all replicas. Refills at ARGV[1] tokens/s up to ARGV[2], then grants
+# up to ARGV[3] tokens at once. Returns {granted, seconds until the next token if none}.
+TAKE_TOKENS_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(wanted, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+local retry_after = 0
+if granted == 0 then
+    retry_after = (1 - tokens) / rate
+end
+return {granted, tostring(retry_after)}
+"""
+
+
 class RedisClient:
     def __init__(self):
         self.redis = redis.Redis(
@@ -22,6 +80,7 @@ class RedisClient:
             decode_responses=True,
         )
         self._closing = False
+        self._take_tokens = self.redis.register_script(TAKE_TOKENS_SCRIPT)
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=5))
     async def connect(self):
@@ -36,7 +95,9 @@ class RedisClient:
             raise
 
     @redis_breaker
-    async def cache_short_code(self, short_code: str, long_url: str):
+    async def cache_short_code(
+        self, short_code: str, long_url: str, created_at=None, expires_at=None
+    ):
         if self._closing:
             logger.info(
                 {
@@ -47,6 +108,9 @@ class RedisClient:
             )
             return
         key = f"url:{short_code}"
+        ttl = cache_ttl(expires_at)
+        if ttl <= 0:
+            return
         logger.debug(
             {
                 "action": "cache_short_code",
@@ -55,7 +119,7 @@ class RedisClient:
             }
         )
         try:
-            await self.redis.set(key, long_url, ex=3600)
+            await self.redis.set(key, encode_mapping(long_url, created_at, expires_at), ex=ttl)
             logger.info(
                 {
                     "action": "cache_short_code",
@@ -76,7 +140,7 @@ class RedisClient:
             raise
 
     @redis_breaker
-    async def get_long_url(self, short_code: str):
+    async def get_mapping(self, short_code: str) -> Optional[URLMapping]:
         if self._closing:
             logger.info(
                 {
@@ -98,7 +162,7 @@ class RedisClient:
                     "status": status,
                 }
             )
-            return val
+            return decode_mapping(short_code, val) if val else None
         except Exception as e:
             logger.warning(
                 {
@@ -110,6 +174,105 @@ class RedisClient:
             )
             raise
 
+    async def sample_mappings(self, limit: int, batch_size: int = 500) -> List[URLMapping]:
+        """
+        Up to limit cached mappings, read with SCAN + MGET so Redis is never blocked.
+
+        The cache only holds links created or looked up within CACHE_TTL_SECONDS, which makes
+        it a cheap source of recently hot links for warming the in-process cache.
+        """
+        mappings: List[URLMapping] = []
+        keys: List[str] = []
+        async for key in self.redis.scan_iter(match="url:*", count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size or len(mappings) + len(keys) >= limit:
+                mappings.extend(await self._get_many(keys))
+                keys = []
+                if len(mappings) >= limit:
+                    break
+        if keys:
+            mappings.extend(await self._get_many(keys))
+        return mappings[:limit]
+
+    async def _get_many(self, keys: List[str]) -> List[URLMapping]:
+        values = await self.redis.mget(keys)
+        return [
+            decode_mapping(key[len("url:") :], value)
+            for key, value in zip(keys, values)
+            if value is not None
+        ]
+
+    @redis_breaker
+    async def cache_mappings(self, mappings: Iterable[URLMapping]):
+        """
+        Cache many mappings in one pipelined round trip (no MULTI/EXEC).
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        count = 0
+        for mapping in mappings:
+            ttl = cache_ttl(mapping.expires_at)
+            if ttl > 0:
+                value = encode_mapping(mapping.long_url, mapping.created_at, mapping.expires_at)
+                pipe.set(f"url:{mapping.short_code}", value, ex=ttl)
+                count += 1
+        if not count:
+            return
+        try:
+            await pipe.execute()
+            logger.info({"action": "cache_mappings", "count": count, "status": "cached"})
+        except Exception as e:
+            logger.warning(
+                {
+                    "action": "cache_mappings",
+                    "count": count,
+                    "status": "transient_failure",
+                    "error": str(e),
+                }
+            )
+            raise
+
+    @redis_breaker
+    async def delete_short_codes(self, short_codes: Iterable[str]):
+        keys = [f"url:{short_code}" for short_code in short_codes]
+        if not keys:
+            return
+        try:
+            await self.redis.delete(*keys)
+            logger.info({"action": "delete_short_codes", "count": len(keys), "status": "deleted"})
+        except Exception as e:
+            logger.warning(
+                {
+                    "action": "delete_short_codes",
+                    "count": len(keys),
+                    "status": "transient_failure",
+                    "error": str(e),
+                }
+            )
+            raise
+
+    @redis_breaker
+    async def take_tokens(
+        self, key: str, rate: float, burst: int, wanted: int
+    ) -> Tuple[int, float]:
+        """
+        Atomically take up to wanted tokens from the shared bucket for key.
+
+        Returns (granted, retry_after_seconds); retry_after is only set when nothing was granted.
+        """
+        granted, retry_after = await self._take_tokens(
+            keys=[f"ratelimit:{key}"], args=[rate, burst, wanted]
+        )
+        return int(granted), float(retry_after)
+
+    async def probe(self) -> dict:
+        """
+        PING, bypassing the circuit breaker so health checks never trip or reset it.
+        """
+        if self._closing:
+            raise RuntimeError("shutting down")
+        await self.redis.ping()
+        return {}
+
     async def close(self):
         self._closing = True
         await self.redis.close()
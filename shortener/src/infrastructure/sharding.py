@@ -0,0 +1,68 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_SHARD = "default"
+
+
+def parse_shards(raw: str) -> Dict[str, str]:
+    """
+    Parse "name=dsn,name=dsn" into an ordered {name: dsn} mapping.
+
+    Shards are identified by name, not DSN, so a shard can move hosts without
+    changing which short codes it owns.
+    """
+    shards: Dict[str, str] = {}
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, dsn = item.partition("=")
+        if not sep or not name.strip() or not dsn.strip():
+            raise ValueError(f"Invalid shard spec {item!r}, expected name=dsn")
+        if name.strip() in shards:
+            raise ValueError(f"Duplicate shard name {name.strip()!r}")
+        shards[name.strip()] = dsn.strip()
+    return shards
+
+
+def _ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def url_routing_key(long_url: str) -> str:
+    """
+    Routing key for reverse (long_url -> short_code) lookups.
+
+    Short codes are the leading hex digits of the URL's SHA-256 digest, so routing the
+    digest prefix through the ring lands on the shard that holds the row. Codes minted
+    any other way (e.g. collision resolution) are still found by fanning out.
+    """
+    return hashlib.sha256(long_url.encode()).hexdigest()[:7]
+
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes; maps a short code to a shard name.
+
+    Adding or removing a shard only moves the key ranges adjacent to its virtual nodes.
+    """
+
+    def __init__(self, shard_names: Iterable[str], vnodes: int = 64):
+        self.shard_names: List[str] = list(shard_names)
+        if not self.shard_names:
+            raise ValueError("HashRing needs at least one shard")
+        points: List[Tuple[int, str]] = sorted(
+            (_ring_hash(f"{name}#{i}"), name) for name in self.shard_names for i in range(vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [name for _, name in points]
+
+    def shard_for(self, key: str) -> str:
+        if len(self.shard_names) == 1:
+            return self.shard_names[0]
+        index = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+    def __len__(self) -> int:
+        return len(self.shard_names)
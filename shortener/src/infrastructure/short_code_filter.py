@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import random
+from array import array
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SIZE = 4
+MAX_LOAD = 0.9
+MAX_KICKS = 500
+# Odd 32-bit constant (MurmurHash2's) spreading a fingerprint over bucket indexes
+_ALT_MULTIPLIER = 0x5BD1E995
+
+
+class ShortCodeFilter:
+    """
+    Cuckoo filter of the short codes in url_mappings: 16-bit fingerprints in buckets of
+    four, about 2.2 bytes per code. "Not in filter" means the code does not exist, so a
+    lookup for it can be answered 404 without touching Redis or Postgres; "in filter" is
+    wrong for roughly 1 in 8000 unknown codes, which then take the normal path.
+
+    Unlike a bloom filter it supports deletes, but only of codes that were added: discarding
+    anything else may remove another code's fingerprint. Codes may be added more than once
+    (each copy needs its own discard). Negatives are only trusted once the filter is ready,
+    i.e. loaded from the table; until then, and after an insert fails because the filter is
+    full, every code is reported as possibly present.
+
+    Uses the process's str hash, so a filter is only meaningful inside the process that
+    built it. Not thread-safe: it is only touched from the event loop.
+    """
+
+    def __init__(self, capacity: int):
+        buckets = 1
+        while buckets * BUCKET_SIZE * MAX_LOAD < capacity:
+            buckets *= 2
+        self.capacity = capacity
+        self.mask = buckets - 1
+        self.table = array("H", bytes(2 * buckets * BUCKET_SIZE))
+        self.count = 0
+        self.ready = False
+        self.saturated = False
+        self._journal: Optional[List[str]] = None
+
+    def _locate(self, code: str) -> Tuple[int, int, int]:
+        h = hash(code)
+        fingerprint = (h >> 32) & 0xFFFF or 1  # 0 marks an empty slot
+        i1 = h & self.mask
+        i2 = (i1 ^ (fingerprint * _ALT_MULTIPLIER)) & self.mask
+        return fingerprint, i1, i2
+
+    def __contains__(self, code: str) -> bool:
+        if not self.ready or self.saturated:
+            return True
+        fingerprint, i1, i2 = self._locate(code)
+        table = self.table
+        s1 = i1 * BUCKET_SIZE
+        s2 = i2 * BUCKET_SIZE
+        if fingerprint in table[s1 : s1 + BUCKET_SIZE]:
+            return True
+        return fingerprint in table[s2 : s2 + BUCKET_SIZE]
+
+    def _place(self, index: int, fingerprint: int) -> bool:
+        table = self.table
+        start = index * BUCKET_SIZE
+        for slot in range(start, start + BUCKET_SIZE):
+            if not table[slot]:
+                table[slot] = fingerprint
+                self.count += 1
+                return True
+        return False
+
+    def add(self, code: str) -> bool:
+        """
+        Add code; False if the filter is full, after which it stops rejecting anything.
+        """
+        if self._journal is not None:
+            self._journal.append(code)
+        if self.saturated:
+            return False
+        fingerprint, i1, i2 = self._locate(code)
+        if self._place(i1, fingerprint) or self._place(i2, fingerprint):
+            return True
+
+        # Evict a random resident to its alternate bucket, up to MAX_KICKS times
+        table = self.table
+        index = random.choice((i1, i2))
+        for _ in range(MAX_KICKS):
+            slot = index * BUCKET_SIZE + random.randrange(BUCKET_SIZE)
+            fingerprint, table[slot] = table[slot], fingerprint
+            index = (index ^ (fingerprint * _ALT_MULTIPLIER)) & self.mask
+            if self._place(index, fingerprint):
+                return True
+        # The fingerprint left in hand belongs to some stored code and has nowhere to go
+        self.saturated = True
+        logger.warning({"action": "short_code_filter", "status": "saturated", "items": self.count})
+        return False
+
+    def discard(self, code: str) -> bool:
+        """Remove one copy of a code that was added; False if none was found."""
+        fingerprint, i1, i2 = self._locate(code)
+        table = self.table
+        for index in (i1, i2):
+            start = index * BUCKET_SIZE
+            for slot in range(start, start + BUCKET_SIZE):
+                if table[slot] == fingerprint:
+                    table[slot] = 0
+                    self.count -= 1
+                    return True
+        return False
+
+    def start_journal(self):
+        """Record added codes from now on, to be replayed onto a replacement."""
+        self._journal = []
+
+    def stop_journal(self) -> List[str]:
+        """Stop recording; returns the codes added since start_journal."""
+        journal, self._journal = self._journal or [], None
+        return journal
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.table.buffer_info()[1] * self.table.itemsize
+
+    @property
+    def load_factor(self) -> float:
+        return self.count / len(self.table)
+
+
+async def load_short_code_filter(
+    database, capacity: int, current: Optional[ShortCodeFilter] = None
+) -> ShortCodeFilter:
+    """
+    Build a ready filter holding every short code still stored, doubling the capacity and
+    starting over if it fills up.
+
+    Expired rows are loaded too: until the reaper deletes them (and discards their codes)
+    they answer 410 Gone, not the filter's 404.
+
+    Codes added to current while the table is scanned are added to the new filter too, so
+    the caller can swap it in without losing codes created meanwhile. Discards are not
+    carried over: the scan may never have added those codes, and a stale entry only costs
+    a lookup.
+    """
+    added_meanwhile: List[str] = []
+    while True:
+        if current is not None:
+            current.start_journal()
+        codes = ShortCodeFilter(capacity)
+        try:
+            async for batch in database.iter_mappings(include_expired=True):
+                for mapping in batch:
+                    codes.add(mapping.short_code)
+                if codes.saturated:
+                    break
+                # Adding a large batch is CPU-bound; let requests run in between
+                await asyncio.sleep(0)
+        finally:
+            if current is not None:
+                added_meanwhile.extend(current.stop_journal())
+        for code in added_meanwhile:
+            codes.add(code)
+        if not codes.saturated:
+            codes.ready = True
+            return codes
+        capacity *= 2
+        logger.info({"action": "load_short_code_filter", "status": "grow", "capacity": capacity})
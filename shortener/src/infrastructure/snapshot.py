@@ -0,0 +1,453 @@
+import asyncio
+import heapq
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from domain.models import URLMapping
+from infrastructure.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"URLSNAP\x00"
+VERSION = 1
+
+# magic, version, key width, reserved, count, built_at, then the offsets of the URL blob,
+# URL offsets, key prefixes, created_at, expires_at and key sections
+_HEADER = struct.Struct("<8sHHIQdQQQQQQ")
+# Bytes of each key held as an integer in the prefix column
+PREFIX_BYTES = 8
+# Rows buffered per column before they are spooled to disk
+_SPOOL_ROWS = 65_536
+
+# (short_code, long_url as UTF-8, created_at, expires_at), timestamps in whole epoch seconds
+# with 0 for none: the raw form rows are written, merged and iterated in
+Record = Tuple[bytes, bytes, int, int]
+
+if sys.byteorder != "little":
+    raise ImportError(
+        "snapshot files are little-endian and read in place; big-endian hosts are not supported"
+    )
+
+
+def to_record(mapping: URLMapping) -> Record:
+    # Rounded so a link never outlives its expiry, and matching the whole seconds of ETags
+    return (
+        mapping.short_code.encode(),
+        mapping.long_url.encode(),
+        int(mapping.created_at or 0),
+        math.ceil(mapping.expires_at) if mapping.expires_at is not None else 0,
+    )
+
+
+def key_prefix(short_code: bytes) -> int:
+    # NUL is below every code character, so these integers sort like the padded keys
+    return int.from_bytes(short_code[:PREFIX_BYTES].ljust(PREFIX_BYTES, b"\x00"), "big")
+
+
+def _align(f: BinaryIO, boundary: int = 8) -> int:
+    position = f.tell()
+    padding = -position % boundary
+    f.write(bytes(padding))
+    return position + padding
+
+
+class SnapshotWriter:
+    """
+    Writes a snapshot file from records given in ascending short-code order.
+
+    Layout (little-endian, sections 8-byte aligned, offsets in the header):
+
+        header | URL blob | u64 URL offsets (count + 1) | u64 key prefixes | u32 created_at
+        | u32 expires_at | short codes, each NUL-padded to key_width bytes
+
+    URL i is blob[offsets[i]:offsets[i + 1]], so the index needs no lengths. A key prefix
+    is the first 8 bytes of the short code as a big-endian integer (see key_prefix), which
+    lets readers search with the C bisect functions instead of comparing slices. The URL blob
+    goes straight into the file while the fixed-width columns are spooled to temporary
+    files, so memory stays constant however many rows are written. The file is built
+    under a temporary name and renamed into place by close().
+    """
+
+    def __init__(self, path: str, key_width: int, built_at: Optional[float] = None):
+        self.path = path
+        self.key_width = key_width
+        self.built_at = time.time() if built_at is None else built_at
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(bytes(_HEADER.size))
+        self._blob_start = self._file.tell()
+        self._blob_size = 0
+        self._last = b""
+        self._offsets = array("Q", [0])
+        self._prefixes = array("Q")
+        self._created = array("I")
+        self._expires = array("I")
+        self._keys = bytearray()
+        self._spools = [tempfile.TemporaryFile() for _ in range(5)]
+
+    def add(self, short_code: bytes, long_url: bytes, created_at: int, expires_at: int):
+        if len(short_code) > self.key_width:
+            raise ValueError(f"short code {short_code!r} is wider than {self.key_width} bytes")
+        if self.count and short_code <= self._last:
+            raise ValueError(f"short code {short_code!r} out of order or repeated")
+        self._last = short_code
+        self._file.write(long_url)
+        self._blob_size += len(long_url)
+        self._offsets.append(self._blob_size)
+        self._prefixes.append(key_prefix(short_code))
+        self._created.append(created_at)
+        self._expires.append(expires_at)
+        self._keys += short_code.ljust(self.key_width, b"\x00")
+        self.count += 1
+        if len(self._created) >= _SPOOL_ROWS:
+            self._spool()
+
+    def _spool(self):
+        columns = (self._offsets, self._prefixes, self._created, self._expires)
+        for column, spool in zip(columns, self._spools):
+            column.tofile(spool)
+            del column[:]
+        self._spools[4].write(self._keys)
+        self._keys.clear()
+
+    def close(self) -> int:
+        self._spool()
+        sections = []
+        for spool in self._spools:
+            sections.append(_align(self._file))
+            spool.seek(0)
+            while chunk := spool.read(1 << 20):
+                self._file.write(chunk)
+            spool.close()
+        self._file.seek(0)
+        self._file.write(
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                self.key_width,
+                0,
+                self.count,
+                self.built_at,
+                self._blob_start,
+                *sections,
+            )
+        )
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.count
+
+    def abort(self):
+        for spool in self._spools:
+            spool.close()
+        self._file.close()
+        os.unlink(self._tmp_path)
+
+
+def write_snapshot(path: str, records: Iterable[Record], built_at: Optional[float] = None) -> int:
+    """
+    Sort records in memory and write them as a snapshot; the last record given for a
+    short code wins. Meant for what fits in memory: deltas and the runs of an export.
+    """
+    by_code = {record[0]: record for record in records}
+    key_width = max(map(len, by_code), default=1)
+    writer = SnapshotWriter(path, key_width, built_at)
+    try:
+        for short_code in sorted(by_code):
+            writer.add(*by_code[short_code])
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+class MappingSnapshot:
+    """
+    Read-only view of a snapshot file through mmap. Opening it reads only the header; the
+    kernel pages the rest in as lookups touch it, and may drop those pages again under
+    memory pressure, so resident memory follows the hot set rather than the file size.
+
+    A lookup is a binary search over the key prefix column, run by bisect in C straight on
+    the mapped pages (about log2(count) probes, 26 at 50M links); only codes longer than
+    8 bytes compare full keys, among the rows sharing their prefix. Nothing but the row
+    found is decoded: no index is built in memory and nothing outlives the lookup except
+    the URLMapping returned.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (
+                magic,
+                version,
+                self.key_width,
+                _,
+                self.count,
+                self.built_at,
+                self._blob_at,
+                offsets_at,
+                prefixes_at,
+                created_at,
+                expires_at,
+                self._keys_at,
+            ) = _HEADER.unpack_from(self._mm)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} snapshot file")
+            if self._keys_at + self.count * self.key_width > len(self._mm):
+                raise ValueError(f"{path} is truncated")
+        except Exception:
+            self._mm.close()
+            raise
+        if hasattr(self._mm, "madvise"):
+            # Lookups jump around; read-ahead would only fill memory with unrelated rows
+            self._mm.madvise(mmap.MADV_RANDOM)
+        view = memoryview(self._mm)
+        self._offsets = view[offsets_at : offsets_at + 8 * (self.count + 1)].cast("Q")
+        self._prefixes = view[prefixes_at : prefixes_at + 8 * self.count].cast("Q")
+        self._created = view[created_at : created_at + 4 * self.count].cast("I")
+        self._expires = view[expires_at : expires_at + 4 * self.count].cast("I")
+        view.release()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._mm)
+
+    def find(self, short_code: bytes) -> int:
+        """
+        Row index of short_code, or -1.
+        """
+        width = self.key_width
+        if len(short_code) > width:
+            return -1
+        prefix = key_prefix(short_code)
+        lo = bisect_left(self._prefixes, prefix)
+        if lo == self.count or self._prefixes[lo] != prefix:
+            return -1
+        if width <= PREFIX_BYTES:
+            # The prefix is the whole key
+            return lo
+        # Codes longer than the prefix: search the (usually single) rows sharing it
+        hi = bisect_right(self._prefixes, prefix, lo)
+        short_code = short_code.ljust(width, b"\x00")
+        mm = self._mm
+        keys_at = self._keys_at
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            at = keys_at + mid * width
+            if mm[at : at + width] < short_code:
+                lo = mid + 1
+            else:
+                hi = mid
+        at = keys_at + lo * width
+        if lo < self.count and mm[at : at + width] == short_code:
+            return lo
+        return -1
+
+    def get(self, short_code: str) -> Optional[URLMapping]:
+        row = self.find(short_code.encode())
+        if row < 0:
+            return None
+        return self.mapping_at(row, short_code)
+
+    def mapping_at(self, row: int, short_code: str) -> URLMapping:
+        blob_at = self._blob_at
+        long_url = self._mm[blob_at + self._offsets[row] : blob_at + self._offsets[row + 1]]
+        return URLMapping(
+            short_code,
+            long_url.decode(),
+            float(self._created[row]) or None,
+            float(self._expires[row]) or None,
+        )
+
+    def __iter__(self) -> Iterator[Record]:
+        mm, width, blob_at, offsets = self._mm, self.key_width, self._blob_at, self._offsets
+        for row in range(self.count):
+            at = self._keys_at + row * width
+            yield (
+                mm[at : at + width].rstrip(b"\x00"),
+                mm[blob_at + offsets[row] : blob_at + offsets[row + 1]],
+                self._created[row],
+                self._expires[row],
+            )
+
+    def close(self):
+        for column in (self._offsets, self._prefixes, self._created, self._expires):
+            column.release()
+        self._mm.close()
+
+
+def _ranked(snapshot: MappingSnapshot, rank: int) -> Iterator[Tuple[bytes, int, Record]]:
+    # Among equal codes the newest snapshot sorts first
+    for record in snapshot:
+        yield record[0], -rank, record
+
+
+def merge_snapshots(
+    path: str,
+    snapshots: List[MappingSnapshot],
+    built_at: Optional[float] = None,
+    drop_expired: bool = True,
+) -> int:
+    """
+    Merge sorted snapshots, oldest first, into one file without loading them: where
+    several hold a short code, the latest one's row wins. Used to combine the sorted runs
+    of an export and to compact a base snapshot with its deltas.
+    """
+    now = time.time()
+    key_width = max((snapshot.key_width for snapshot in snapshots), default=1)
+    if built_at is None:
+        built_at = max((snapshot.built_at for snapshot in snapshots), default=None)
+    streams = [_ranked(snapshot, rank) for rank, snapshot in enumerate(snapshots)]
+    writer = SnapshotWriter(path, key_width, built_at)
+    try:
+        previous = None
+        for short_code, _, record in heapq.merge(*streams):
+            if short_code == previous:
+                continue
+            previous = short_code
+            if drop_expired and record[3] and record[3] <= now:
+                continue
+            writer.add(*record)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+class SnapshotStore:
+    """
+    Serves lookups from a base snapshot plus the delta snapshots that appear in a
+    directory, newest delta first; used by the read-only edge entrypoint (src/edge.py)
+    in place of URLShortenerService.
+
+    refresh() applies new delta files (named so that they sort in creation order) and
+    swaps in the base file when it is replaced; deltas built before the base are dropped,
+    since the base already holds their rows. Every delta adds one binary search to each
+    lookup, so deltas should be compacted into the base regularly (src/snapshots.py
+    compact). Not thread-safe: it is only touched from the event loop.
+    """
+
+    def __init__(self, path: str, delta_dir: str):
+        self.path = path
+        self.delta_dir = delta_dir
+        self.base: Optional[MappingSnapshot] = None
+        self.deltas: List[MappingSnapshot] = []
+        # Newest first: the deltas, then the base
+        self._search: List[MappingSnapshot] = []
+        self._applied = set()
+
+    @property
+    def ready(self) -> bool:
+        return self.base is not None
+
+    def __len__(self) -> int:
+        return sum(map(len, self.deltas)) + (len(self.base) if self.base else 0)
+
+    @property
+    def built_at(self) -> Optional[float]:
+        """When the newest data loaded was taken."""
+        snapshots = self.deltas or ([self.base] if self.base else [])
+        return max((snapshot.built_at for snapshot in snapshots), default=None)
+
+    async def get_mapping(
+        self, short_code: str, correlation_id: Optional[str] = None
+    ) -> Optional[URLMapping]:
+        key = short_code.encode()
+        for snapshot in self._search:
+            row = snapshot.find(key)
+            if row >= 0:
+                return snapshot.mapping_at(row, short_code)
+        return None
+
+    def refresh(self) -> int:
+        """
+        Pick up a replaced base and new delta files; returns how many deltas were applied.
+        """
+        self._refresh_base()
+        if self.base is None:
+            return 0
+        try:
+            names = sorted(os.listdir(self.delta_dir))
+        except FileNotFoundError:
+            names = []
+        # Forget files compacted away, so the set does not grow forever
+        self._applied.intersection_update(names)
+        applied = 0
+        for name in names:
+            if not name.endswith(".snap") or name in self._applied:
+                continue
+            self._applied.add(name)
+            try:
+                delta = MappingSnapshot(os.path.join(self.delta_dir, name))
+            except (OSError, ValueError) as e:
+                logger.warning({"action": "apply_delta", "file": name, "error": str(e)})
+                continue
+            if delta.built_at <= self.base.built_at:
+                delta.close()
+                continue
+            self.deltas.append(delta)
+            self._search.insert(0, delta)
+            applied += 1
+            logger.info({"action": "apply_delta", "file": name, "links": len(delta)})
+        return applied
+
+    def _refresh_base(self):
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            if self.base is None:
+                logger.warning({"action": "load_snapshot", "status": "missing", "path": self.path})
+            return
+        if self.base is not None and self.base.inode == inode:
+            return
+        base = MappingSnapshot(self.path)
+        old, self.base = self.base, base
+        kept = [delta for delta in self.deltas if delta.built_at > base.built_at]
+        # Lookups never await, so no request still reads the files closed here
+        for snapshot in [old] + [delta for delta in self.deltas if delta not in kept]:
+            if snapshot is not None:
+                snapshot.close()
+        self.deltas = kept
+        self._search = kept[::-1] + [base]
+        logger.info(
+            {
+                "action": "load_snapshot",
+                "path": self.path,
+                "links": len(base),
+                "built_at": base.built_at,
+                "deltas_kept": len(kept),
+            }
+        )
+
+    async def run_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.exception(
+                    {"action": "refresh_snapshot", "status": "failed", "error": str(e)}
+                )
+
+    def close(self):
+        for snapshot in self.deltas + ([self.base] if self.base else []):
+            snapshot.close()
+        self.base, self.deltas, self._search = None, [], []
+
+
+snapshot_store = SnapshotStore(settings.SNAPSHOT_PATH, settings.SNAPSHOT_DELTA_DIR)
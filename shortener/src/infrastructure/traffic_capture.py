@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, NamedTuple, Optional
+
+from infrastructure.config import settings
+from infrastructure.metrics import traffic_captured
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"URLTRAF\x00"
+VERSION = 1
+
+# magic, version, sample rate
+_HEADER = struct.Struct("<8sHd")
+# arrival (epoch seconds), duration (microseconds), status (0: no response), method, len(path)
+_RECORD = struct.Struct("<dIHBH")
+
+METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "OTHER")
+_METHOD_CODES = {method: code for code, method in enumerate(METHODS)}
+_MAX_DURATION_US = 2**32 - 1
+_MAX_PATH = 2**16 - 1
+
+# Buffered records are written out when this much has piled up or after FLUSH_INTERVAL
+FLUSH_BYTES = 64 * 1024
+FLUSH_INTERVAL = 1.0
+
+
+class CapturedRequest(NamedTuple):
+    arrived_at: float
+    duration: float
+    status: int
+    method: str
+    path: str
+
+
+class TrafficRecorder:
+    """
+    Appends sampled requests to a capture file: a header with the sample rate, then one
+    17-byte record plus the path per request (about 25 bytes for a redirect).
+
+    Records go to an in-memory buffer handed every FLUSH_BYTES or FLUSH_INTERVAL seconds
+    to a single writer thread, so a sampled request costs one struct pack and the event
+    loop never waits on the disk. The file is opened by that thread on the first write and
+    only ever appended to; once it reaches max_bytes recording stops. record() and flush()
+    are only called from the event loop.
+    """
+
+    def __init__(self, path: str, sample_rate: float, max_bytes: int):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.full = False
+        self._file = None
+        self._size = 0
+        self._buffer = bytearray()
+        self._flushed_at = 0.0
+        # One thread, so chunks reach the file in the order they were flushed
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def record(self, arrived_at: float, duration: float, status: int, method: str, path: str):
+        if self.full:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="traffic-capture")
+            self._flushed_at = time.monotonic()
+        encoded = path.encode()[:_MAX_PATH]
+        self._buffer += _RECORD.pack(
+            arrived_at,
+            min(int(duration * 1e6), _MAX_DURATION_US),
+            status,
+            _METHOD_CODES.get(method, _METHOD_CODES["OTHER"]),
+            len(encoded),
+        )
+        self._buffer += encoded
+        traffic_captured.inc()
+        if (
+            len(self._buffer) >= FLUSH_BYTES
+            or time.monotonic() - self._flushed_at >= FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self) -> Optional[asyncio.Future]:
+        """
+        Hand the buffered records to the writer thread; returns the pending write, if any.
+        """
+        self._flushed_at = time.monotonic()
+        if self._executor is None or not self._buffer:
+            return None
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, self._write, chunk)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        if self._size == 0:
+            header = _HEADER.pack(MAGIC, VERSION, self.sample_rate)
+            self._file.write(header)
+            self._size = len(header)
+
+    def _write(self, chunk: bytes):
+        # Runs on the writer thread
+        if self.full:
+            return
+        try:
+            if self._file is None:
+                self._open()
+            if self._size + len(chunk) > self.max_bytes:
+                self.full = True
+                logger.warning(
+                    {
+                        "action": "traffic_capture",
+                        "status": "full",
+                        "path": self.path,
+                        "bytes": self._size,
+                    }
+                )
+                return
+            self._file.write(chunk)
+            self._file.flush()
+            self._size += len(chunk)
+        except OSError as e:
+            self.full = True
+            logger.error(
+                {
+                    "action": "traffic_capture",
+                    "status": "failed",
+                    "path": self.path,
+                    "error": str(e),
+                }
+            )
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def close(self):
+        """
+        Write out what is buffered, close the file and stop the writer thread.
+        """
+        if self._executor is None:
+            return
+        pending = self.flush()
+        if pending is not None:
+            await pending
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_file)
+        self._executor.shutdown()
+        self._executor = None
+
+
+def read_capture(path: str) -> Iterator[CapturedRequest]:
+    """
+    Yield the requests of a capture file in the order they completed (sort by arrived_at
+    for arrival order). A record cut short by a crash ends the capture.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, _ = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} traffic capture")
+    offset = _HEADER.size
+    while offset + _RECORD.size <= len(data):
+        arrived_at, duration_us, status, method, path_len = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        request_path = data[offset : offset + path_len].decode(errors="replace")
+        offset += path_len
+        yield CapturedRequest(arrived_at, duration_us / 1e6, status, METHODS[method], request_path)
+
+
+def capture_sample_rate(path: str) -> float:
+    with open(path, "rb") as f:
+        return _HEADER.unpack(f.read(_HEADER.size))[2]
+
+
+traffic_recorder = TrafficRecorder(
+    settings.TRAFFIC_CAPTURE_PATH,
+    settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+    int(settings.TRAFFIC_CAPTURE_MAX_MB * 2**20),
+)
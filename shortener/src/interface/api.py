@@ -1,31 +1,172 @@
 import logging
+import secrets
+import time
 import uuid
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Request
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from starlette.responses import Response
 
-from application.messaging.publishers import publish_url_created
+from application.hot_keys import HotKeyMonitor
+from application.messaging.publishers import publish_breaker, publish_url_created
+from application.shutdown import drain
+from application.warmup import warmup
+from domain.url_normalization import canonical_url
 from domain.url_shortener_service import URLShortenerService
 from infrastructure.bloom import bloom_filter, bloom_lock
+from infrastructure.cdn import cdn_purger
 from infrastructure.config import settings
 from infrastructure.database import database
-from infrastructure.kafka_client import kafka_client
-from infrastructure.redis_client import redis_client
+from infrastructure.health import HealthMonitor
+from infrastructure.hot_keys import hot_keys
+from infrastructure.insert_batcher import InsertBatcher
+from infrastructure.kafka_client import kafka_client, kafka_producer_breaker
+from infrastructure.local_cache import local_cache
+from infrastructure.metrics import (
+    bloom_false_positive_rate,
+    bloom_fill_ratio,
+    bloom_items,
+    bloom_memory,
+    http_requests_in_flight,
+    short_code_filter_items,
+    short_code_filter_memory,
+    stage_timers,
+    url_shorten_latency,
+)
+from infrastructure.profiling import (
+    capture_cpu_profile,
+    capture_memory_diff,
+    capture_slow_callbacks,
+    event_loop_monitor,
+    profile_lock,
+)
+from infrastructure.rate_limiter import LoadShedder, RateLimiter
+from infrastructure.redis_client import redis_breaker, redis_client
+from infrastructure.short_code_filter import ShortCodeFilter
+from infrastructure.traffic_capture import traffic_recorder
+from interface.capture import TrafficCaptureMiddleware
+from interface.fast_redirect import FastRedirectApp
+from interface.http_cache import redirect_response
+from interface.in_flight import InFlightMiddleware
+from interface.rate_limit import RateLimitMiddleware
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="URL Shortener API", version="1.0.0")
 
+# One service for the whole process; it holds no per-request state. The short-code filter
+# starts empty and unready (rejecting nothing) until warm-up loads it.
+service = URLShortenerService(
+    database,
+    redis_client,
+    bloom_filter,
+    bloom_lock,
+    local_cache,
+    cdn_purger,
+    ShortCodeFilter(0) if settings.SHORT_CODE_FILTER_ENABLED else None,
+    (
+        InsertBatcher(
+            database,
+            settings.INSERT_BATCH_MAX_ROWS,
+            settings.INSERT_BATCH_WAIT_MS / 1000,
+            settings.INSERT_BATCH_CONCURRENCY,
+        )
+        if settings.INSERT_BATCH_MAX_ROWS > 1
+        else None
+    ),
+)
+# Read by the metrics server thread at scrape time, nothing on the request path. The service
+# swaps in new filters (warm-up, rebuilds), so always go through it.
+bloom_items.set_function(lambda: len(service.bloom))
+bloom_memory.set_function(lambda: service.bloom.memory_bytes)
+bloom_fill_ratio.set_function(lambda: service.bloom.fill_ratio)
+bloom_false_positive_rate.set_function(lambda: service.bloom.false_positive_rate)
+if service.code_filter is not None:
+    short_code_filter_memory.set_function(lambda: service.code_filter.memory_bytes)
+    short_code_filter_items.set_function(lambda: len(service.code_filter))
+
+rate_limiter = RateLimiter(
+    redis_client,
+    settings.RATE_LIMIT_RATE,
+    settings.RATE_LIMIT_BURST,
+    settings.RATE_LIMIT_LEASE_SECONDS,
+    settings.RATE_LIMIT_MAX_CLIENTS,
+)
+health_monitor = HealthMonitor(
+    probes={
+        "postgres": database.probe,
+        "redis": redis_client.probe,
+        "kafka": kafka_client.probe,
+    },
+    thresholds={
+        "postgres": settings.HEALTH_POSTGRES_SLOW_SECONDS,
+        "redis": settings.HEALTH_REDIS_SLOW_SECONDS,
+        "kafka": settings.HEALTH_KAFKA_SLOW_SECONDS,
+    },
+    breakers={"redis": [redis_breaker], "kafka": [kafka_producer_breaker, publish_breaker]},
+    critical=settings.HEALTH_CRITICAL_DEPENDENCIES.replace(" ", "").split(","),
+)
+# Started by main.py; the admin endpoint reads the last published top-N from it
+hot_key_monitor = HotKeyMonitor(service, hot_keys)
+load_shedder = LoadShedder(
+    database,
+    event_loop_monitor,
+    settings.LOAD_SHED_POOL_WAIT_SECONDS,
+    settings.LOAD_SHED_LOOP_LAG_SECONDS,
+)
+
 
 class ShortenRequest(BaseModel):
     longUrl: str
+    # Optional expiry, either absolute or relative; at most one may be given
+    expiresAt: Optional[datetime] = None
+    ttlSeconds: Optional[int] = Field(None, gt=0)
+
+
+def resolve_expiry(request: ShortenRequest, now: float) -> Optional[float]:
+    """
+    Epoch seconds at which the requested link expires, after applying the configured
+    default and maximum TTLs. None means the link never expires.
+    """
+    if request.expiresAt is not None and request.ttlSeconds is not None:
+        raise HTTPException(status_code=400, detail="Give either expiresAt or ttlSeconds")
+    if request.expiresAt is not None:
+        expires_at = request.expiresAt
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        expires = expires_at.timestamp()
+        if expires <= now:
+            raise HTTPException(status_code=400, detail="expiresAt must be in the future")
+    elif request.ttlSeconds is not None:
+        expires = now + request.ttlSeconds
+    elif settings.LINK_DEFAULT_TTL_SECONDS > 0:
+        expires = now + settings.LINK_DEFAULT_TTL_SECONDS
+    else:
+        expires = None
+
+    if settings.LINK_MAX_TTL_SECONDS > 0:
+        expires = min(expires or float("inf"), now + settings.LINK_MAX_TTL_SECONDS)
+    return expires
 
 
 @app.on_event("startup")
 async def startup():
     app.state.bloom_filter = bloom_filter
     app.state.bloom_lock = bloom_lock
+    health_monitor.start()
+    if settings.PROFILING_ENABLED or settings.LOAD_SHED_LOOP_LAG_SECONDS > 0:
+        event_loop_monitor.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await event_loop_monitor.stop()
+    await health_monitor.stop()
+    await traffic_recorder.close()
 
 
 def get_correlation_id(request: Request) -> str:
@@ -35,13 +176,12 @@ def get_correlation_id(request: Request) -> str:
 
 @app.post("/shorten")
 async def shorten(request: ShortenRequest, req: Request):
+    start = perf_counter()
     correlation_id = get_correlation_id(req)
+    expires_at = resolve_expiry(request, time.time())
 
-    service = URLShortenerService(
-        database, redis_client, app.state.bloom_filter, app.state.bloom_lock
-    )
-    short_code, newly_created = await service.shorten_url(
-        request.longUrl, correlation_id=correlation_id
+    short_code, created = await service.shorten_url(
+        request.longUrl, correlation_id=correlation_id, expires_at=expires_at
     )
     if not short_code:
         logger.warning(
@@ -54,8 +194,20 @@ async def shorten(request: ShortenRequest, req: Request):
         )
         raise HTTPException(status_code=400, detail="Invalid URL")
 
-    if newly_created:
-        await publish_url_created(short_code, request.longUrl, correlation_id=correlation_id)
+    if created:
+        publish_start = perf_counter()
+        try:
+            await publish_url_created(
+                short_code,
+                created.long_url,
+                correlation_id=correlation_id,
+                expires_at=created.expires_at,
+                created_at=created.created_at,
+            )
+        except Exception:
+            stage_timers["publish", "error"].observe(perf_counter() - publish_start)
+            raise
+        stage_timers["publish", "ok"].observe(perf_counter() - publish_start)
 
     logger.info(
         {
@@ -66,45 +218,134 @@ async def shorten(request: ShortenRequest, req: Request):
             "correlation_id": correlation_id,
         }
     )
-    return {"shortUrl": f"{settings.BASE_URL}/{short_code}"}
+    url_shorten_latency.observe(perf_counter() - start)
+    body = {"shortUrl": f"{settings.BASE_URL}/{short_code}"}
+    if created and expires_at is not None:
+        body["expiresAt"] = datetime.fromtimestamp(expires_at, timezone.utc).isoformat()
+    return body
 
 
 @app.get("/health")
 async def health_check():
-    # Basic liveness check
-    return {"status": "ok", "service": "url_shortener"}
+    # Liveness: dependency trouble is reported but does not fail it, since restarting this
+    # process would not fix a shared dependency; a stalled probe loop does.
+    if health_monitor.stalled():
+        status, code = "stalled", 503
+    else:
+        status, code = ("degraded" if health_monitor.failing() else "ok"), 200
+    body = {"status": status, "service": "url_shortener", **health_monitor.report()}
+    return JSONResponse(body, status_code=code)
 
 
 @app.get("/ready")
 async def readiness_check():
-    # Attempt simple checks to ensure Kafka and DB are ready
-    # For DB, simple query or rely on database connect
-    # For Kafka, ensure producer is connected
-    if not database.pool:
-        return {"status": "not_ready", "reason": "database_not_connected"}, 503
-    if not kafka_client.producer_connected:
-        return {"status": "not_ready", "reason": "kafka_producer_not_connected"}, 503
+    # Answered from the last background probes; nothing is contacted per call
+    reasons = health_monitor.failing()
+    # Bloom filter, statement cache and local cache still loading
+    if not warmup.ready:
+        reasons.append("warming_up")
+    # Shutting down: load balancers should stop sending traffic before the listener closes
+    if drain.draining:
+        reasons.append("draining")
+    body = {
+        "status": "not_ready" if reasons else "ready",
+        "reasons": reasons,
+        **health_monitor.report(),
+    }
+    return JSONResponse(body, status_code=503 if reasons else 200)
+
 
-    return {"status": "ready"}
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if settings.ADMIN_TOKEN and not secrets.compare_digest(
+        x_admin_token or "", settings.ADMIN_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="Forbidden")
 
 
-@app.get("/metrics")
-async def metrics():
-    # Expose prometheus metrics
-    from starlette.responses import Response
+if settings.PROFILING_ENABLED:
+    # Registered only when opted in, so a disabled deployment carries no profiling code path.
 
-    data = generate_latest()
-    return Response(content=data, media_type=CONTENT_TYPE_LATEST)
+    @app.get("/admin/profile/cpu", dependencies=[Depends(require_admin)])
+    async def profile_cpu(
+        seconds: float = Query(10.0, gt=0, le=settings.PROFILING_MAX_SECONDS),
+    ):
+        if profile_lock.locked():
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        async with profile_lock:
+            folded = await capture_cpu_profile(seconds)
+        return PlainTextResponse(folded)
+
+    @app.get("/admin/profile/memory", dependencies=[Depends(require_admin)])
+    async def profile_memory(
+        seconds: float = Query(10.0, gt=0, le=settings.PROFILING_MAX_SECONDS),
+        top: int = Query(25, gt=0, le=500),
+    ):
+        if profile_lock.locked():
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        async with profile_lock:
+            stats = await capture_memory_diff(seconds, top)
+        return {"seconds": seconds, "top": stats}
+
+    @app.get("/admin/profile/slow-callbacks", dependencies=[Depends(require_admin)])
+    async def profile_slow_callbacks(
+        seconds: float = Query(10.0, gt=0, le=settings.PROFILING_MAX_SECONDS),
+        top: int = Query(25, gt=0, le=500),
+    ):
+        if profile_lock.locked():
+            raise HTTPException(status_code=409, detail="A profile is already running")
+        async with profile_lock:
+            callbacks = await capture_slow_callbacks(seconds, settings.SLOW_CALLBACK_SECONDS, top)
+        return {
+            "seconds": seconds,
+            "threshold_seconds": settings.SLOW_CALLBACK_SECONDS,
+            "callbacks": callbacks,
+        }
 
+    @app.get("/admin/profile/loop", dependencies=[Depends(require_admin)])
+    async def profile_loop():
+        return event_loop_monitor.snapshot()
 
-@app.get("/{short_code}")
+
+if settings.ADMIN_TOKEN:
+
+    @app.post("/admin/purge/{short_code}", dependencies=[Depends(require_admin)])
+    async def purge_short_code(short_code: str):
+        await service.invalidate([short_code])
+        return {"status": "purged", "short_code": short_code}
+
+    @app.get("/admin/hot-keys", dependencies=[Depends(require_admin)])
+    async def list_hot_keys(limit: int = Query(settings.HOT_KEYS_TOP_N, gt=0, le=1000)):
+        # Live counts since the last halving, and the top-N as last published
+        total = hot_keys.total
+        return {
+            "capacity": hot_keys.capacity,
+            "tracked": len(hot_keys),
+            "requests": total,
+            "hot_keys": [
+                {
+                    "short_code": key.short_code,
+                    "count": key.count,
+                    "guaranteed": key.count - key.error,
+                    "share": round(key.count / total, 4),
+                }
+                for key in hot_keys.top(limit)
+            ],
+            "published": {
+                key.short_code: round(hot_key_monitor.rate(key.count), 3)
+                for key in hot_key_monitor.current
+            },
+            "pinned": sorted(local_cache.pinned),
+        }
+
+
+@app.api_route("/{short_code}", methods=["GET", "HEAD"])
 async def redirect_short_code(short_code: str, req: Request):
+    # Normally served by FastRedirectApp; reached for codes outside SHORT_CODE_PATTERN
     correlation_id = get_correlation_id(req)
-    service = URLShortenerService(
-        database, redis_client, app.state.bloom_filter, app.state.bloom_lock
-    )
-    long_url = await service.get_long_url(short_code, correlation_id=correlation_id)
-    if not long_url:
+    if hot_keys.enabled:
+        hot_keys.add(short_code)
+    mapping = await service.get_mapping(short_code, correlation_id=correlation_id)
+    if not mapping:
         logger.warning(
             {
                 "action": "redirect",
@@ -114,17 +355,36 @@ async def redirect_short_code(short_code: str, req: Request):
             }
         )
         raise HTTPException(status_code=404, detail="Not Found")
+    if mapping.is_expired(time.time()):
+        raise HTTPException(status_code=410, detail="Gone")
 
     logger.info(
         {
             "action": "redirect",
             "status": "found",
             "short_code": short_code,
-            "long_url": long_url,
+            "long_url": mapping.long_url,
             "correlation_id": correlation_id,
         }
     )
 
-    from fastapi.responses import RedirectResponse
+    status, headers = redirect_response(
+        mapping, req.headers.get("if-none-match"), req.headers.get("if-modified-since")
+    )
+    response = Response(status_code=status)
+    response.raw_headers = headers
+    return response
+
+
+# What the server runs: redirects short-circuit here, everything else goes to FastAPI
+asgi_app = FastRedirectApp(app, service, hot_keys if hot_keys.enabled else None)
+
+if settings.RATE_LIMIT_ENABLED or load_shedder.enabled:
+    asgi_app = RateLimitMiddleware(asgi_app, rate_limiter, load_shedder)
+
+# Outside the rate limiter, so requests it rejects are captured (and replayed) too
+if settings.TRAFFIC_CAPTURE_SAMPLE_RATE > 0:
+    asgi_app = TrafficCaptureMiddleware(asgi_app, traffic_recorder)
 
-    return RedirectResponse(url=long_url, status_code=301)
+asgi_app = InFlightMiddleware(asgi_app, drain)
+http_requests_in_flight.set_function(lambda: asgi_app.in_flight)
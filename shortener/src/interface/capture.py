@@ -0,0 +1,42 @@
+import random
+import time
+
+from infrastructure.traffic_capture import TrafficRecorder
+
+
+class TrafficCaptureMiddleware:
+    """
+    ASGI middleware recording a random sample of HTTP requests (method, path, response
+    status, arrival time and latency) for replay with benchmarks/replay.py.
+
+    A request that is not sampled costs one random() call. Sampled ones are timed from
+    arrival to the end of the response, including the middlewares inside this one; status
+    0 means no response was started (the request failed or was cancelled).
+    """
+
+    def __init__(self, app, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+        self.sample_rate = recorder.sample_rate
+        self._random = random.random
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._random() >= self.sample_rate:
+            return await self.app(scope, receive, send)
+
+        arrived_at = time.time()
+        start = time.perf_counter()
+        status = 0
+
+        async def capture_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture_send)
+        finally:
+            self.recorder.record(
+                arrived_at, time.perf_counter() - start, status, scope["method"], scope["path"]
+            )
@@ -0,0 +1,59 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from application.shutdown import drain
+from infrastructure.metrics import (
+    http_requests_in_flight,
+    snapshot_age,
+    snapshot_delta_files,
+    snapshot_links,
+)
+from infrastructure.snapshot import snapshot_store
+from interface.fast_redirect import FastRedirectApp
+from interface.in_flight import InFlightMiddleware
+
+# Read-only API of the edge replicas (src/edge.py): the same redirects as interface.api,
+# answered from the memory-mapped snapshot, and no way to create links
+app = FastAPI(title="URL Shortener Edge API", version="1.0.0")
+
+snapshot_links.set_function(lambda: len(snapshot_store))
+snapshot_delta_files.set_function(lambda: len(snapshot_store.deltas))
+snapshot_age.set_function(lambda: time.time() - (snapshot_store.built_at or time.time()))
+
+
+def snapshot_report() -> dict:
+    return {
+        "snapshot": {
+            "links": len(snapshot_store),
+            "deltas": len(snapshot_store.deltas),
+            "built_at": snapshot_store.built_at,
+        }
+    }
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "ok", "service": "url_shortener_edge", **snapshot_report()}
+
+
+@app.get("/ready")
+async def readiness_check():
+    reasons = []
+    if not snapshot_store.ready:
+        reasons.append("no_snapshot")
+    if drain.draining:
+        reasons.append("draining")
+    body = {"status": "not_ready" if reasons else "ready", "reasons": reasons, **snapshot_report()}
+    return JSONResponse(body, status_code=503 if reasons else 200)
+
+
+@app.post("/shorten")
+async def shorten():
+    return JSONResponse({"detail": "This replica is read-only"}, status_code=405)
+
+
+# Redirects never reach FastAPI; the snapshot store stands in for URLShortenerService
+asgi_app = InFlightMiddleware(FastRedirectApp(app, snapshot_store), drain)
+http_requests_in_flight.set_function(lambda: asgi_app.in_flight)
@@ -0,0 +1,122 @@
+import logging
+import re
+import time
+
+from interface.http_cache import redirect_response
+
+logger = logging.getLogger(__name__)
+
+# Same character set the catch-all route would accept and the short_code column can hold
+SHORT_CODE_PATTERN = re.compile(r"[0-9A-Za-z_-]{1,20}")
+
+_NOT_FOUND_START = {
+    "type": "http.response.start",
+    "status": 404,
+    "headers": [(b"content-type", b"application/json"), (b"content-length", b"22")],
+}
+_NOT_FOUND_BODY = {"type": "http.response.body", "body": b'{"detail":"Not Found"}'}
+_GONE_START = {
+    "type": "http.response.start",
+    "status": 410,
+    "headers": [(b"content-type", b"application/json"), (b"content-length", b"17")],
+}
+_GONE_BODY = {"type": "http.response.body", "body": b'{"detail":"Gone"}'}
+_ERROR_START = {
+    "type": "http.response.start",
+    "status": 500,
+    "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", b"21")],
+}
+_ERROR_BODY = {"type": "http.response.body", "body": b"Internal Server Error"}
+_EMPTY_BODY = {"type": "http.response.body", "body": b""}
+
+
+def _request_headers(scope):
+    """Pick the few request headers a redirect needs in one pass over the raw list."""
+    correlation_id = if_none_match = if_modified_since = None
+    for name, value in scope["headers"]:
+        if name == b"x-correlation-id":
+            correlation_id = value.decode("latin-1")
+        elif name == b"if-none-match":
+            if_none_match = value.decode("latin-1")
+        elif name == b"if-modified-since":
+            if_modified_since = value.decode("latin-1")
+    return correlation_id, if_none_match, if_modified_since
+
+
+class FastRedirectApp:
+    """
+    ASGI app mounted in front of FastAPI that serves GET and HEAD /{short_code} itself.
+
+    Redirects skip routing, request/dependency construction and response classes; they
+    reuse one URLShortenerService and only read X-Correlation-Id when it is sent. Any
+    other request, including single-segment paths owned by a FastAPI route, is handed to
+    the wrapped app untouched. Every code looked up, found or not, is counted by hot_keys
+    when one is given.
+    """
+
+    def __init__(self, app, service, hot_keys=None):
+        self.app = app
+        self.service = service
+        self.hot_keys = hot_keys
+        self.reserved = frozenset(
+            route.path[1:] for route in app.routes if "{" not in getattr(route, "path", "{")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+        short_code = scope["path"][1:]
+        if short_code in self.reserved or not SHORT_CODE_PATTERN.fullmatch(short_code):
+            return await self.app(scope, receive, send)
+
+        if self.hot_keys is not None:
+            self.hot_keys.add(short_code)
+        correlation_id, if_none_match, if_modified_since = _request_headers(scope)
+        try:
+            mapping = await self.service.get_mapping(short_code, correlation_id=correlation_id)
+        except Exception as e:
+            logger.exception(
+                {
+                    "action": "redirect",
+                    "status": "error",
+                    "short_code": short_code,
+                    "error": str(e),
+                    "correlation_id": correlation_id,
+                }
+            )
+            await send(_ERROR_START)
+            await send(_ERROR_BODY)
+            return
+
+        if not mapping:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    {
+                        "action": "redirect",
+                        "status": "not_found",
+                        "short_code": short_code,
+                        "correlation_id": correlation_id,
+                    }
+                )
+            await send(_NOT_FOUND_START)
+            await send(_NOT_FOUND_BODY)
+            return
+
+        if mapping.is_expired(time.time()):
+            await send(_GONE_START)
+            await send(_GONE_BODY)
+            return
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                {
+                    "action": "redirect",
+                    "status": "found",
+                    "short_code": short_code,
+                    "long_url": mapping.long_url,
+                    "correlation_id": correlation_id,
+                }
+            )
+        status, headers = redirect_response(mapping, if_none_match, if_modified_since)
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send(_EMPTY_BODY)
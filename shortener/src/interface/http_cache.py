@@ -0,0 +1,109 @@
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+from domain.models import URLMapping
+from infrastructure.config import settings
+
+REDIRECT_STATUSES = (301, 302, 307, 308)
+if settings.REDIRECT_STATUS_CODE not in REDIRECT_STATUSES:
+    raise ValueError(
+        f"REDIRECT_STATUS_CODE must be one of {REDIRECT_STATUSES}, "
+        f"got {settings.REDIRECT_STATUS_CODE}"
+    )
+
+# Matches starlette.responses.RedirectResponse so both paths emit identical Location headers
+LOCATION_SAFE_CHARS = ":/%#?=@[]!$&'()*+,;"
+
+SURROGATE_KEY_HEADER = settings.SURROGATE_KEY_HEADER.lower().encode("latin-1")
+CONTENT_LENGTH_ZERO = (b"content-length", b"0")
+DEFAULT_CACHE_CONTROL = (
+    b"cache-control",
+    f"public, max-age={settings.REDIRECT_CACHE_MAX_AGE}, "
+    f"s-maxage={settings.REDIRECT_CACHE_S_MAXAGE}".encode(),
+)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def etag_for(mapping: URLMapping) -> Optional[str]:
+    """Changes whenever the code is (re)created, e.g. after it expired and was reissued."""
+    if mapping.created_at is None:
+        return None
+    return f'"{mapping.short_code}-{int(mapping.created_at):x}"'
+
+
+@lru_cache(maxsize=4096)
+def _static_headers(short_code: str, long_url: str, created_at: Optional[float]) -> tuple:
+    # Everything that only depends on the mapping itself, built once per hot mapping
+    mapping = URLMapping(short_code, long_url, created_at)
+    headers = [
+        (b"location", quote(long_url, safe=LOCATION_SAFE_CHARS).encode("latin-1")),
+        (SURROGATE_KEY_HEADER, short_code.encode()),
+    ]
+    if created_at is not None:
+        headers.append((b"last-modified", http_date(created_at).encode()))
+        headers.append((b"etag", etag_for(mapping).encode()))
+    return tuple(headers)
+
+
+def _cache_headers(mapping: URLMapping, now: float) -> Headers:
+    if mapping.expires_at is None:
+        return [DEFAULT_CACHE_CONTROL]
+    # Never let a cache keep serving the redirect past the link's expiry
+    remaining = max(0, int(mapping.expires_at - now))
+    max_age = min(settings.REDIRECT_CACHE_MAX_AGE, remaining)
+    s_maxage = min(settings.REDIRECT_CACHE_S_MAXAGE, remaining)
+    return [
+        (b"cache-control", f"public, max-age={max_age}, s-maxage={s_maxage}".encode()),
+        (b"expires", http_date(mapping.expires_at).encode()),
+    ]
+
+
+def is_not_modified(
+    mapping: URLMapping, if_none_match: Optional[str], if_modified_since: Optional[str]
+) -> bool:
+    """
+    Evaluate conditional request headers (RFC 9110 13.2.2): If-None-Match wins over
+    If-Modified-Since, and ETags compare weakly.
+    """
+    if if_none_match is not None:
+        etag = etag_for(mapping)
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+    if if_modified_since is not None and mapping.created_at is not None:
+        since = parse_http_date(if_modified_since)
+        return since is not None and int(mapping.created_at) <= since
+    return False
+
+
+def redirect_response(
+    mapping: URLMapping,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[str] = None,
+) -> Tuple[int, Headers]:
+    """
+    Status and raw headers for a redirect to mapping, honouring conditional requests.
+    """
+    headers = list(_static_headers(mapping.short_code, mapping.long_url, mapping.created_at))
+    headers.extend(_cache_headers(mapping, time.time()))
+    if is_not_modified(mapping, if_none_match, if_modified_since):
+        return 304, headers
+    headers.append(CONTENT_LENGTH_ZERO)
+    return settings.REDIRECT_STATUS_CODE, headers
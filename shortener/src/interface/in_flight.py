@@ -0,0 +1,29 @@
+import asyncio
+
+from infrastructure.metrics import drain_dropped_requests
+
+
+class InFlightMiddleware:
+    """
+    Outermost ASGI middleware counting HTTP requests in progress, so a drain can report
+    how many it waited for and how many were still running when it gave up on them.
+    """
+
+    def __init__(self, app, drain):
+        self.app = app
+        self.drain = drain
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        except asyncio.CancelledError:
+            # uvicorn cancels requests still running at the drain deadline
+            if self.drain.draining:
+                drain_dropped_requests.inc()
+            raise
+        finally:
+            self.in_flight -= 1
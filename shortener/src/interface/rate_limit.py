@@ -0,0 +1,73 @@
+import logging
+import math
+
+from infrastructure.config import settings
+from infrastructure.metrics import rate_limit_requests
+from infrastructure.rate_limiter import client_key
+
+logger = logging.getLogger(__name__)
+
+_TOO_MANY_BODY = {"type": "http.response.body", "body": b'{"detail":"Too Many Requests"}'}
+
+# Label children bound once, not looked up per request
+_ACCEPTED = rate_limit_requests.labels(decision="accepted", reason="ok")
+_REJECTED_CLIENT = rate_limit_requests.labels(decision="rejected", reason="client_limit")
+_REJECTED_OVERLOAD = rate_limit_requests.labels(decision="rejected", reason="overload")
+_LIMITER_ERROR = rate_limit_requests.labels(decision="accepted", reason="limiter_error")
+
+
+def _too_many_start(retry_after: float) -> dict:
+    return {
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", b"30"),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    }
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware admitting write requests (POST) through the load shedder, then the
+    caller's token bucket; rejected requests get 429 with Retry-After before any parsing.
+
+    Redirects and other reads pass straight through: they are served from cache and are
+    what load shedding protects. If the limiter itself fails the request is let through.
+    """
+
+    def __init__(self, app, limiter, shedder):
+        self.app = app
+        self.limiter = limiter
+        self.shedder = shedder
+        self.overload_retry_after = _too_many_start(settings.LOAD_SHED_RETRY_AFTER_SECONDS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+
+        if self.shedder.enabled:
+            reason = self.shedder.overloaded()
+            if reason is not None:
+                _REJECTED_OVERLOAD.inc()
+                logger.debug({"action": "load_shed", "status": "rejected", "reason": reason})
+                await send(self.overload_retry_after)
+                await send(_TOO_MANY_BODY)
+                return
+
+        if settings.RATE_LIMIT_ENABLED:
+            try:
+                allowed, retry_after = await self.limiter.acquire(client_key(scope))
+            except Exception as e:
+                _LIMITER_ERROR.inc()
+                logger.warning({"action": "rate_limit", "status": "error", "error": str(e)})
+                return await self.app(scope, receive, send)
+            if not allowed:
+                _REJECTED_CLIENT.inc()
+                await send(_too_many_start(retry_after))
+                await send(_TOO_MANY_BODY)
+                return
+
+        _ACCEPTED.inc()
+        await self.app(scope, receive, send)
@@ -2,46 +2,71 @@ import asyncio
 import logging
 import signal
 
-from application.messaging.callbacks import message_callback
-from application.server_runner import run_api_server
-from application.shutdown import shutdown
+from application.messaging.callbacks import build_message_callback
+from application.partition_keeper import PartitionKeeper
+from application.reaper import ExpiredLinkReaper
+from application.server_runner import build_api_server, run_api_server
+from application.shutdown import drain
+from application.warmup import warmup
 from infrastructure.config import settings
 from infrastructure.database import database
+from infrastructure.hot_keys import hot_keys
 from infrastructure.kafka_client import kafka_client
 from infrastructure.metrics import start_metrics_server
 from infrastructure.redis_client import redis_client
+from interface.api import asgi_app, hot_key_monitor, service
 
 logger = logging.getLogger(__name__)
 
 
 async def main():
+    warmup.begin()
     logger.info({"action": "startup", "message": "Starting application"})
-
-    await database.connect()
-    await redis_client.connect()
-    await kafka_client.connect_producer()
-    await kafka_client.connect_consumer(settings.URL_CREATED_TOPIC)
-
     start_metrics_server(port=settings.METRICS_PORT)
 
-    api_task = asyncio.create_task(run_api_server(host="0.0.0.0", port=8001))
-    consumer_task = asyncio.create_task(kafka_client.consume_forever(message_callback))
+    # Independent dependencies connect (and back off) side by side, not one after another
+    await asyncio.gather(
+        database.connect(),
+        redis_client.connect(),
+        kafka_client.connect_producer(),
+        # No consumer group: this replica reads every partition from the end of the topic
+        # (warm-up loads everything older from Postgres), and a restarted pod leaves no
+        # group or offsets behind
+        kafka_client.connect_consumer(
+            settings.URL_CREATED_TOPIC, group_id=None, auto_offset_reset="latest"
+        ),
+    )
+    warmup.phase_done("connect")
+
+    server = drain.server = build_api_server(asgi_app, host="0.0.0.0", port=8001)
+    api_task = asyncio.create_task(run_api_server(server))
+    consumer_task = asyncio.create_task(
+        kafka_client.consume_batches(
+            build_message_callback(service),
+            max_records=settings.EVENT_BATCH_SIZE,
+            wait_ms=settings.EVENT_BATCH_WAIT_MS,
+        )
+    )
+    # /ready answers 503 until this finishes
+    background_tasks = [asyncio.create_task(warmup.run(service))]
+    if settings.REAPER_ENABLED:
+        background_tasks.append(asyncio.create_task(ExpiredLinkReaper(service).run_forever()))
+    if database.layout == "month":
+        background_tasks.append(asyncio.create_task(PartitionKeeper(database).run_forever()))
+    if hot_keys.enabled:
+        background_tasks.append(asyncio.create_task(hot_key_monitor.run_forever()))
 
     loop = asyncio.get_event_loop()
     for s in (signal.SIGINT, signal.SIGTERM):
-        loop.add_signal_handler(s, lambda: asyncio.create_task(shutdown()))
-
-    done, pending = await asyncio.wait(
-        [api_task, consumer_task], return_when=asyncio.FIRST_EXCEPTION
-    )
+        loop.add_signal_handler(s, drain.request)
 
-    for task in pending:
-        task.cancel()
+    # Serve until a signal arrives (or the server stops on its own), then drain
+    requested = asyncio.create_task(drain.wait_requested())
+    await asyncio.wait([api_task, requested], return_when=asyncio.FIRST_COMPLETED)
+    requested.cancel()
 
     logger.info({"action": "shutdown", "message": "Shutting down gracefully..."})
-    await redis_client.close()
-    await database.close()
-    await kafka_client.close()
+    await drain.run(service, api_task, consumer_task, background_tasks)
     logger.info({"action": "shutdown", "message": "Shutdown complete."})
 
 
@@ -0,0 +1,92 @@
+"""
+Report how many existing url_mappings rows URL canonicalization would collapse.
+
+Nothing is modified. Two keyset-paginated passes over every shard: the first collects rows
+whose long_url is not canonical (with the rules that change it), the second finds rows
+already stored under one of those canonical forms. Memory grows with the number of
+non-canonical rows only:
+
+    python src/normalization_report.py [--examples 20] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from collections import Counter, defaultdict
+
+from domain.url_normalization import canonical_url, normalization_changes
+from infrastructure.database import database
+
+logger = logging.getLogger(__name__)
+
+
+async def build_report(batch_size: int, examples: int) -> dict:
+    rules: Counter = Counter()
+    groups = defaultdict(list)  # canonical url -> short codes stored under other spellings
+    scanned = invalid = 0
+    async for batch in database.iter_mappings(batch_size):
+        for mapping in batch:
+            scanned += 1
+            canonical = canonical_url(mapping.long_url, normalize=True)
+            if canonical is None:
+                invalid += 1
+            elif canonical != mapping.long_url:
+                rules.update(normalization_changes(mapping.long_url))
+                groups[canonical].append(mapping.short_code)
+
+    canonical_rows = {}
+    async for batch in database.iter_mappings(batch_size):
+        for mapping in batch:
+            if mapping.long_url in groups:
+                canonical_rows[mapping.long_url] = mapping.short_code
+
+    # Every group keeps one row: the canonical one if it exists, else one of its spellings
+    collapsing = sum(
+        len(codes) if url in canonical_rows else len(codes) - 1 for url, codes in groups.items()
+    )
+    merged = [
+        {"canonical": url, "kept": canonical_rows.get(url), "merged": codes}
+        for url, codes in groups.items()
+        if url in canonical_rows or len(codes) > 1
+    ]
+    return {
+        "rows_scanned": scanned,
+        "rows_invalid": invalid,
+        "rows_not_canonical": sum(len(codes) for codes in groups.values()),
+        "rows_collapsing": collapsing,
+        "rows_after": scanned - collapsing,
+        "rules": dict(rules.most_common()),
+        "groups_merging": len(merged),
+        "examples": merged[:examples],
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    await database.connect()
+    try:
+        return await build_report(args.batch_size, args.examples)
+    finally:
+        await database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--examples", type=int, default=20)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    sys.stdout.write(report + "\n")
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    from infrastructure.logging_config import setup_logging
+
+    setup_logging()
+    main()
@@ -0,0 +1,131 @@
+"""
+Maintenance of month-partitioned url_mappings (PG_PARTITIONING=month) on every shard.
+
+    python src/partitions.py list
+    python src/partitions.py create [--months-ahead 3] [--months-back 0]
+    python src/partitions.py detach --older-than-months 12 [--drop] [--force]
+
+Replicas keep PG_PARTITION_MONTHS_AHEAD months created while they run; "create" covers
+longer horizons or past months (inserts into a month without a partition fail).
+"detach" uses DETACH PARTITION ... CONCURRENTLY, so lookups and inserts keep running, and
+refuses months that still hold unexpired links unless --force is given. Detached tables
+are left in place for backup or archival unless --drop is given.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import asyncpg
+
+from infrastructure.config import settings
+from infrastructure.database import NOT_EXPIRED, shard_specs
+from infrastructure.partitioning import (
+    add_months,
+    attached_partitions,
+    current_layout,
+    ensure_month_partitions,
+    partition_month,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def this_month():
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+async def list_partitions(conn: asyncpg.Connection) -> List[Dict]:
+    partitions = []
+    for name in await attached_partitions(conn):
+        rows = await conn.fetchval(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass($1);", name
+        )
+        partitions.append({"partition": name, "estimated_rows": max(rows, 0)})
+    return partitions
+
+
+async def create_partitions(conn: asyncpg.Connection, months_ahead: int, months_back: int):
+    first = add_months(this_month(), -months_back)
+    return await ensure_month_partitions(conn, first, months_back + months_ahead + 1)
+
+
+async def detach_partitions(
+    conn: asyncpg.Connection, older_than_months: int, drop: bool, force: bool
+) -> List[str]:
+    """
+    Detach every month partition that ends before the cutoff month.
+    """
+    cutoff = add_months(this_month(), -older_than_months)
+    detached = []
+    for name in await attached_partitions(conn):
+        month = partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        if not force and await conn.fetchval(
+            f"SELECT EXISTS (SELECT 1 FROM {name} WHERE {NOT_EXPIRED});"
+        ):
+            logger.warning(
+                {"action": "detach_partition", "partition": name, "status": "has_active_links"}
+            )
+            continue
+        await conn.execute(f"ALTER TABLE url_mappings DETACH PARTITION {name} CONCURRENTLY;")
+        if drop:
+            await conn.execute(f"DROP TABLE {name};")
+        logger.info(
+            {
+                "action": "detach_partition",
+                "partition": name,
+                "status": "dropped" if drop else "detached",
+            }
+        )
+        detached.append(name)
+    return detached
+
+
+async def run(args: argparse.Namespace):
+    for shard, spec in shard_specs(args.shards).items():
+        # DETACH ... CONCURRENTLY cannot run inside a transaction block, so no pool here
+        conn = await asyncpg.connect(**spec)
+        try:
+            layout = await current_layout(conn)
+            if layout != "month":
+                logger.warning(
+                    {"action": "partitions", "shard": shard, "status": "skipped", "layout": layout}
+                )
+                continue
+            if args.command == "list":
+                result = await list_partitions(conn)
+            elif args.command == "create":
+                result = await create_partitions(conn, args.months_ahead, args.months_back)
+            else:
+                result = await detach_partitions(
+                    conn, args.older_than_months, args.drop, args.force
+                )
+            logger.info({"action": args.command, "shard": shard, "result": result})
+        finally:
+            await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--shards", default=settings.PG_SHARDS, help="layout (name=dsn,...)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show attached partitions")
+    create = commands.add_parser("create", help="pre-create month partitions")
+    create.add_argument("--months-ahead", type=int, default=settings.PG_PARTITION_MONTHS_AHEAD)
+    create.add_argument("--months-back", type=int, default=0)
+    detach = commands.add_parser("detach", help="detach month partitions past retention")
+    detach.add_argument("--older-than-months", type=int, required=True)
+    detach.add_argument("--drop", action="store_true", help="drop tables after detaching")
+    detach.add_argument("--force", action="store_true", help="detach even with active links")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    from infrastructure.logging_config import setup_logging
+
+    setup_logging()
+    main()
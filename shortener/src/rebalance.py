@@ -0,0 +1,140 @@
+"""
+Online rebalancing of url_mappings between two shard layouts.
+
+Every row whose owner differs between the old and new consistent-hash rings is moved in
+keyset-paginated batches: copied to its new shard (ON CONFLICT DO NOTHING), then deleted
+from the old one, so a row is always present on at least one of them. Run the service with
+PG_SHARDS=<new> and PG_SHARDS_PREVIOUS=<old> meanwhile; lookups that miss on the new owner
+fall back to the old one. The move is idempotent; re-run it until nothing moves, then drop
+PG_SHARDS_PREVIOUS.
+
+    python src/rebalance.py --from "s0=postgresql://..." --to "s0=postgresql://...,s1=..."
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from typing import Dict
+
+import asyncpg
+
+from infrastructure.config import settings
+from infrastructure.database import MAPPING_COLUMNS, Database, copy_mappings
+from infrastructure.partitioning import current_layout
+from infrastructure.sharding import HashRing, parse_shards
+
+logger = logging.getLogger(__name__)
+
+
+SELECT_BATCH_QUERY = f"""
+SELECT {", ".join(name for name, _ in MAPPING_COLUMNS)} FROM url_mappings
+WHERE short_code > $1 ORDER BY short_code LIMIT $2;
+"""
+DELETE_QUERY = "DELETE FROM url_mappings WHERE short_code = ANY($1::text[]);"
+
+
+async def _move_from(
+    source: str,
+    pools: Dict[str, asyncpg.Pool],
+    layouts: Dict[str, str],
+    new_ring: HashRing,
+    batch_size: int,
+    dry_run: bool,
+    moved: Counter,
+):
+    """
+    Walk one source shard in short_code order and move rows it no longer owns.
+    """
+    after = ""
+    while True:
+        rows = await pools[source].fetch(SELECT_BATCH_QUERY, after, batch_size)
+        if not rows:
+            return
+        after = rows[-1]["short_code"]
+
+        by_target = defaultdict(list)
+        for row in rows:
+            target = new_ring.shard_for(row["short_code"])
+            if target != source:
+                by_target[target].append(tuple(row))
+
+        for target, records in by_target.items():
+            if not dry_run:
+                async with pools[target].acquire() as conn:
+                    await copy_mappings(conn, records, layouts[target])
+                await pools[source].execute(DELETE_QUERY, [r[0] for r in records])
+            moved[f"{source}->{target}"] += len(records)
+
+        logger.info(
+            {
+                "action": "rebalance",
+                "source": source,
+                "scanned_up_to": after,
+                "moved": sum(len(r) for r in by_target.values()),
+                "dry_run": dry_run,
+            }
+        )
+
+
+async def rebalance(
+    old: Dict[str, str],
+    new: Dict[str, str],
+    batch_size: int = 1000,
+    vnodes: int = 64,
+    dry_run: bool = False,
+) -> Counter:
+    """
+    Move rows from the old layout to their owners in the new one.
+
+    Returns the number of rows moved per "source->target" pair.
+    """
+    for name in old.keys() & new.keys():
+        if old[name] != new[name]:
+            raise ValueError(f"Shard {name!r} has different DSNs in the two layouts")
+    new_ring = HashRing(new, vnodes)
+    pools = {
+        name: await asyncpg.create_pool(dsn, min_size=1, max_size=2)
+        for name, dsn in {**old, **new}.items()
+    }
+    moved: Counter = Counter()
+    layouts: Dict[str, str] = {}
+    try:
+        for name in new:
+            await Database().init_db(pools[name])
+            # An existing table keeps its layout, which may not be PG_PARTITIONING
+            async with pools[name].acquire() as conn:
+                layouts[name] = await current_layout(conn)
+        for source in old:
+            await _move_from(source, pools, layouts, new_ring, batch_size, dry_run, moved)
+    finally:
+        await asyncio.gather(*(pool.close() for pool in pools.values()))
+
+    logger.info(
+        {"action": "rebalance", "status": "complete", "moved": dict(moved), "dry_run": dry_run}
+    )
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--from", dest="old", default=settings.PG_SHARDS_PREVIOUS, help="old layout (name=dsn,...)"
+    )
+    parser.add_argument("--to", dest="new", default=settings.PG_SHARDS, help="new layout")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--vnodes", type=int, default=settings.PG_SHARD_VNODES)
+    parser.add_argument("--dry-run", action="store_true", help="count rows without moving them")
+    args = parser.parse_args()
+
+    old, new = parse_shards(args.old), parse_shards(args.new)
+    if not old or not new:
+        parser.error("both --from and --to (or PG_SHARDS_PREVIOUS and PG_SHARDS) are required")
+    asyncio.run(rebalance(old, new, args.batch_size, args.vnodes, args.dry_run))
+
+
+if __name__ == "__main__":
+    from infrastructure.logging_config import setup_logging
+
+    setup_logging()
+    main()
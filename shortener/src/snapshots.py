@@ -0,0 +1,206 @@
+"""
+Build and maintain the memory-mapped snapshot read-only edge replicas serve from (src/edge.py).
+
+    python src/snapshots.py export data/url_mappings.snap [--run-size 500000]
+    python src/snapshots.py deltas data/deltas [--interval 5] [--max-links 100000]
+    python src/snapshots.py compact data/url_mappings.snap data/deltas
+
+Export reads the active url_mappings of every shard in batches, sorts them in runs of
+--run-size links written next to the output, and merges the runs into the snapshot, so
+memory stays bounded at any table size. The file is renamed into place when complete, and
+edge replicas switch to it on their next refresh.
+
+Deltas consumes the URL_CREATED topic in its own consumer group and writes the links it
+sees as small delta snapshots every --interval seconds (or every --max-links links). Start
+it before the first export: links created while an export runs are in the next delta.
+Offsets are committed as messages are read, so links buffered when the process dies are
+only served once the next export has them.
+
+Compact folds the deltas into the snapshot and removes them, keeping lookups at one
+binary search; expired links are dropped on the way.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import signal
+import tempfile
+import time
+from typing import List, Optional
+
+from application.messaging.callbacks import created_mappings
+from domain.models import URLMapping
+from infrastructure.config import settings
+from infrastructure.database import database
+from infrastructure.kafka_client import kafka_client
+from infrastructure.snapshot import (
+    MappingSnapshot,
+    Record,
+    merge_snapshots,
+    to_record,
+    write_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+DELTA_GROUP_ID = "url_shortener-snapshot-deltas"
+
+
+async def export_snapshot(args: argparse.Namespace) -> int:
+    # Anything created after this point is left to the deltas written after it
+    built_at = time.time()
+    run_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(args.path)) or ".")
+    runs: List[str] = []
+    pending: List[Record] = []
+    total = 0
+
+    def write_run():
+        nonlocal total
+        runs.append(os.path.join(run_dir, f"run-{len(runs):05d}.snap"))
+        total += write_snapshot(runs[-1], pending, built_at)
+        logger.info({"action": "snapshot_export", "status": "run_written", "runs": len(runs)})
+        pending.clear()
+
+    await database.connect()
+    try:
+        async for batch in database.iter_mappings(args.batch_size):
+            pending.extend(map(to_record, batch))
+            if len(pending) >= args.run_size:
+                write_run()
+        if pending or not runs:
+            write_run()
+    finally:
+        await database.close()
+
+    try:
+        if len(runs) == 1:
+            os.replace(runs[0], args.path)
+        else:
+            snapshots = [MappingSnapshot(run) for run in runs]
+            try:
+                total = merge_snapshots(args.path, snapshots, built_at, drop_expired=False)
+            finally:
+                for snapshot in snapshots:
+                    snapshot.close()
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    logger.info({"action": "snapshot_export", "status": "complete", "links": total})
+    return total
+
+
+class DeltaWriter:
+    """
+    Buffers the links announced on the URL_CREATED topic and writes them out as delta
+    snapshots, named so that they sort in the order they were written.
+    """
+
+    def __init__(self, directory: str, max_links: int):
+        self.directory = directory
+        self.max_links = max_links
+        self.pending: List[URLMapping] = []
+        self.written = 0
+
+    async def callback(self, raw_messages: List[bytes]):
+        self.pending.extend(created_mappings(raw_messages))
+        if len(self.pending) >= self.max_links:
+            self.flush()
+
+    def flush(self) -> Optional[str]:
+        if not self.pending:
+            return None
+        path = os.path.join(self.directory, f"delta-{time.time_ns():020d}.snap")
+        links = write_snapshot(path, map(to_record, self.pending))
+        self.pending = []
+        self.written += 1
+        logger.info({"action": "snapshot_delta", "path": path, "links": links})
+        return path
+
+    async def run_forever(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+
+async def write_deltas(args: argparse.Namespace) -> int:
+    os.makedirs(args.directory, exist_ok=True)
+    writer = DeltaWriter(args.directory, args.max_links)
+    await kafka_client.connect_consumer(
+        settings.URL_CREATED_TOPIC, group_id=args.group, auto_offset_reset="latest"
+    )
+    consumer_task = asyncio.create_task(
+        kafka_client.consume_batches(
+            writer.callback,
+            max_records=settings.EVENT_BATCH_SIZE,
+            wait_ms=settings.EVENT_BATCH_WAIT_MS,
+        )
+    )
+    flusher = asyncio.create_task(writer.run_forever(args.interval))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_event_loop()
+    for s in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(s, stop.set)
+    stopped = asyncio.create_task(stop.wait())
+    await asyncio.wait([consumer_task, stopped], return_when=asyncio.FIRST_COMPLETED)
+    stopped.cancel()
+
+    await kafka_client.stop_consuming(consumer_task)
+    flusher.cancel()
+    writer.flush()
+    await kafka_client.close()
+    return writer.written
+
+
+def compact(args: argparse.Namespace) -> int:
+    base = MappingSnapshot(args.path)
+    names = sorted(name for name in os.listdir(args.directory) if name.endswith(".snap"))
+    paths = [os.path.join(args.directory, name) for name in names]
+    deltas = [MappingSnapshot(path) for path in paths]
+    try:
+        # Deltas built before the snapshot are already in it
+        newer = [delta for delta in deltas if delta.built_at > base.built_at]
+        total = merge_snapshots(args.path, [base] + newer)
+    finally:
+        for snapshot in [base] + deltas:
+            snapshot.close()
+    # Only once the new snapshot is in place, so edge replicas never miss a link
+    for path in paths:
+        os.unlink(path)
+    logger.info(
+        {"action": "snapshot_compact", "links": total, "deltas": len(newer), "removed": len(paths)}
+    )
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    exporter = commands.add_parser("export")
+    exporter.add_argument("path")
+    exporter.add_argument("--run-size", type=int, default=500_000, help="links sorted in memory")
+    exporter.add_argument("--batch-size", type=int, default=10_000)
+    deltas = commands.add_parser("deltas")
+    deltas.add_argument("directory")
+    deltas.add_argument("--interval", type=float, default=5.0, help="seconds between deltas")
+    deltas.add_argument("--max-links", type=int, default=100_000)
+    deltas.add_argument("--group", default=DELTA_GROUP_ID, help="Kafka consumer group")
+    compactor = commands.add_parser("compact")
+    compactor.add_argument("path")
+    compactor.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        asyncio.run(export_snapshot(args))
+    elif args.command == "deltas":
+        asyncio.run(write_deltas(args))
+    else:
+        compact(args)
+
+
+if __name__ == "__main__":
+    from infrastructure.logging_config import setup_logging
+
+    setup_logging()
+    main()